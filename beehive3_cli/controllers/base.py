@@ -8,7 +8,10 @@ from cement import ex
 from beecell.crypto_util.fernet import Fernet
 from beecell.types.type_string import str2bool
 from beecell.password import random_password
+from beehive3_cli.core.completion import build_index, format_index, write_index
 from beehive3_cli.core.controller import CliController
+from beehive3_cli.core.exc import CliManagerError
+from beehive3_cli.core.response_cache import get_response_cache
 from beehive3_cli.core.util import list_environments, load_environment_config
 from beehive3_cli.core.version import get_version, get_changelog
 
@@ -41,6 +44,23 @@ class Base(CliController):
                     "help": "Print command execution time",
                 },
             ),
+            (
+                ["--trace"],
+                {
+                    "action": "store_true",
+                    "dest": "trace",
+                    "help": "Print a summary of the http requests at exit",
+                },
+            ),
+            (
+                ["--trace-file"],
+                {
+                    "action": "store",
+                    "dest": "trace_file",
+                    "help": "Write every http request as a json line in this file",
+                    "default": None,
+                },
+            ),
         ]
 
     def _default(self):
@@ -433,66 +453,27 @@ class Base(CliController):
 
     @ex(
         help="get bash completion script",
-        description="get bash completion script",
-        arguments=[],
+        description="get bash completion index. The index is built from the controllers tree and printed or, with "
+        "-write, stored in the completion cache directory ($BEEHIVE_COMPLETION or ~/.beehive3/completion) used by "
+        "beehive_completion.rc",
+        example="beehive bash-completion -write",
+        arguments=[
+            (
+                ["-write"],
+                {
+                    "action": "store_true",
+                    "dest": "write",
+                    "help": "write the index in the completion cache directory",
+                },
+            ),
+        ],
     )
     def bash_completion(self):
-        ctrl_idx = {}
-        for c in self._controllers:
-            parent = c._meta.stacked_on.replace("_", "-")
-            label = c._meta.label.replace("_", "-")
-
-            # set child sections
-            try:
-                ctrl_idx[parent].append(label)
-            except:
-                ctrl_idx[parent] = [label]
-            commands = c._collect_commands()
-
-            # set child commands_
-            for command in commands:
-                if isinstance(command, dict):
-                    command_label = command["label"]
-                    command_arguments = command.get("arguments", [])
-                else:
-                    command_label = command.label
-                    command_arguments = command.arguments
-
-                try:
-                    ctrl_idx[label].append(command_label)
-                except:
-                    ctrl_idx[label] = [command_label]
-
-                # set command arguments
-                for argument in command_arguments:
-                    action = argument[1].get("action", None)
-                    try:
-                        for a in argument[0]:
-                            if a[0] != "-":
-                                pass
-                                # a = '%s..' % a
-                            elif action == "store":
-                                a = "%s" % a
-                                ctrl_idx[label + ":" + command_label].append(a)
-                            else:
-                                ctrl_idx[label + ":" + command_label].append(a)
-                    except:
-                        ctrl_idx[label + ":" + command_label] = []
-                        for a in argument[0]:
-                            if a[0] != "-":
-                                pass
-                                # a = '%s..' % a
-                            elif action == "store":
-                                a = "%s" % a
-                                ctrl_idx[label + ":" + command_label].append(a)
-                            else:
-                                ctrl_idx[label + ":" + command_label].append(a)
-
-        script = []
-        for k, v in ctrl_idx.items():
-            script.append("CMDS[{key}]='{values}'".format(key=k, values=" ".join(v)))
-
-        print("\n".join(script))
+        if self.app.pargs.write is True:
+            filename = write_index(self._controllers, version=get_version())
+            print("completion index written in %s" % filename)
+        else:
+            print(format_index(build_index(self._controllers)), end="")
 
     @ex(
         help="get bash completion envs",
@@ -503,6 +484,45 @@ class Base(CliController):
         envs = list_environments(self.app)
         print(" ".join(envs))
 
+    @ex(
+        help="list cached api responses",
+        description="list the api GET responses of the current environment stored in the response cache. The cache "
+        "is enabled with beehive.response_cache and the cached uris and time to live are set with "
+        "beehive.response_cache_rules",
+        example="beehive response-cache-list",
+        arguments=[],
+    )
+    def response_cache_list(self):
+        cache = get_response_cache(self.app, force=True)
+        if cache is None:
+            raise CliManagerError("response cache of environment %s can not be opened" % self.app.env)
+        headers = ["subsystem", "uri", "query", "age", "expire", "size"]
+        self.app.render(cache.get_all(), headers=headers, maxsize=80)
+
+    @ex(
+        help="clear cached api responses",
+        description="remove the api GET responses of the current environment from the response cache. Without "
+        "-uri all the responses are removed",
+        example="beehive response-cache-clear -uri */servicedefs*",
+        arguments=[
+            (
+                ["-uri"],
+                {
+                    "help": "uri pattern of the responses to remove. Ex. */servicedefs*",
+                    "action": "store",
+                    "type": str,
+                    "default": None,
+                },
+            ),
+        ],
+    )
+    def response_cache_clear(self):
+        cache = get_response_cache(self.app, force=True)
+        if cache is None:
+            raise CliManagerError("response cache of environment %s can not be opened" % self.app.env)
+        count = cache.invalidate(pattern=self.app.pargs.uri)
+        self.app.render({"msg": "%s cached responses removed" % count})
+
     @ex(
         help="list available environments",
         description="list available environments",
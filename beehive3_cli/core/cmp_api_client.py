@@ -5,13 +5,18 @@
 from sys import stdout
 from os import path, mkdir
 from time import sleep
+from threading import Lock, get_ident, local
 from urllib.parse import urlencode
 
 # from beedrones.cmp.client import CmpApiManager, CmpApiClientError
 from bee_client.client import CmpApiManager, CmpApiClientError
 from cement.utils import fs
 from beecell.simple import truncate, dict_get
-from beehive3_cli.core.util import load_environment_config, CmpUtils, rotating_bar
+from beehive3_cli.core.util import load_environment_config, CmpUtils, rotating_bar, run_concurrent
+from beehive3_cli.core.exc import CmpApiError
+from beehive3_cli.core.log import LazyFormat
+from beehive3_cli.core.response_cache import get_response_cache
+from beehive3_cli.core.trace import get_tracer
 
 
 class CmpApiClient(object):
@@ -23,6 +28,16 @@ class CmpApiClient(object):
         self.baseuri = baseuri
         self.key = key
 
+        # token file is rewritten after every call. serialize it when calls are run concurrently
+        self._token_lock = Lock()
+
+        # api managers of the worker threads. See _get_client
+        self._owner = get_ident()
+        self._local = local()
+
+        # optional cache of the read mostly GET responses
+        self.response_cache = get_response_cache(app)
+
         self.client = None
         self._setup()
 
@@ -35,11 +50,8 @@ class CmpApiClient(object):
             stdout.write(next(bar))
             stdout.flush()
 
-    def _setup(self):
-        self.app.log.info("Setup CMP - START")
-
-        self._create_token_dir()
-
+    def _new_client(self):
+        """create a cmp api manager configured from the environment config"""
         config = self.config["cmp"]
 
         auth_endpoint = config.get("endpoint", None)
@@ -52,14 +64,14 @@ class CmpApiClient(object):
                 raise Exception("at least endpoints or auth endpoint must be specified")
             else:
                 # set prefixuri
+                endpoint = auth_endpoint[0]
                 if prefixuri is not None and prefixuri != "":
-                    auth_endpoint[0] = "%s%s" % (auth_endpoint[0], prefixuri)
-                endpoints = {"auth": auth_endpoint[0]}
+                    endpoint = "%s%s" % (endpoint, prefixuri)
+                endpoints = {"auth": endpoint}
         else:
             # set prefixuri
             if prefixuri is not None and prefixuri != "":
-                for k, v in endpoints.items():
-                    endpoints[k] = "%s%s" % (v, prefixuri)
+                endpoints = {k: "%s%s" % (v, prefixuri) for k, v in endpoints.items()}
 
         user = config.get("user", None)
         if user is None:
@@ -106,13 +118,37 @@ class CmpApiClient(object):
 
         user_agent_cli = "Beehive3 Console %s" % get_version()
 
-        self.client = CmpApiManager(
+        client = CmpApiManager(
             endpoints, authparams, key=self.key, proxy=proxy, catalog=config["catalog"], user_agent=user_agent_cli
         )
         if prefixuri is not None and prefixuri != "":
-            self.client.set_prefixuri(prefixuri)
-        self.client.set_task_trace(self._task_trace)
-        self.client.set_debug(True)
+            client.set_prefixuri(prefixuri)
+        client.set_task_trace(self._task_trace)
+        client.set_debug(True)
+        return client
+
+    def _get_client(self):
+        """get the api manager of the current thread.
+
+        CmpApiManager keeps timeout, debug and curl settings of the request in the instance, so api calls run by
+        concurrent workers can not share it. The thread that created the CmpApiClient uses self.client, every
+        other thread gets its own manager with the token of self.client.
+        """
+        if get_ident() == self._owner:
+            return self.client
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self._new_client()
+            token_data = self.client.get_token()
+            client.set_token(token_data.get("token"), seckey=token_data.get("seckey"))
+        return client
+
+    def _setup(self):
+        self.app.log.info("Setup CMP - START")
+
+        self._create_token_dir()
+
+        self.client = self._new_client()
 
         # get token
         token, seckey = self.get_token()
@@ -174,7 +210,7 @@ class CmpApiClient(object):
             f.close()
 
         self.app.log.debug("get environment %s token %s" % (self.app.env, token))
-        self.app.log.debug("get environment %s secret key %s" % (self.app.env, truncate(seckey)))
+        self.app.log.debug("get environment %s secret key %s", self.app.env, LazyFormat(truncate, seckey))
         return token, seckey
 
     def save_token(self, token, seckey):
@@ -198,6 +234,37 @@ class CmpApiClient(object):
         self.app.log.debug("save environment %s token %s" % (self.app.env, token))
 
     def call(self, uri, method, data="", headers=None, timeout=60, silent=True):
+        cache = self.response_cache
+        if cache is None:
+            return self._traced_call(uri, method, data=data, headers=headers, timeout=timeout, silent=silent)
+
+        if method != "GET":
+            try:
+                return self._traced_call(uri, method, data=data, headers=headers, timeout=timeout, silent=silent)
+            finally:
+                cache.invalidate_collection(self.subsystem, uri)
+
+        ttl = cache.get_ttl(uri)
+        if ttl is None or headers is not None:
+            return self._traced_call(uri, method, data=data, headers=headers, timeout=timeout, silent=silent)
+        key = cache.get_key(self.config["cmp"].get("user"), self.subsystem, uri, data)
+        res = cache.get(key)
+        if res is not None:
+            self.app.log.debug("get %s from response cache" % uri)
+            return res
+        res = self._traced_call(uri, method, data=data, headers=headers, timeout=timeout, silent=silent)
+        cache.set(key, self.subsystem, uri, data, ttl, res)
+        return res
+
+    def _traced_call(self, uri, method, data="", headers=None, timeout=60, silent=True):
+        tracer = get_tracer()
+        if tracer is None:
+            return self._call(uri, method, data=data, headers=headers, timeout=timeout, silent=silent)
+        with tracer.request("cmp:%s" % self.subsystem, method, uri):
+            return self._call(uri, method, data=data, headers=headers, timeout=timeout, silent=silent)
+
+    def _call(self, uri, method, data="", headers=None, timeout=60, silent=True):
+        client = self._get_client()
         try:
             # if headers is None:
             #     headers = {}
@@ -205,28 +272,32 @@ class CmpApiClient(object):
             # from beehive3_cli.core.version import get_version
             # headers.update({"User-Agent": "Beehive3 Console %s" % get_version()})
 
-            self.client.set_print_curl(self.app.curl)
-            self.client.set_timeout(timeout)
-            self.client.set_debug(silent)
-            resp = self.client.api_request(self.subsystem, uri, method, data=data, headers=headers)
+            client.set_print_curl(self.app.curl)
+            client.set_timeout(timeout)
+            client.set_debug(silent)
+            resp = client.api_request(self.subsystem, uri, method, data=data, headers=headers)
             if self.app.curl is True:
-                print(self.app.colored_text.blue(self.client.get_curl_request()))
+                print(self.app.colored_text.blue(client.get_curl_request()))
         except CmpApiClientError as ex:
             self.app.log.debug(ex)
+            tracer = get_tracer()
+            if tracer is not None:
+                tracer.set_status(ex.code)
             if self.app.curl is True and self.app.curl_error is True:
-                print(self.app.colored_text.yellow(self.client.get_curl_request() or ""))
+                print(self.app.colored_text.yellow(client.get_curl_request() or ""))
 
             if ex.code == 404:
                 from beecell.remote import NotFoundException
 
                 raise NotFoundException(ex.value)
             else:
-                raise Exception(ex.value)
+                raise CmpApiError(ex.value, code=ex.code)
         finally:
             # set token
-            token_data = self.client.get_token()
+            token_data = client.get_token()
             if token_data.get("token", None) is not None:
-                self.save_token(token_data.get("token", None), token_data.get("seckey", None))
+                with self._token_lock:
+                    self.save_token(token_data.get("token", None), token_data.get("seckey", None))
 
         return resp
 
@@ -364,6 +435,49 @@ class CmpApiClient(object):
                 stdout.write(f":end ({elapsed_str})               \n\r")
                 stdout.flush()
 
+    def wait_tasks(self, taskids, delta=2, maxtime=600, workers=10, output=True, on_status=None):
+        """Wait many tasks with a single poll loop. At every poll the status of the pending tasks is read
+        concurrently.
+
+        :param taskids: list of task id
+        :param delta: poolling interval [default=2]
+        :param maxtime: max time to wait all the tasks [default=600]
+        :param workers: number of concurrent status requests [default=10]
+        ;param output: if True print output [default=True]
+        :param on_status: function called with task id and status when a task ends [optional]
+        :return: dict with status of every task: SUCCESS, FAILURE or TIMEOUT
+        """
+        statuses = {}
+        pending = list(set(taskids))
+        self.app.log.debug("wait for %s tasks" % len(pending))
+        elapsed = 0
+        bar = rotating_bar()
+        while len(pending) > 0:
+            for taskid, status, err in run_concurrent(self.get_task_status, pending, workers=workers):
+                if status in ["SUCCESS", "FAILURE"]:
+                    statuses[taskid] = status
+                    if on_status is not None:
+                        on_status(taskid, status)
+            pending = [taskid for taskid in pending if taskid not in statuses]
+            if len(pending) == 0:
+                break
+            if elapsed > maxtime:
+                for taskid in pending:
+                    statuses[taskid] = "TIMEOUT"
+                    if on_status is not None:
+                        on_status(taskid, "TIMEOUT")
+                break
+            if output is True:
+                stdout.write(next(bar))
+                stdout.flush()
+            sleep(delta)
+            elapsed += delta
+        if output is True and len(taskids) > 0:
+            # cover rotating_bar
+            stdout.write("               \r")
+            stdout.flush()
+        return statuses
+
     def error_if_resource_exists(self, restype=None, name=None, exact_name_match=False, ext_id=None):
         """
         if the resource specified by name or ext_id exists raise exception
@@ -0,0 +1,124 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+import os
+from tempfile import mkstemp
+from threading import Lock
+from typing import Dict, Iterable, List
+
+# env variable with the completion cache directory
+COMPLETION_PATH_ENV = "BEEHIVE_COMPLETION"
+
+# completion index file name
+COMPLETION_INDEX = "commands"
+
+# serialize the read and write of the dynamic completion caches of concurrent workers
+_remember_lock = Lock()
+
+
+def get_completion_path() -> str:
+    """get the completion cache directory. Default is ~/.beehive3/completion"""
+    return os.environ.get(COMPLETION_PATH_ENV, os.path.expanduser("~/.beehive3/completion"))
+
+
+def build_index(controllers) -> Dict[str, List[str]]:
+    """build the completion index from the controllers tree
+
+    :param controllers: list of cement controllers
+    :return: dict with keys:
+        - controller label: child controller and command labels
+        - controller:command: command options
+        - controller:command:pos: name of the first positional argument of the command
+    """
+    index = {}
+    for c in controllers:
+        parent = c._meta.stacked_on.replace("_", "-")
+        label = c._meta.label.replace("_", "-")
+        index.setdefault(parent, []).append(label)
+
+        for command in c._collect_commands():
+            if isinstance(command, dict):
+                command_label = command["label"]
+                command_arguments = command.get("arguments", [])
+            else:
+                command_label = command.label
+                command_arguments = command.arguments
+
+            index.setdefault(label, []).append(command_label)
+            key = "%s:%s" % (label, command_label)
+            options = index.setdefault(key, [])
+            for argument in command_arguments:
+                names = argument[0]
+                if names[0][0] != "-":
+                    index.setdefault(key + ":pos", [names[0]])
+                    continue
+                options.extend(names)
+    return index
+
+
+def format_index(index: Dict[str, List[str]], version: str = None) -> str:
+    """format the completion index as a bash associative array"""
+    lines = []
+    if version is not None:
+        lines.append("# beehive3 %s" % version.strip())
+    for key, values in index.items():
+        lines.append("CMDS[{key}]='{values}'".format(key=key, values=" ".join(values)))
+    return "\n".join(lines) + "\n"
+
+
+def _write_file(filename: str, data: str):
+    """write a file atomically, so that a shell reading it never finds it half written"""
+    dirname = os.path.dirname(filename)
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmp = mkstemp(dir=dirname, prefix=".%s." % os.path.basename(filename), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp, filename)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_index(controllers, version: str = None) -> str:
+    """write the completion index in the completion cache directory
+
+    :param controllers: list of cement controllers
+    :param version: package version [optional]
+    :return: index file name
+    """
+    filename = os.path.join(get_completion_path(), COMPLETION_INDEX)
+    _write_file(filename, format_index(build_index(controllers), version=version))
+    return filename
+
+
+def remember(kind: str, values: Iterable[str], limit: int = 200, replace: bool = False):
+    """store values used by dynamic completions, most recent first. The file is written only when it changes and
+    errors are ignored, completion caches are best effort
+
+    :param kind: cache name. Ex. accounts.<env>
+    :param values: values to add
+    :param limit: max number of values kept [default=200]
+    :param replace: if True values replace the cached ones [default=False]
+    """
+    filename = os.path.join(get_completion_path(), kind)
+    with _remember_lock:
+        _remember(filename, values, limit, replace)
+
+
+def _remember(filename: str, values: Iterable[str], limit: int, replace: bool):
+    try:
+        current = []
+        if os.path.exists(filename):
+            with open(filename, "r") as f:
+                current = f.read().split()
+        values = [str(v) for v in values if v is not None and str(v).strip() != ""]
+        res = values
+        if replace is False:
+            res = values + [v for v in current if v not in values]
+        res = res[:limit]
+        if res != current:
+            _write_file(filename, " ".join(res) + "\n")
+    except OSError:
+        pass
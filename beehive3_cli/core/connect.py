@@ -421,6 +421,43 @@ class SshConnectionManager(object):
 
         return self.__ssh2node2(node, user, key_file, key_string, action=runcmd)
 
+    def sshcmds2node(
+        self,
+        node=None,
+        user=None,
+        key_file=None,
+        key_string=None,
+        cmds=None,
+        timeout=30.0,
+        check=None,
+    ):
+        """run a list of commands on a node resolving user and key and opening the shell once
+
+        :param node: node instance
+        :param user: ssh user
+        :param key_file: private ssh key file [optional]
+        :param key_string: private ssh key string [optional]
+        :param cmds: list of commands
+        :param timeout: timeout of every command
+        :param check: function called with command index and result. When it returns False the next commands are
+            not run [optional]
+        :return: list of command results
+        """
+
+        def runcmds(client):
+            res = []
+            for idx, cmd in enumerate(cmds or []):
+                try:
+                    item = client.cmd(cmd, timeout=timeout)
+                except Exception as ex:
+                    item = {"stderr": str(ex)}
+                res.append(item)
+                if check is not None and check(idx, item) is False:
+                    break
+            return res
+
+        return self.__ssh2node2(node, user, key_file, key_string, action=runcmds)
+
     def sshfile2node(
         self,
         node=None,
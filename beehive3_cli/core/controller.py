@@ -4,10 +4,10 @@
 
 import os
 import sys
-from time import time
+from time import time, sleep
 from pprint import PrettyPrinter
 from argparse import SUPPRESS, Action
-from typing import List, Dict, Union
+from typing import Any, Callable, List, Dict, Tuple, Union
 from tempfile import NamedTemporaryFile
 from urllib.parse import urlencode
 from six import ensure_binary
@@ -15,11 +15,14 @@ from cement import Controller, FrameworkError
 from cement.ext.ext_argparse import _clean_func
 from beecell.types.type_list import merge_list
 from beecell.types.type_dict import dict_get, dict_set
+from beecell.remote import NotFoundException
 from beecell.file import read_file
 from beehive3_cli.core.argument import CliHelpFormatter
 from beehive3_cli.core.cmp_api_client import CmpApiClient
 from beehive3_cli.core.exc import CliManagerError
-from beehive3_cli.core.util import ColoredText, CmpUtils
+from beehive3_cli.core.response_cache import get_response_cache_stats
+from beehive3_cli.core.trace import enable_tracing, get_tracer
+from beehive3_cli.core.util import ColoredText, CmpUtils, run_concurrent
 
 
 BASE_ARGS = [
@@ -38,7 +41,7 @@ BASE_ARGS = [
         {
             "action": "store",
             "dest": "format",
-            "help": "Output format: text, json, colortext",
+            "help": "Output format: text, json, yaml, colortext, ndjson, csv",
             "default": None,
         },
     ),
@@ -114,6 +117,27 @@ PAGINATION_ARGS = [
     ),
 ]
 
+BULK_ARGS = [
+    (
+        ["-workers"],
+        {
+            "help": "number of concurrent requests [default=10]",
+            "action": "store",
+            "type": int,
+            "default": 10,
+        },
+    ),
+    (
+        ["-retries"],
+        {
+            "help": "number of retries of a request failed with a connection or server error [default=0]",
+            "action": "store",
+            "type": int,
+            "default": 0,
+        },
+    ),
+]
+
 
 def ARGS(*list_args) -> list:
     res = merge_list(BASE_ARGS, *list_args)
@@ -165,11 +189,26 @@ class CliController(Controller):
         # mem_usage()
         return res
 
+    @staticmethod
+    def _get_command_label(command) -> str:
+        if isinstance(command, dict):
+            return command["label"]
+        return command.label
+
     def _process_commands(self, controller):
         label = controller._meta.label
         self.app.log.debug("processing commands for '%s' " % label + "controller namespace")
 
         commands = controller._collect_commands()
+
+        # build only the parser of the invoked command. All the parsers are built when the command is not known,
+        # so that help and argparse errors list all the commands of the controller
+        command_label = getattr(self, "_command_label", None)
+        selected = [c for c in commands if self._get_command_label(c) == command_label]
+        if len(selected) > 0:
+            self.app.log.debug("build parser of command '%s' only" % command_label)
+            commands = selected
+
         for command in commands:
             kwargs = self._get_command_parser_options(command)
             # compatibility for cement 3.0.12 command are no more dict but ComandMeta instance
@@ -238,13 +277,16 @@ class CliController(Controller):
 
         pre_params = sys.argv[1:]
         controller = None
+        self._command_label = None
         if len(pre_params) > 0:
             pre_param = pre_params[0].replace("-", "_")
             controller = ctrl_idx.get(pre_param, None)
             for pre_param in pre_params[1:]:
-                pre_param = pre_param.replace("-", "_")
-                next_controller = ctrl_idx.get(pre_param, None)
+                next_controller = ctrl_idx.get(pre_param.replace("-", "_"), None)
                 if next_controller is None:
+                    # first param after the controllers is the command
+                    if controller is not None and not pre_param.startswith("-"):
+                        self._command_label = pre_param
                     break
                 controller = next_controller
 
@@ -264,6 +306,11 @@ class CliController(Controller):
             contr._post_argument_parsing()
             contr._process_parsed_arguments()
 
+        tracer = None
+        trace_file = getattr(self.app.pargs, "trace_file", None)
+        if getattr(self.app.pargs, "trace", False) is True or trace_file is not None:
+            tracer = enable_tracing(trace_file=trace_file)
+
         elapsed = round(time() - start, 3)
         self.app.log.info("########### PRE COMMAND ########### - stop [%s]" % elapsed)
         start2 = time()
@@ -294,11 +341,20 @@ class CliController(Controller):
         if func_name is None:
             pass  # pragma: nocover
         elif hasattr(contr, func_name):
-            res = self._cmd(contr, func_name)
+            try:
+                res = self._cmd(contr, func_name)
+            finally:
+                if tracer is not None:
+                    if getattr(self.app.pargs, "trace", False) is True:
+                        tracer.print_summary()
+                    tracer.close()
             elapsed = round(time() - start, 3)
             elapsed2 = round(time() - start2, 3)
             if getattr(self.app.pargs, "time", False):
                 print("\nexecution time [s]: %s" % elapsed)
+                cache_stats = get_response_cache_stats()
+                if cache_stats is not None:
+                    print("response cache: %(hits)s hits, %(misses)s misses, %(invalidated)s invalidated" % cache_stats)
 
             self.app.log.info("########### COMMAND ########### - stop [%s]" % elapsed2)
             return res
@@ -419,6 +475,10 @@ class BaseController(CliController):
             return False
         return False
 
+    def is_output_stream(self):
+        """True if output format writes one record per line and can be rendered page by page"""
+        return self.format in ("ndjson", "csv")
+
     def is_output_dynamic(self):
         if self.format == "dynamic":
             return True
@@ -459,6 +519,10 @@ class BaseController(CliController):
             self.app.output = self.app._resolve_handler("output", "json_output_handler", raise_error=False)
         elif self.format == "yaml":
             self.app.output = self.app._resolve_handler("output", "yaml_output_handler", raise_error=False)
+        elif self.format == "ndjson":
+            self.app.output = self.app._resolve_handler("output", "ndjson_output_handler", raise_error=False)
+        elif self.format == "csv":
+            self.app.output = self.app._resolve_handler("output", "csv_output_handler", raise_error=False)
         elif self.format == "text" or force_no_color:
             self.app.output = self.app._resolve_handler("output", "tabular_output_handler", raise_error=False)
         elif self.format == "colortext":
@@ -493,7 +557,7 @@ class BaseController(CliController):
                 data[item] = value
 
         data = urlencode(data, doseq=True)
-        self.app.log.info("query data: %s" % data)
+        self.app.log.info("query data: %s", data)
         return data
 
     def add_field_from_pargs_to_data(
@@ -563,8 +627,12 @@ class BaseController(CliController):
         self.debug("self.app.pargs: %s" % self.app.pargs)
         self.debug("self.format: %s" % self.format)
 
+        # text and stream formats render every page as soon as it is fetched
         render_output = True
-        if self.format != "text" and self.format != "colortext":
+        page_separator = True
+        if self.is_output_stream():
+            page_separator = False
+        elif self.format != "text" and self.format != "colortext":
             render_output = False
         if fn_render is None:
             render_output = False
@@ -606,7 +674,8 @@ class BaseController(CliController):
                 self.debug("total: %s" % total)
                 if total is not None:
                     MAX_RECORDS = 10000
-                    if total > MAX_RECORDS:
+                    # stream formats write every page as soon as it is fetched and do not keep records in memory
+                    if total > MAX_RECORDS and not (render_output is True and self.is_output_stream()):
                         self.app.error("total record > %s - use filters" % MAX_RECORDS)
                         return
 
@@ -620,8 +689,9 @@ class BaseController(CliController):
                         if render_output:
                             fn_render(self, res)
 
-                            print("---")
-                            print("")
+                            if page_separator:
+                                print("---")
+                                print("")
                         else:
                             data_key += dict_get(res, key_list)
                     else:
@@ -635,8 +705,9 @@ class BaseController(CliController):
                                 if render_output:
                                     fn_render(self, res)
 
-                                    print("---")
-                                    print("")
+                                    if page_separator:
+                                        print("---")
+                                        print("")
                                 else:
                                     data_key += res[key]
 
@@ -657,8 +728,9 @@ class BaseController(CliController):
                         if render_output:
                             fn_render(self, res, page=page)
 
-                            print("---")
-                            print("")
+                            if page_separator:
+                                print("---")
+                                print("")
                         else:
                             data_key += dict_get(res, key_list)
 
@@ -753,6 +825,180 @@ class BaseController(CliController):
             return res
         return None
 
+    @staticmethod
+    def __task_ids(res, task_key=None) -> List[str]:
+        """get the ids of the tasks started by an api request"""
+        taskids = []
+        if isinstance(res, dict):
+            for key in ["taskid", "nvl_TaskId"]:
+                if res.get(key, None) is not None:
+                    taskids.append(res.get(key))
+            if task_key is not None and dict_get(res, "%s.nvl-activeTask" % task_key) is not None:
+                taskids.append(dict_get(res, "%s.nvl-activeTask" % task_key))
+        return taskids
+
+    def cmp_bulk(
+        self,
+        method: str,
+        items: List[Any],
+        fn_request: Callable[[Any], Tuple[str, Any]],
+        fn_check: Callable[[Any], bool] = None,
+        workers: int = 10,
+        timeout=120,
+        task_timeout=600,
+        delta=2,
+        task_key=None,
+        retries=0,
+        wait=True,
+        on_result: Callable[[dict], None] = None,
+    ) -> List[dict]:
+        """Run one api request for every item with bounded concurrency. The tasks started by all the requests are
+        waited together with a single poll loop instead of one wait for every request.
+
+        :param method: http method: POST, PUT, PATCH or DELETE
+        :param items: list of items
+        :param fn_request: function that get an item and return the request (uri, data)
+        :param fn_check: function that get a response and return False if the request failed [optional]
+        :param workers: number of concurrent requests [default=10]
+        :param timeout: request timeout [default=120]
+        :param task_timeout: max time to wait all the tasks [default=600]
+        :param delta: task poll interval [default=2]
+        :param task_key: response key that contains nvl-activeTask [optional]
+        :param retries: number of retries of a request failed with a connection error or a 5xx status. Requests
+            rejected with a 4xx status are not retried. A retried DELETE that gets not found succeeds [default=0]
+        :param wait: if False do not wait the tasks [default=True]
+        :param on_result: function called with the report item of every item as soon as it ends [optional]
+        :return: list of {"item":.., "status": SUCCESS, FAILURE or TIMEOUT, "error":.., "code":.., "response":..} in
+            items order. code is the http status of a rejected request
+        """
+
+        def request(item):
+            uri, data = fn_request(item)
+            attempt = 0
+            while True:
+                try:
+                    tracer = get_tracer()
+                    if tracer is not None:
+                        tracer.set_retry(attempt)
+                    return self.api.call(uri, method, data=data, timeout=timeout)
+                except NotFoundException:
+                    if method == "DELETE" and attempt > 0:
+                        # the previous attempt was accepted before it failed
+                        return None
+                    raise
+                except Exception as ex:
+                    # requests rejected by the api are not retried, only server and connection errors
+                    code = getattr(ex, "code", None)
+                    if attempt >= retries or (code is not None and 400 <= code < 500):
+                        raise
+                    attempt += 1
+                    self.app.log.warning("%s %s failed, retry %s of %s: %s" % (method, uri, attempt, retries, ex))
+                    sleep(delta * attempt)
+
+        report = {}
+        tasks = {}
+        item_tasks = {}
+        for idx, res, err in run_concurrent(lambda i: request(items[i]), range(len(items)), workers=workers):
+            status, error, code = "SUCCESS", None, None
+            if err is not None:
+                status, error, code = "FAILURE", str(err), getattr(err, "code", None)
+            elif fn_check is not None and fn_check(res) is False:
+                status, error = "FAILURE", "unexpected response: %s" % res
+            elif wait is True:
+                for taskid in set(self.__task_ids(res, task_key)):
+                    tasks[taskid] = idx
+                    item_tasks[idx] = item_tasks.get(idx, 0) + 1
+            report[idx] = {"item": items[idx], "status": status, "error": error, "code": code, "response": res}
+            if on_result is not None and idx not in item_tasks:
+                on_result(report[idx])
+
+        def task_end(taskid, status):
+            idx = tasks[taskid]
+            item = report[idx]
+            if status != "SUCCESS" and item["status"] == "SUCCESS":
+                item["status"] = status
+                if status == "FAILURE":
+                    item["error"] = self.api.get_task_trace(taskid)
+            item_tasks[idx] -= 1
+            if on_result is not None and item_tasks[idx] == 0:
+                on_result(item)
+
+        if len(tasks) > 0:
+            self.api.wait_tasks(
+                list(tasks.keys()),
+                delta=delta,
+                maxtime=task_timeout,
+                workers=workers,
+                output=on_result is None,
+                on_status=task_end,
+            )
+        return [report[idx] for idx in range(len(items))]
+
+    def cmp_bulk_run(
+        self,
+        method: str,
+        oids: List[str],
+        fn_request: Callable[[str], Tuple[str, Any]],
+        entity="item",
+        timeout=120,
+        task_timeout=600,
+        task_key=None,
+        wait=True,
+    ) -> List[dict]:
+        """Run a request for every id of a comma separated id list with cmp_bulk and render the per item summary.
+        Delete requests are confirmed once for all the ids. Concurrency and retries are read from the -workers and
+        -retries command arguments, see BULK_ARGS.
+
+        :param method: http method: PUT, PATCH or DELETE
+        :param oids: list of ids
+        :param fn_request: function that get an id and return the request (uri, data)
+        :param entity: entity name used in confirm message [default=item]
+        :param timeout: request timeout [default=120]
+        :param task_timeout: max time to wait all the tasks [default=600]
+        :param task_key: response key that contains nvl-activeTask [optional]
+        :param wait: if False do not wait the tasks [default=True]
+        :return: cmp_bulk report
+        """
+        if method == "DELETE" and getattr(self.app.pargs, "assumeyes", False) is not True:
+            msg = "You are about to delete %s %s: %s. Are you sure [y/n]? " % (len(oids), entity, ",".join(oids))
+            if input(self.app.colored_text.yellow(msg)) != "y":
+                return []
+
+        report = self.cmp_bulk(
+            method,
+            oids,
+            fn_request,
+            workers=getattr(self.app.pargs, "workers", 10),
+            timeout=timeout,
+            task_timeout=task_timeout,
+            task_key=task_key,
+            retries=getattr(self.app.pargs, "retries", 0),
+            wait=wait,
+        )
+        self.render_bulk_report(report, headers=["id"], fields=["item"])
+        return report
+
+    def render_bulk_report(self, report: List[dict], headers: List[str], fields: List[str], maxsize=80):
+        """render a summary table of a bulk operation and set the exit code if some item failed
+
+        :param report: report returned by cmp_bulk
+        :param headers: table headers. status and error columns are appended
+        :param fields: item fields of every header
+        :param maxsize: max column size [default=80]
+        """
+        rows = []
+        for entry in report:
+            item = entry["item"] if isinstance(entry["item"], dict) else {"item": entry["item"]}
+            row = {h: dict_get(item, f) for h, f in zip(headers, fields)}
+            row.update({"status": entry["status"], "error": entry["error"]})
+            rows.append(row)
+        self.app.render(rows, headers=headers + ["status", "error"], maxsize=maxsize)
+        failed = len([entry for entry in report if entry["status"] != "SUCCESS"])
+        if self.is_output_text():
+            print("%s succeeded, %s failed" % (len(report) - failed, failed))
+        if failed > 0:
+            self.app.exit_code = 1
+
     @classmethod
     def load_file(cls, file_config):
         config = read_file(file_config)
@@ -0,0 +1,42 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from csv import writer
+from sys import stdout
+from cement.utils.misc import minimal_logger
+from ujson import dumps
+from beehive3_cli.core.stream_output import StreamOutputHandler
+
+LOG = minimal_logger(__name__)
+
+
+class CsvOutputHandler(StreamOutputHandler):
+    class Meta:
+        label = "csv_output_handler"
+
+    @staticmethod
+    def _cell(value):
+        if value is None:
+            return ""
+        if isinstance(value, (dict, list)):
+            return dumps(value, ensure_ascii=False)
+        return value
+
+    def write_records(self, headers, records):
+        """Write records as csv rows. The header line is written once, before the first record of the command.
+        Without projection the keys of the first record are used as columns.
+        """
+        LOG.debug("rendering output as csv via %s" % self.__module__)
+        out = writer(stdout)
+        cell = self._cell
+        for record in records:
+            if not isinstance(record, dict):
+                out.writerow([cell(record)])
+                continue
+            if headers is None:
+                headers = list(record.keys())
+            if self.started is False:
+                out.writerow(headers)
+                self.started = True
+            out.writerow([cell(record.get(h)) for h in headers])
@@ -7,3 +7,16 @@ class CliManagerError(Exception):
     """Generic errors."""
 
     pass
+
+
+class CmpApiError(Exception):
+    """Cmp api request rejected with an http error status.
+
+    :param value: error message
+    :param code: http status code
+    """
+
+    def __init__(self, value, code=None):
+        super(CmpApiError, self).__init__(value)
+        self.value = value
+        self.code = code
@@ -5,6 +5,8 @@
 import os
 import logging
 import logging.handlers
+from atexit import register as atexit_register
+from queue import Queue
 from sys import stdout
 from socket import gethostname
 
@@ -20,6 +22,47 @@ from beecell.logger import LoggerHelper
 LOG = minimal_logger(__name__)
 
 
+class LazyFormat(object):
+    """Log message argument computed only when the record is formatted. Use it for large payloads, so that they
+    are serialized only if the log level is enabled.
+
+    Example::
+
+        self.app.log.debug("query result: %s", LazyFormat(truncate, res, size=10000))
+
+    :param func: function that returns the value to log
+    :param args: function positional arguments
+    :param kwargs: function keyword arguments
+    """
+
+    __slots__ = ("func", "args", "kwargs")
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        return str(self.func(*self.args, **self.kwargs))
+
+    __repr__ = __str__
+
+
+class CliQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that enqueue the record itself instead of a formatted copy. Only the message is merged with
+    its arguments, so that the record does not change if the arguments are modified after the log call. Formatting
+    with the handler formatters is done by the background writer.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
 class CliLogHandler(ColorLogHandler):
     class Meta:
         label = "clilog"
@@ -54,6 +97,8 @@ class CliLogHandler(ColorLogHandler):
             max_files=4,
             colorize_file_log=True,
             colorize_console_log=False,
+            async_log=True,
+            syslog=True,
         )
 
         #: Formatter class to use for non-colorized logging (non-tty, file,
@@ -66,6 +111,12 @@ class CliLogHandler(ColorLogHandler):
     def _setup(self, app_obj):
         Handler._setup(self, app_obj)
 
+        # background writers of the async log pipeline. file and syslog handlers are attached to the loggers through
+        # a QueueHandler so that a log call only enqueue the record and disk and network i/o run in a thread
+        self.listeners = {}
+        self.file_handler = None
+        atexit_register(self.close)
+
         if self._meta.namespace is None:
             self._meta.namespace = "%s" % self.app._meta.label
 
@@ -120,6 +171,36 @@ class CliLogHandler(ColorLogHandler):
         # syslog
         self._setup_syslog()
 
+    def _is_async(self) -> bool:
+        return is_true(self.app.config.get(self._meta.config_section, "async_log"))
+
+    def _start_listener(self, name: str, *handlers) -> logging.Handler:
+        """start a background writer for handlers and return the queue handler to attach to the loggers
+
+        :param name: listener name. A running listener with the same name is stopped
+        :param handlers: handlers called by the background writer
+        :return: queue handler
+        """
+        self._stop_listener(name)
+        queue = Queue(-1)
+        listener = logging.handlers.QueueListener(queue, *handlers, respect_handler_level=True)
+        listener.start()
+        self.listeners[name] = listener
+        return CliQueueHandler(queue)
+
+    def _stop_listener(self, name: str):
+        listener = self.listeners.pop(name, None)
+        if listener is not None:
+            # stop write all the queued records before returning
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
+    def close(self):
+        """flush and stop the async log pipeline"""
+        for name in list(self.listeners.keys()):
+            self._stop_listener(name)
+
     def _get_console_format(self):
         format = super(ColorLogHandler, self)._get_console_format()
         colorize = self.app.config.get(self._meta.config_section, "colorize_console_log")
@@ -188,6 +269,10 @@ class CliLogHandler(ColorLogHandler):
             formatter = self._get_file_formatter(format)
             file_handler.setFormatter(formatter)
             file_handler.setLevel(getattr(logging, self.get_level()))
+
+            if self._is_async():
+                file_handler = self._start_listener("file", file_handler)
+                file_handler.setLevel(getattr(logging, self.get_level()))
         else:
             file_handler = NullHandler()
 
@@ -198,13 +283,17 @@ class CliLogHandler(ColorLogHandler):
 
         self.backend.addHandler(file_handler)
 
-        # setup other loggers
+        # setup other loggers. remove the handler added by a previous set_level
         for logger in self.other_backends:
+            if self.file_handler is not None:
+                logger.removeHandler(self.file_handler)
             logger.addHandler(file_handler)
+        self.file_handler = file_handler
 
-    @staticmethod
-    def _setup_syslog():
-        """Add syslog handler."""
+    def _setup_syslog(self):
+        """Add syslog handler. The handler is added only once, also when log level is changed."""
+        if not is_true(self.app.config.get(self._meta.config_section, "syslog")) or "syslog" in self.listeners:
+            return
         logger = logging.getLogger("beecell.paramiko_shell.shell")
         loggers = [logger]
         logging_level = logging.INFO
@@ -212,8 +301,24 @@ class CliLogHandler(ColorLogHandler):
         syslog_server = syslog_server.split(".")[0]
         facility = logging.handlers.SysLogHandler.LOG_LOCAL7
 
+        if not self._is_async():
+            if getattr(self, "syslog_loaded", False) is False:
+                LoggerHelper.syslog_handler(
+                    loggers,
+                    logging_level,
+                    syslog_server,
+                    facility,
+                    frmt=None,
+                    propagate=False,
+                    syslog_port=514,
+                )
+                self.syslog_loaded = True
+            return
+
+        # configure the syslog handler on a private logger and move it behind the queue
+        private_logger = logging.getLogger("%s.syslog" % __name__)
         LoggerHelper.syslog_handler(
-            loggers,
+            [private_logger],
             logging_level,
             syslog_server,
             facility,
@@ -221,6 +326,13 @@ class CliLogHandler(ColorLogHandler):
             propagate=False,
             syslog_port=514,
         )
+        handlers = list(private_logger.handlers)
+        for handler in handlers:
+            private_logger.removeHandler(handler)
+        queue_handler = self._start_listener("syslog", *handlers)
+        queue_handler.setLevel(logging_level)
+        logger.addHandler(queue_handler)
+        logger.propagate = False
 
     def info(self, msg, *args, namespace=None, **kw):
         """
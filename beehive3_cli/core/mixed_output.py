@@ -6,6 +6,7 @@ from cement.core.output import OutputHandler
 from tabulate import tabulate
 from beecell.simple import truncate
 from beehive3_cli.core.util import ColoredText
+from beehive3_cli.core.table_plan import compile_getter
 
 from typing import Callable, Dict, List, Optional, Union, Tuple
 
@@ -60,21 +61,7 @@ class MixedOutputHandler(OutputHandler):
 
     @staticmethod
     def _multi_get(data, key, separator="."):
-        keys = key.split(separator)
-        res = data
-        for k in keys:
-            if isinstance(res, list):
-                try:
-                    res = res[int(k)]
-                except:
-                    res = {}
-            else:
-                if res is not None:
-                    res = res.get(k, {})
-        if res is None or res == {}:
-            res = "-"
-
-        return res
+        return compile_getter(key, separator=separator)(data)
 
     @staticmethod
     def _format_details_data(key, values: Union[List, str]) -> List[Dict]:
@@ -167,30 +154,37 @@ class MixedOutputHandler(OutputHandler):
         opt_maxcolumn = options.get("max_column", 15)
         opt_notruncate = options.get("notruncate", False)
 
+        # compile columns once: accessor, truncation and transform of every column
+        separator = options.get("separator", ".")
+        getters = [compile_getter(key, separator=separator) for key in fields]
+        columns = []
+        for col_idx in range(max(fields_len, 1)):
+            field_name = fields[col_idx] if col_idx < fields_len else None
+            header_name = headers[col_idx] if col_idx < headers_len else None
+            truncable = not (opt_notruncate) and header_name not in self.DO_NOT_TRUNCATE
+            columns.append((truncable, transforms.get(field_name)))
+
+        yellow = self.c.yellow
         table = []
         even_line = True
         for item in values:
-            raw = []  # line before formatting
-            # get line value
+            # get line value. str() is needed in some cases
             if isinstance(item, dict):
-                for key in fields:
-                    val = MixedOutputHandler._multi_get(item, key, separator=options.get("separator", "."))
-                    raw.append(str(val))  # str() is needed in some cases
+                raw = [str(getter(item)) for getter in getters]
             else:
-                raw.append(str(item))  # str() is needed in some cases
+                raw = [str(item)]
 
             # apply formatting to line
             for col_idx, col_val in enumerate(raw):
-                field_name = fields[col_idx] if col_idx < fields_len else None
-                header_name = headers[col_idx] if col_idx < headers_len else None
-                # check if truncate set and truncate if permitted and necessary
-                if not (opt_notruncate) and header_name not in self.DO_NOT_TRUNCATE and len(col_val) > opt_maxcolumn:
+                truncable, transform = columns[col_idx]
+                # truncate if permitted and necessary
+                if truncable and len(col_val) > opt_maxcolumn:
                     col_val = truncate(col_val, opt_maxcolumn, replace_new_line=False)
-                # check if specific transform for field, otherwise color even/odd (line based)
-                if field_name in transforms.keys():
-                    raw[col_idx] = transforms[field_name](col_val)
+                # specific transform for field, otherwise color even/odd (line based)
+                if transform is not None:
+                    raw[col_idx] = transform(col_val)
                 elif even_line:
-                    raw[col_idx] = self.c.yellow(col_val)
+                    raw[col_idx] = yellow(col_val)
                 else:
                     raw[col_idx] = col_val
 
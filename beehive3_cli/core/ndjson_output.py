@@ -0,0 +1,23 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from sys import stdout
+from cement.utils.misc import minimal_logger
+from ujson import dumps
+from beehive3_cli.core.stream_output import StreamOutputHandler
+
+LOG = minimal_logger(__name__)
+
+
+class NdjsonOutputHandler(StreamOutputHandler):
+    class Meta:
+        label = "ndjson_output_handler"
+
+    def write_records(self, headers, records):
+        """Write every record as a compact json document on its own line."""
+        LOG.debug("rendering output as ndjson via %s" % self.__module__)
+        write = stdout.write
+        for record in records:
+            write(dumps(record, ensure_ascii=False))
+            write("\n")
@@ -0,0 +1,185 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from fnmatch import fnmatch
+from hashlib import sha256
+from os import chmod
+from sqlite3 import connect
+from threading import Lock
+from time import time
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+from ujson import dumps, loads
+from beecell.types.type_string import str2bool
+from beehive3_cli.core.util import open_local_store
+
+# default time to live in seconds of the cached responses by uri pattern
+RESPONSE_CACHE_RULES = {
+    "*/srvcatalogs*": 900,
+    "*/catalogs*": 900,
+    "*/servicedefs*": 900,
+    "*/definitions*": 900,
+    "*/servicetypes*": 900,
+    "*/flavors*": 900,
+    "*/volumetypes*": 900,
+    "*/images*": 900,
+    "*/templates*": 900,
+    "*/job_templates*": 900,
+}
+
+
+class ResponseCache(object):
+    """Local sqlite cache of the responses of read mostly api GET requests. Only requests whose uri matches one of
+    the rules are cached, every response expires after the time to live of the first matching rule. A write request
+    on an uri removes the cached responses of the same collection.
+
+    :param path: sqlite file path
+    :param rules: dict {uri pattern: time to live in seconds}. Patterns are fnmatch patterns applied to the uri
+        without query string [default=RESPONSE_CACHE_RULES]
+    """
+
+    def __init__(self, path: str, rules: Dict[str, int] = None):
+        self.rules = rules if rules is not None else RESPONSE_CACHE_RULES
+        self.lock = Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidated": 0}
+        self.conn = connect(path, check_same_thread=False)
+        chmod(path, 0o600)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                subsystem TEXT NOT NULL,
+                uri TEXT NOT NULL,
+                query TEXT,
+                created REAL NOT NULL,
+                expire REAL NOT NULL,
+                body TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def get_ttl(self, uri: str) -> Optional[int]:
+        """get the time to live of an uri. Return None if the uri is not cached"""
+        uri = uri.split("?")[0]
+        for pattern, ttl in self.rules.items():
+            if fnmatch(uri, pattern):
+                return ttl
+        return None
+
+    @staticmethod
+    def get_key(user: str, subsystem: str, uri: str, query) -> str:
+        if isinstance(query, dict):
+            query = urlencode(sorted(query.items()))
+        return sha256(dumps([user, subsystem, uri, query or ""]).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """get a response not yet expired. Return None and count a miss if it is not in the cache"""
+        with self.lock:
+            row = self.conn.execute("SELECT body FROM responses WHERE key = ? AND expire > ?", (key, time())).fetchone()
+            self.stats["hits" if row is not None else "misses"] += 1
+        if row is None:
+            return None
+        return loads(row[0])
+
+    def set(self, key: str, subsystem: str, uri: str, query, ttl: int, body):
+        """store a response"""
+        if isinstance(query, dict):
+            query = urlencode(sorted(query.items()))
+        now = time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, subsystem, uri, query, created, expire, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, subsystem, uri, query or "", now, now + ttl, dumps(body)),
+            )
+            self.conn.commit()
+
+    def invalidate(self, pattern: str = None, subsystem: str = None) -> int:
+        """remove the responses whose uri matches pattern or all the responses if pattern is None
+
+        :param pattern: fnmatch uri pattern. Ex. */servicedefs* [optional]
+        :param subsystem: remove only the responses of this subsystem [optional]
+        :return: number of removed responses
+        """
+        with self.lock:
+            rows = self.conn.execute("SELECT key, subsystem, uri FROM responses").fetchall()
+            keys = [
+                (r[0],)
+                for r in rows
+                if (pattern is None or fnmatch(r[2], pattern)) and (subsystem is None or r[1] == subsystem)
+            ]
+            self.conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+            self.conn.commit()
+            self.stats["invalidated"] += len(keys)
+        return len(keys)
+
+    def invalidate_collection(self, subsystem: str, uri: str) -> int:
+        """remove the responses of the collection of an uri. Ex. /v1.0/nws/servicedefs/123 removes the responses
+        of /v1.0/nws/servicedefs and /v1.0/nws/servicedefs/*"""
+        collection = "/".join(uri.split("?")[0].split("/")[:4])
+        return self.invalidate(pattern="%s*" % collection, subsystem=subsystem)
+
+    def get_all(self) -> List[dict]:
+        """get all the responses as {"subsystem":.., "uri":.., "query":.., "age":.., "expire":.., "size":..}"""
+        now = time()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT subsystem, uri, query, created, expire, length(body) FROM responses ORDER BY uri"
+            ).fetchall()
+        return [
+            {
+                "subsystem": r[0],
+                "uri": r[1],
+                "query": r[2],
+                "age": round(now - r[3]),
+                "expire": round(r[4] - now),
+                "size": r[5],
+            }
+            for r in rows
+        ]
+
+
+# response caches opened by the current process by file path
+_caches = {}
+_caches_lock = Lock()
+
+
+def get_response_cache(app, env: str = None, force: bool = False) -> Optional[ResponseCache]:
+    """open the response cache of an environment. Return None if the cache is disabled or it can not be used
+
+    :param app: cement app
+    :param env: environment [default=app.env]
+    :param force: open the cache also when beehive.response_cache is false [default=False]
+    """
+    if force is False and str2bool(app.config.get("beehive", "response_cache")) is not True:
+        return None
+
+    def open_cache(cache_path):
+        with _caches_lock:
+            cache = _caches.get(cache_path)
+            if cache is None:
+                cache = _caches[cache_path] = ResponseCache(
+                    cache_path, rules=app.config.get("beehive", "response_cache_rules")
+                )
+            return cache
+
+    return open_local_store(app, "responses.db", open_cache, env=env, name="response cache")
+
+
+def get_response_cache_stats() -> Optional[Dict[str, int]]:
+    """get hits, misses and invalidated responses of the caches used by the current process. Return None if no
+    cache was used"""
+    with _caches_lock:
+        caches = list(_caches.values())
+    if len(caches) == 0:
+        return None
+    stats = {"hits": 0, "misses": 0, "invalidated": 0}
+    for cache in caches:
+        for k, v in cache.stats.items():
+            stats[k] += v
+    return stats
@@ -0,0 +1,107 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from abc import abstractmethod
+from sys import stdout
+from typing import Iterator, List, Optional, Tuple
+from cement.core.output import OutputHandler
+from beehive3_cli.core.table_plan import compile_getter
+
+
+class StreamOutputHandler(OutputHandler):
+    """Base class for output handlers that write one record per line as data is rendered. Every call to render
+    writes the records immediately, so paged fetchers can render page by page without building one big string.
+
+    The headers and fields passed to render are used as projection: only the selected fields are serialized and
+    they are keyed by header. -fields and -afields command arguments are applied like in tabular output.
+    """
+
+    class Meta:
+        label = "stream_output_handler"
+
+    def _setup(self, app_obj):
+        super(StreamOutputHandler, self)._setup(app_obj)
+        # set when the first record is written. used by formats with an header line
+        self.started = False
+
+    def _resolve_projection(self, headers: Optional[List], fields: Optional[List]) -> Tuple[List, List]:
+        """resolve headers and fields with -fields and -afields command arguments"""
+        new_fields = []
+        if getattr(self.app.pargs, "afields", None) is not None:
+            new_fields = self.app.pargs.afields.split(",")
+        elif getattr(self.app.pargs, "fields", None) is not None:
+            headers = fields = self.app.pargs.fields.split(",")
+
+        if headers is not None:
+            headers = headers + new_fields
+        if fields is None:
+            fields = headers
+        else:
+            fields = fields + new_fields
+        # records are keyed by header. use field keys when headers do not match fields
+        if fields is not None and (headers is None or len(headers) != len(fields)):
+            headers = fields
+        return headers, fields
+
+    def _records(self, data, **kwargs) -> Tuple[Optional[List], Iterator]:
+        """get headers and projected records from render data
+
+        :return: (headers, records). headers is None when no projection is set and records are the full items
+        """
+        key = kwargs.get("key", None)
+        details = kwargs.get("details", False)
+        separator = kwargs.get("separator", ".")
+
+        if data is not None and key is not None:
+            data = data[key]
+        if data is None:
+            return None, iter([])
+        if isinstance(data, dict) and (details is True or data.get("msg", None) is not None):
+            return None, iter([data])
+
+        values = data if isinstance(data, list) else [data]
+        headers, fields = self._resolve_projection(kwargs.get("headers", None), kwargs.get("fields", None))
+        if fields is None:
+            return None, iter(values)
+
+        other_headers = kwargs.get("other_headers", None)
+        if other_headers:
+            headers = headers + [h for h in other_headers if h not in headers]
+            fields = fields + [h for h in other_headers if h not in fields]
+
+        getters = [compile_getter(field, separator=separator, missing=None) for field in fields]
+
+        def project():
+            for item in values:
+                if isinstance(item, dict):
+                    yield {header: getter(item) for header, getter in zip(headers, getters)}
+                else:
+                    yield item
+
+        return headers, project()
+
+    @abstractmethod
+    def write_records(self, headers: Optional[List], records: Iterator):
+        """write records to stdout
+
+        :param headers: record keys or None when records are the full items
+        :param records: iterator of records
+        """
+        pass
+
+    def render(self, data, *args, **kwargs):
+        """Write data records to stdout, one per line.
+
+        :param data: data to print
+        :param headers: list of headers used as record keys
+        :param fields: list of fields key to serialize
+        :param key: if set use data from data.get(key)
+        :param details: if True write data as a single record
+        :param separator: key separator used when parsing key [default=.]
+        :return: None
+        """
+        headers, records = self._records(data, **kwargs)
+        self.write_records(headers, records)
+        stdout.flush()
+        return None
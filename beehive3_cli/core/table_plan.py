@@ -0,0 +1,223 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from re import compile as re_compile
+from sys import stdout
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from beecell.simple import truncate
+
+ANSI_ESCAPE = re_compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+# placeholder returned by a column getter when the field is missing
+MISSING = "-"
+
+
+def visible_len(value: str) -> int:
+    """length of a string without ansi escape sequences"""
+    if "\x1b" not in value:
+        return len(value)
+    return len(ANSI_ESCAPE.sub("", value))
+
+
+def compile_getter(key: str, separator: str = ".", missing: Any = MISSING) -> Callable[[dict], Any]:
+    """Compile an accessor for a dotted field. The key is split once and the returned function walks dicts and
+    lists like the output handlers _multi_get did for every cell.
+
+    :param key: field key. Ex. details.volumes.0.name
+    :param separator: key separator [default=.]
+    :param missing: value returned when the field is missing, None or empty [default=-]
+    :return: function that get the field value from a dict
+    """
+    keys = key.split(separator)
+
+    if len(keys) == 1:
+
+        def getter(data):
+            res = data.get(key, None)
+            if res is None or res == {}:
+                return missing
+            return res
+
+        return getter
+
+    def getter(data):
+        res = data
+        for k in keys:
+            if isinstance(res, list):
+                try:
+                    res = res[int(k)]
+                except Exception:
+                    res = {}
+            elif res is not None:
+                res = res.get(k, {})
+        if res is None or res == {}:
+            return missing
+        return res
+
+    return getter
+
+
+class ColumnPlan(object):
+    """Column plan compiled once per table. It holds an accessor for every field, the transform functions already
+    resolved to column indexes and the truncation size, so that building a row does not repeat any lookup.
+
+    :param fields: list of fields key
+    :param transform: dict with function to apply to columns [optional]
+    :param separator: key separator [default=.]
+    :param maxsize: max cell length. None disable truncation [default=None]
+    :param missing: value used for missing fields [default=-]
+    """
+
+    def __init__(
+        self,
+        fields: List[str],
+        transform: Optional[Dict[str, Callable]] = None,
+        separator: str = ".",
+        maxsize: Optional[int] = None,
+        missing: Any = MISSING,
+    ):
+        if fields is None:
+            fields = []
+        self.fields = fields
+        self.maxsize = maxsize
+        self.missing = missing
+        self.getters = [compile_getter(field, separator=separator, missing=missing) for field in fields]
+
+        # resolve transform to the first column with the same field, like list.index
+        self.transforms = []
+        if transform is not None:
+            for k, func in transform.items():
+                if k in fields:
+                    self.transforms.append((fields.index(k), func))
+
+    def cells(self, item) -> List[Any]:
+        """get raw cells value"""
+        if isinstance(item, dict):
+            return [getter(item) for getter in self.getters]
+        return [item]
+
+    def apply_transforms(self, raw: List[Any]) -> List[Any]:
+        size = len(raw)
+        for idx, func in self.transforms:
+            if idx < size:
+                try:
+                    raw[idx] = func(raw[idx])
+                except ValueError:
+                    pass
+        return raw
+
+    def truncate(self, raw: List[Any]) -> List[Any]:
+        maxsize = self.maxsize
+        if maxsize is None:
+            return raw
+        return [
+            x if isinstance(x, str) and len(x) <= maxsize else truncate(x, maxsize, replace_new_line=False) for x in raw
+        ]
+
+    def row(self, item) -> List[Any]:
+        """get a table row: cells value, transforms and truncation"""
+        return self.truncate(self.apply_transforms(self.cells(item)))
+
+    def rows(self, values: Iterable) -> Iterable[List[Any]]:
+        for item in values:
+            yield self.row(item)
+
+
+class TableStreamWriter(object):
+    """Write a plain table row by row instead of formatting the whole table in memory like tabulate does. Column
+    widths are computed from the headers and from the first sample rows; longer cells in the following rows are
+    written as they are. As in tabulate, columns whose sample values are all numbers are right aligned.
+
+    :param headers: table headers [optional]
+    :param sample: number of rows used to compute column widths [default=1000]
+    :param stream: output stream [default=stdout]
+    :param separator: column separator [default=two spaces like tabulate plain]
+    """
+
+    def __init__(self, headers: Optional[List[str]] = None, sample: int = 1000, stream=None, separator: str = "  "):
+        self.headers = headers
+        self.sample = sample
+        self.stream = stream if stream is not None else stdout
+        self.separator = separator
+        self.widths = None
+        self.numeric = set()
+
+    @staticmethod
+    def __is_number(value) -> bool:
+        if isinstance(value, bool):
+            return False
+        if isinstance(value, (int, float)):
+            return True
+        try:
+            float(value)
+            return True
+        except (TypeError, ValueError):
+            return False
+
+    def __set_numeric(self, rows: List[List[Any]]):
+        """get the columns with only numbers in the sample rows. Empty cells are ignored"""
+        numeric = {}
+        for row in rows:
+            for idx, cell in enumerate(row):
+                if cell is None or cell == "":
+                    continue
+                numeric[idx] = numeric.get(idx, True) and self.__is_number(cell)
+        self.numeric = {idx for idx, value in numeric.items() if value is True}
+
+    def __set_widths(self, rows: List[List[str]]):
+        widths = []
+        if self.headers:
+            widths = [visible_len(h) for h in self.headers]
+        for row in rows:
+            for idx, cell in enumerate(row):
+                size = visible_len(cell)
+                if idx >= len(widths):
+                    widths.append(size)
+                elif size > widths[idx]:
+                    widths[idx] = size
+        self.widths = widths
+
+    def __format(self, row: List[str]) -> str:
+        widths = self.widths
+        num = len(widths)
+        last = len(row) - 1
+        cells = []
+        for idx, cell in enumerate(row):
+            if idx >= num:
+                cells.append(cell)
+            elif idx in self.numeric:
+                cells.append(" " * (widths[idx] - visible_len(cell)) + cell)
+            elif idx == last:
+                cells.append(cell)
+            else:
+                cells.append(cell + " " * (widths[idx] - visible_len(cell)))
+        return self.separator.join(cells)
+
+    def write(self, rows: Iterable[List[Any]]) -> int:
+        """write rows
+
+        :param rows: iterable of rows
+        :return: number of rows written
+        """
+        rows = iter(rows)
+        buffer = []
+        for row in rows:
+            buffer.append(list(row))
+            if len(buffer) >= self.sample:
+                break
+        self.__set_numeric(buffer)
+        buffer = [[str(cell) for cell in row] for row in buffer]
+        self.__set_widths(buffer)
+
+        write = self.stream.write
+        if self.headers:
+            write(self.__format(self.headers).rstrip() + "\n")
+        for row in buffer:
+            write(self.__format(row).rstrip() + "\n")
+        count = len(buffer)
+        for row in rows:
+            write(self.__format([str(cell) for cell in row]).rstrip() + "\n")
+            count += 1
+        self.stream.flush()
+        return count
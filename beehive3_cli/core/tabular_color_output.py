@@ -2,10 +2,16 @@
 #
 # (C) Copyright 2018-2024 CSI-Piemonte
 
+from copy import deepcopy
 from cement.core.output import OutputHandler
 from tabulate import tabulate
 from beecell.simple import truncate
+from beecell.types.type_string import bool2str
 from beehive3_cli.core.util import ColoredText
+from beehive3_cli.core.table_plan import MISSING, ColumnPlan, TableStreamWriter, compile_getter
+
+# placeholder used to skip coloring of missing cells
+MISSING_CELL = object()
 
 
 class TabularColorOutputHandler(OutputHandler):
@@ -14,24 +20,11 @@ class TabularColorOutputHandler(OutputHandler):
     class Meta:
         label = "tabular_color_output_handler"
 
-    def _multi_get(self, data, key, separator="."):
-        keys = key.split(separator)
-        res = data
-        for k in keys:
-            if isinstance(res, list):
-                try:
-                    res = res[int(k)]
-                except:
-                    res = {}
-            else:
-                if res is not None:
-                    res = res.get(k, {})
-        # if isinstance(res, list):
-        #     res = res
-        if res is None or res == {}:
-            res = "-"
+        #: tables with more rows are written row by row without tabulate
+        stream_threshold = 5000
 
-        return res
+    def _multi_get(self, data, key, separator="."):
+        return compile_getter(key, separator=separator)(data)
 
     def _tabularprint(
         self,
@@ -73,56 +66,74 @@ class TabularColorOutputHandler(OutputHandler):
             if other_headers is not None:
                 headers.extend(other_headers)
 
-        table = []
         if fields is None:
             fields = headers
         else:
             fields.extend(new_fields)
 
-        for item in values:
-            raw = []
-            if isinstance(item, dict):
-                for key in fields:
-                    val = self._multi_get(item, key, separator=separator)
-                    raw.append(val)
-            else:
-                raw.append(item)
-
-            # base_transform = {
-            #     "base_state": self.app.color_error,
-            #     "state": self.app.color_error,
-            #     "status": self.app.color_error,
-            # }
-            # if transform is None:
-            #     transform = base_transform
-            # else:
-            #     base_transform.update(transform)
-            #     transform = base_transform
-
-            # apply transform
-            # print("transform: %s" % transform)
-            for k, func in transform.items():
-                try:
-                    raw_item = fields.index(k)
-                    # print("raw_item: %s" % raw_item)
-                    # print("raw: %s" % raw)
-
-                    raw[raw_item] = func(raw[raw_item])
-                except ValueError:
-                    pass
-
-            # if getattr(self.app.pargs, "notruncate", False) is False:
-            #     raw = map(lambda x: truncate(x, maxsize, replace_new_line=False), raw)
-
-            table.append(raw)
+        # compile columns once for all the rows. transforms are applied after coloring
+        if transform is None:
+            transform = {}
+        plan = ColumnPlan(fields, transform=transform, separator=separator, missing=MISSING_CELL)
+        notruncate = getattr(self.app.pargs, "notruncate", False)
+        colorable = []
+        for field in plan.fields:
+            colortext = transform.get(field + ".colortext")
+            colorable.append((transform.get(field) is None or colortext is True) and colortext in (None, True))
+
+        # only list rows are colored: odd rows keep default color, even rows are yellow
+        color_rows = isinstance(data, list)
+        even_func = self.c.yellow
+        odd_func = lambda a: a
+
+        def build_row(i, item):
+            raw = plan.cells(item)
+            if color_rows is True and isinstance(item, dict):
+                func = even_func if i % 2 == 1 else odd_func
+                for idx, value in enumerate(raw):
+                    if colorable[idx] is True and value is not MISSING_CELL:
+                        raw[idx] = self._color_cell(transform, plan.fields[idx], value, maxsize, notruncate, func)
+            raw = [MISSING if value is MISSING_CELL else value for value in raw]
+            return plan.apply_transforms(raw)
+
+        if print_header is True and table_style == "plain":
+            headers = [self.c.gray(h) for h in headers]
+
+        rows = (build_row(i, item) for i, item in enumerate(values))
+
+        # very large plain tables are written row by row
+        if len(values) > self._meta.stream_threshold and table_style == "plain" and showindex == "never":
+            writer = TableStreamWriter(headers=headers if print_header is True else None)
+            writer.write(rows)
+            return
 
+        table = list(rows)
         if print_header is True:
-            if table_style == "plain":
-                headers = [self.c.gray(h) for h in headers]
             print(tabulate(table, headers=headers, tablefmt=table_style, showindex=showindex))
         else:
             print(tabulate(table, tablefmt=table_style, showindex=showindex))
 
+    def _color_cell(self, transform, field, value, maxsize, notruncate, func):
+        """color a single cell value like color_item does for the item key"""
+        vtype = type(value)
+        if vtype == str:
+            if notruncate is False:
+                value = truncate(value, size=maxsize, replace_new_line=False)
+            return func(value)
+        elif vtype == bool:
+            return func(bool2str(value))
+        elif vtype == int or vtype == float:
+            return func(str(value))
+        elif vtype == dict:
+            value = deepcopy(value)
+            self.color_item(transform, value, maxsize, func, parent_item_key=field + ".")
+        elif vtype == list:
+            value = deepcopy(value)
+            for subitem in value:
+                if type(subitem) == dict:
+                    self.color_item(transform, subitem, maxsize, func)
+        return value
+
     def color_even(self, transform, item, maxsize, parent_item_key: str = ""):
         func = lambda a: self.c.yellow(a)
         self.color_item(transform, item, maxsize, func, parent_item_key)
@@ -238,9 +249,8 @@ class TabularColorOutputHandler(OutputHandler):
         if data is None:
             self.app.error("data is undefined")
 
-        from copy import deepcopy
-
-        color_data = deepcopy(data)
+        # rows are colored cell by cell while printing, data is never modified
+        color_data = data
 
         # print("+++++ key: %s" % key)
         # print("+++++ data: %s" % data)
@@ -268,9 +278,9 @@ class TabularColorOutputHandler(OutputHandler):
         if details is True:
             resp = []
 
-            # manage data
+            # manage data can modify data
             if manage_data is not None:
-                color_data, sections = manage_data(color_data)
+                color_data, sections = manage_data(deepcopy(color_data))
 
             maxsize = 500
 
@@ -314,18 +324,6 @@ class TabularColorOutputHandler(OutputHandler):
             base_transform.update(transform)
             transform = base_transform
 
-        def __color_rows(data):
-            i: int = 0
-            new_data = []
-            for item in data:
-                i += 1
-                if i % 2 == 0:
-                    self.color_even(transform, item, maxsize)
-                else:
-                    self.color_odd(transform, item, maxsize)
-                new_data.append(item)
-            return new_data
-
         if isinstance(data, dict) or isinstance(data, list):
             if data is not None and "page" in data:
                 print("Page: %s" % data["page"])
@@ -340,10 +338,6 @@ class TabularColorOutputHandler(OutputHandler):
                 )
                 print("")
 
-            # color odd rows
-            if isinstance(color_data, list):
-                color_data = __color_rows(color_data)
-
             self._tabularprint(
                 color_data,
                 table_style,
@@ -361,8 +355,6 @@ class TabularColorOutputHandler(OutputHandler):
             for section in sections:
                 print("\n" + fn(section.get("title")))
                 color_data = section.get("value")
-                if isinstance(color_data, list):
-                    color_data = __color_rows(color_data)
                 self._tabularprint(
                     color_data,
                     table_style,
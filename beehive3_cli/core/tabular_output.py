@@ -6,6 +6,7 @@ from cement.core.output import OutputHandler
 from tabulate import tabulate
 from beecell.simple import truncate
 from beehive3_cli.core.util import ColoredText
+from beehive3_cli.core.table_plan import ColumnPlan, TableStreamWriter, compile_getter
 
 
 class TabularOutputHandler(OutputHandler):
@@ -14,24 +15,11 @@ class TabularOutputHandler(OutputHandler):
     class Meta:
         label = "tabular_output_handler"
 
-    def _multi_get(self, data, key, separator="."):
-        keys = key.split(separator)
-        res = data
-        for k in keys:
-            if isinstance(res, list):
-                try:
-                    res = res[int(k)]
-                except:
-                    res = {}
-            else:
-                if res is not None:
-                    res = res.get(k, {})
-        # if isinstance(res, list):
-        #     res = res
-        if res is None or res == {}:
-            res = "-"
+        #: tables with more rows are written row by row without tabulate
+        stream_threshold = 5000
 
-        return res
+    def _multi_get(self, data, key, separator="."):
+        return compile_getter(key, separator=separator)(data)
 
     def _tabularprint(
         self,
@@ -70,48 +58,33 @@ class TabularOutputHandler(OutputHandler):
             if other_headers is not None:
                 headers.extend(other_headers)
 
-        table = []
         if fields is None:
             fields = headers
         else:
             fields.extend(new_fields)
 
-        for item in values:
-            raw = []
-            if isinstance(item, dict):
-                for key in fields:
-                    val = self._multi_get(item, key, separator=separator)
-                    raw.append(val)
-            else:
-                raw.append(item)
-
-            base_transform = {
-                "base_state": self.app.color_error,
-                "state": self.app.color_error,
-                "status": self.app.color_error,
-            }
-            if transform is None:
-                transform = base_transform
-            else:
-                base_transform.update(transform)
-                transform = base_transform
-
-            # apply transform
-            for k, func in transform.items():
-                try:
-                    raw_item = fields.index(k)
-                    raw[raw_item] = func(raw[raw_item])
-                except ValueError:
-                    pass
-
-            if getattr(self.app.pargs, "notruncate", False) is False:
-                raw = map(lambda x: truncate(x, maxsize, replace_new_line=False), raw)
-
-            table.append(raw)
+        # compile columns once for all the rows
+        base_transform = {
+            "base_state": self.app.color_error,
+            "state": self.app.color_error,
+            "status": self.app.color_error,
+        }
+        if transform is not None:
+            base_transform.update(transform)
+        maxsize = None if getattr(self.app.pargs, "notruncate", False) is True else maxsize
+        plan = ColumnPlan(fields, transform=base_transform, separator=separator, maxsize=maxsize)
+
+        if print_header is True and table_style == "plain":
+            headers = [self.c.gray(h) for h in headers]
+
+        # very large plain tables are written row by row
+        if len(values) > self._meta.stream_threshold and table_style == "plain" and showindex == "never":
+            writer = TableStreamWriter(headers=headers if print_header is True else None)
+            writer.write(plan.rows(values))
+            return
 
+        table = [plan.row(item) for item in values]
         if print_header is True:
-            if table_style == "plain":
-                headers = [self.c.gray(h) for h in headers]
             print(tabulate(table, headers=headers, tablefmt=table_style, showindex=showindex))
         else:
             print(tabulate(table, tablefmt=table_style, showindex=showindex))
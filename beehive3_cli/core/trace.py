@@ -0,0 +1,247 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from contextlib import contextmanager
+from sys import stderr
+from threading import Lock, local
+from time import time
+from typing import List, Optional
+from ujson import dumps
+
+try:
+    import urllib3
+except ImportError:
+    urllib3 = None
+
+
+class RequestTracer(object):
+    """Record every http request made by the cli: method, path, status, bytes, connect and first byte time, total
+    time and retries.
+
+    Api requests are recorded by CmpApiClient.call. The requests of the orchestrator clients are recorded by hooks
+    on urllib3, that add connection time (dns, tcp and tls) and time to first byte to the requests of every client.
+    Records are appended to a json lines file as soon as a request ends, if a file is given.
+
+    :param trace_file: json lines trace file [optional]
+    """
+
+    def __init__(self, trace_file: str = None):
+        self.start = time()
+        self.records = []
+        self.lock = Lock()
+        self.local = local()
+        self.file = open(trace_file, "w") if trace_file is not None else None
+
+    def __stack(self) -> list:
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def current(self) -> Optional[dict]:
+        """get the request running in the current thread"""
+        stack = self.__stack()
+        return stack[-1] if len(stack) > 0 else None
+
+    def set_status(self, status: int):
+        """set the http status of the request running in the current thread"""
+        record = self.current()
+        if record is not None:
+            record["status"] = status
+
+    def set_retry(self, retry: int):
+        """set the retry number of the next request of the current thread"""
+        self.local.retry = retry
+
+    def begin(self, client: str, method: str, path: str) -> dict:
+        record = {
+            "client": client,
+            "method": method,
+            "path": path.split("?")[0],
+            "status": None,
+            "bytes": None,
+            "connect_ms": None,
+            "ttfb_ms": None,
+            "total_ms": None,
+            "retries": getattr(self.local, "retry", 0),
+            "start_ms": round((time() - self.start) * 1000, 1),
+            "error": None,
+        }
+        self.local.retry = 0
+        self.__stack().append(record)
+        return record
+
+    def end(self, record: dict, error: Exception = None):
+        record["total_ms"] = round((time() - self.start) * 1000 - record["start_ms"], 1)
+        if error is not None:
+            record["error"] = str(error)
+            if record["status"] is None:
+                record["status"] = getattr(error, "code", None)
+        stack = self.__stack()
+        for idx in range(len(stack) - 1, -1, -1):
+            if stack[idx] is record:
+                del stack[idx]
+                break
+        with self.lock:
+            self.records.append(record)
+            if self.file is not None:
+                self.file.write(dumps(record) + "\n")
+                self.file.flush()
+
+    @contextmanager
+    def request(self, client: str, method: str, path: str):
+        """record a request
+
+        Example::
+
+            with tracer.request("cmp:resource", "GET", "/v1.0/nrs/entities") as record:
+                res = client.api_request(...)
+        """
+        record = self.begin(client, method, path)
+        try:
+            yield record
+        except Exception as ex:
+            self.end(record, error=ex)
+            raise
+        self.end(record)
+
+    def summary(self) -> List[dict]:
+        """get the requests grouped by client, method and path, slowest first"""
+        groups = {}
+        with self.lock:
+            records = list(self.records)
+        for r in records:
+            item = groups.setdefault(
+                (r["client"], r["method"], r["path"]),
+                {
+                    "client": r["client"],
+                    "method": r["method"],
+                    "path": r["path"],
+                    "count": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "bytes": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                },
+            )
+            item["count"] += 1
+            item["errors"] += 1 if r["error"] is not None else 0
+            item["retries"] += r["retries"]
+            item["bytes"] += r["bytes"] or 0
+            item["total_ms"] = round(item["total_ms"] + r["total_ms"], 1)
+            item["max_ms"] = max(item["max_ms"], r["total_ms"])
+        return sorted(groups.values(), key=lambda x: x["total_ms"], reverse=True)
+
+    def print_summary(self, out=stderr):
+        """print the summary table of the requests"""
+        from tabulate import tabulate
+
+        rows = self.summary()
+        headers = ["client", "method", "path", "count", "errors", "retries", "bytes", "total_ms", "max_ms"]
+        print("", file=out)
+        print(tabulate([[r[h] for h in headers] for r in rows], headers=headers, tablefmt="simple"), file=out)
+        with self.lock:
+            total = len(self.records)
+        print("%s requests in %ss" % (total, round(time() - self.start, 3)), file=out)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+_tracer: Optional[RequestTracer] = None
+
+
+def get_tracer() -> Optional[RequestTracer]:
+    """get the active request tracer. Return None if tracing is disabled"""
+    return _tracer
+
+
+def enable_tracing(trace_file: str = None) -> RequestTracer:
+    """enable request tracing for the rest of the run
+
+    :param trace_file: json lines trace file [optional]
+    :return: request tracer
+    """
+    global _tracer
+    if _tracer is None:
+        _tracer = RequestTracer(trace_file=trace_file)
+        _install_urllib3_hooks()
+    return _tracer
+
+
+def disable_tracing():
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+    _tracer = None
+
+
+def _install_urllib3_hooks():
+    """wrap urllib3 connect and urlopen to measure connection time, time to first byte and status of the requests
+    of all the http clients. Requests made outside a traced api call are recorded as http requests"""
+    if urllib3 is None or getattr(urllib3, "_beehive_traced", False) is True:
+        return
+
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool
+
+    def wrap_connect(connect):
+        def traced_connect(conn, *args, **kwargs):
+            tracer = get_tracer()
+            record = tracer.current() if tracer is not None else None
+            if record is None:
+                return connect(conn, *args, **kwargs)
+            start = time()
+            try:
+                return connect(conn, *args, **kwargs)
+            finally:
+                record["connect_ms"] = round((time() - start) * 1000 + (record["connect_ms"] or 0), 1)
+
+        return traced_connect
+
+    urlopen = HTTPConnectionPool.urlopen
+
+    def traced_urlopen(pool, method, url, *args, **kwargs):
+        tracer = get_tracer()
+        if tracer is None:
+            return urlopen(pool, method, url, *args, **kwargs)
+        record = tracer.current()
+        if record is not None and record.get("_http") is True:
+            # urllib3 retry or redirect of the current request
+            record["retries"] += 1
+            return urlopen(pool, method, url, *args, **kwargs)
+
+        own = record is None
+        if own is True:
+            record = tracer.begin("http:%s" % pool.host, method, url)
+        record["_http"] = True
+        start = time()
+        try:
+            resp = urlopen(pool, method, url, *args, **kwargs)
+            record["ttfb_ms"] = round((time() - start) * 1000, 1)
+            record["status"] = resp.status
+            length = resp.headers.get("Content-Length")
+            record["bytes"] = int(length) if length is not None and length.isdigit() else None
+            return resp
+        except Exception as ex:
+            if own is True:
+                record.pop("_http", None)
+                tracer.end(record, error=ex)
+                own = False
+            raise
+        finally:
+            record.pop("_http", None)
+            if own is True:
+                tracer.end(record)
+
+    http_connect = HTTPConnection.connect
+    https_connect = HTTPSConnection.connect
+    HTTPConnection.connect = wrap_connect(http_connect)
+    if https_connect is not http_connect:
+        HTTPSConnection.connect = wrap_connect(https_connect)
+    HTTPConnectionPool.urlopen = traced_urlopen
+    urllib3._beehive_traced = True
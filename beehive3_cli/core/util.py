@@ -2,17 +2,27 @@
 #
 # (C) Copyright 2018-2024 CSI-Piemonte
 
+import os
 from sys import stdout
-from typing import Generator, List, Callable, Tuple, Optional, AbstractSet
+from typing import Any, Generator, Iterable, List, Callable, Tuple, Optional, AbstractSet
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from uuid import UUID
 from re import match
 from functools import wraps
 from time import time, sleep
 from pathlib import Path
+from threading import Lock
+from copy import deepcopy
+from base64 import urlsafe_b64decode
+from six import ensure_binary
+import ujson
 from pygments.style import Style
 from pygments.token import Token
 from cement.utils import fs
+from beecell.crypto_util.fernet import Fernet
 from beecell.simple import read_file
+from beecell.types.type_string import str2bool
+from beehive3_cli.core.completion import remember
 from beehive3_cli.core.exc import CliManagerError
 
 
@@ -62,27 +72,202 @@ def duration(precision=3):
     return wrapper
 
 
+def run_concurrent(
+    fn: Callable[[Any], Any], items: Iterable, workers: int = 10
+) -> Generator[Tuple[Any, Any, Optional[Exception]], None, None]:
+    """Run fn over items with at most workers calls in flight. Items are consumed lazily, so a generator of
+    pages can be passed without loading everything in memory.
+
+    :param fn: function called with a single item
+    :param items: iterable of items
+    :param workers: max number of concurrent calls [default=10]
+    :return: generator of (item, result, exception) in completion order. exception is None on success
+    """
+    if workers is None or workers <= 1:
+        for item in items:
+            try:
+                yield item, fn(item), None
+            except Exception as ex:
+                yield item, None, ex
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        items = iter(items)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < workers * 2:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[executor.submit(fn, item)] = item
+
+            if len(pending) == 0:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                ex = future.exception()
+                if ex is not None:
+                    yield item, None, ex
+                else:
+                    yield item, future.result(), None
+
+
+def chunks(items: List, size: int) -> Generator[List, None, None]:
+    """split items in lists of size items"""
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def reduce_latest(items: Iterable[dict], group_key: str, order_key: str, latest: dict = None) -> dict:
+    """Consume items as a stream and keep only the item with the greatest order_key for every group. Memory grows
+    with the number of groups, not with the number of items.
+
+    :param items: iterable of dict
+    :param group_key: key used to group items. Ex. workload_id
+    :param order_key: key used to compare items of the same group. Ex. created_at
+    :param latest: dict {group: item} to update [optional]
+    :return: dict {group: item}
+    """
+    if latest is None:
+        latest = {}
+    for item in items:
+        group = item.get(group_key)
+        current = latest.get(group)
+        if current is None or (item.get(order_key) or "") > (current.get(order_key) or ""):
+            latest[group] = item
+    return latest
+
+
+# parsed environment configs by (file path, modification time, size, secret)
+_environment_configs = {}
+_environment_configs_lock = Lock()
+
+
 def load_config(file_name, secret=None):
     """load config from file"""
     data = read_file(file_name, secret=secret)
     return data
 
 
+def _read_compiled_config(app, cache_file: str, source: dict) -> Optional[dict]:
+    """read the compiled environment config. Return None if it does not exist or it is not of the current file"""
+    if os.path.isfile(cache_file) is False:
+        return None
+    with open(cache_file, "rb") as f:
+        data = f.read()
+    if app.key:
+        data = Fernet(urlsafe_b64decode(app.key)).decrypt(data)
+    data = ujson.loads(data)
+    if data.get("source") != source:
+        return None
+    return data.get("config")
+
+
+def _write_compiled_config(app, cache_file: str, source: dict, config: dict):
+    """write the compiled environment config readable only by the current user. When a secret is configured the
+    compiled config is encrypted with it"""
+    data = ensure_binary(ujson.dumps({"source": source, "config": config}))
+    if app.key:
+        data = Fernet(urlsafe_b64decode(app.key)).encrypt(data)
+    if os.path.exists(os.path.dirname(cache_file)) is False:
+        os.makedirs(os.path.dirname(cache_file))
+    tmp_file = "%s.%s.tmp" % (cache_file, os.getpid())
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_file, cache_file)
+
+
+def _load_environment_config(app, env, file_name, source):
+    cache_file = None
+    if str2bool(app.config.get("beehive", "environment_config_cache")) is True:
+        cache_file = fs.abspath("%s/%s.config.cache" % (app.config.get("beehive", "token_file_path"), env))
+
+    env_configs = None
+    loaded_from = "file"
+    if cache_file is not None:
+        try:
+            env_configs = _read_compiled_config(app, cache_file, source)
+            loaded_from = "compiled file" if env_configs is not None else "file"
+        except Exception as ex:
+            app.log.warning("compiled environment config %s can not be used: %s" % (cache_file, ex))
+
+    if env_configs is None:
+        env_configs = load_config(file_name, secret=app.key)
+        if cache_file is not None and env_configs is not None:
+            try:
+                _write_compiled_config(app, cache_file, source, env_configs)
+            except Exception as ex:
+                app.log.warning("compiled environment config %s can not be written: %s" % (cache_file, ex))
+
+    if env_configs is None or env_configs.get("cmp", None) is None:
+        raise CliManagerError("No configuration file found for the environment specified")
+
+    # orchestrator labels used by bash completion
+    labels = set()
+    for orchestrators in (env_configs.get("orchestrators") or {}).values():
+        labels.update((orchestrators or {}).keys())
+    remember("orchestrators.%s" % env, sorted(labels), replace=True)
+
+    return env_configs, loaded_from
+
+
 def load_environment_config(app, env=None):
-    """load environment config"""
+    """load environment config.
+
+    The config is parsed and decrypted once per process for every file path and modification time, later calls
+    return a copy of it. When beehive.environment_config_cache is true the parsed config is also written in the
+    token_file_path directory, encrypted with the cli secret, and used by the next runs until the file changes.
+    """
     if env is None:
         env = app.env
     file = fs.join_exists(app.environment_config_path, "%s.yml" % env)
 
-    if file[1] is True:
-        env_configs = load_config(file[0], secret=app.key)
-    else:
-        raise CliManagerError("No configuration file found for the environment specified")
-
-    if env_configs is None or env_configs.get("cmp", None) is None:
+    if file[1] is False:
         raise CliManagerError("No configuration file found for the environment specified")
 
-    return env_configs
+    start = time()
+    stat = os.stat(file[0])
+    source = {"path": os.path.abspath(file[0]), "mtime": stat.st_mtime_ns, "size": stat.st_size}
+    key = (source["path"], source["mtime"], source["size"], app.key)
+    with _environment_configs_lock:
+        env_configs = _environment_configs.get(key)
+        loaded_from = "memory"
+        if env_configs is None:
+            env_configs, loaded_from = _load_environment_config(app, env, file[0], source)
+            _environment_configs[key] = env_configs
+    app.log.debug("load environment %s config from %s in %sms" % (env, loaded_from, round((time() - start) * 1000, 2)))
+    return deepcopy(env_configs)
+
+
+def open_local_store(app, suffix: str, factory: Callable[[str], Any], env: str = None, name: str = "local store"):
+    """open a local store of an environment. The store file is <token_file_path>/<env>.<suffix> and the directory
+    is created when missing
+
+    :param app: cement app
+    :param suffix: file name suffix. Ex. dfwlog.db
+    :param factory: function that get the file path and return the opened store
+    :param env: environment [default=app.env]
+    :param name: store name used in the warning [default=local store]
+    :return: the store or None if it can not be used. The error is logged as warning
+    """
+    if env is None:
+        env = app.env
+    store_path = None
+    try:
+        token_path = fs.abspath(app.config.get("beehive", "token_file_path"))
+        if os.path.exists(token_path) is False:
+            os.makedirs(token_path)
+        store_path = "%s/%s.%s" % (token_path, env, suffix)
+        return factory(store_path)
+    except Exception as ex:
+        app.log.warning("%s %s can not be used: %s" % (name, store_path, ex))
+        return None
 
 
 def list_environments(app):
@@ -19,6 +19,8 @@ try:
     from beehive3_cli.core.tabular_color_output import TabularColorOutputHandler
     from beehive3_cli.core.dynamic_output import DynamicOutputHandler
     from beehive3_cli.core.yaml_output import YamlOutputHandler
+    from beehive3_cli.core.ndjson_output import NdjsonOutputHandler
+    from beehive3_cli.core.csv_output import CsvOutputHandler
     from beehive3_cli.core.util import ColoredText
 
     from beehive3_cli.core.mixed_output import MixedOutputHandler
@@ -33,6 +35,9 @@ try:
     CONFIG["beehive"]["print_curl_request"] = False
     CONFIG["beehive"]["print_curl_request_error"] = False
     CONFIG["beehive"]["environment_config_path"] = ""
+    CONFIG["beehive"]["environment_config_cache"] = False
+    CONFIG["beehive"]["response_cache"] = False
+    CONFIG["beehive"]["response_cache_rules"] = None
     CONFIG["beehive"]["cmp_post_install_path"] = "~"
     CONFIG["beehive"]["cmp_config_path"] = "~"
     CONFIG["beehive"]["colored"] = True
@@ -52,6 +57,15 @@ try:
         # get a list of sections
         s = app.config.get("beehive", "debug")
 
+    def close_logging(app):
+        """Flush and stop the async log pipeline
+
+        :param app: cement app
+        """
+        close = getattr(app.log, "close", None)
+        if close is not None:
+            close()
+
     def load_configs(app):
         app.env = app.config.get("beehive", "default_env")
         app.format = app.config.get("beehive", "default_format")
@@ -123,6 +137,8 @@ try:
                 DynamicOutputHandler,
                 JsonOutputHandler,
                 YamlOutputHandler,
+                NdjsonOutputHandler,
+                CsvOutputHandler,
                 CliArgumentHandler,
                 CliLogHandler,
                 TabularColorOutputHandler,
@@ -133,6 +149,7 @@ try:
             hooks = [
                 ("post_setup", setup_logging),
                 ("post_setup", load_configs),
+                ("pre_close", close_logging),
             ]
 
             plugin_dirs = [os.path.join(os.path.dirname(__file__), "plugins")]
@@ -7,7 +7,7 @@ from oauthlib.oauth2.rfc6749.clients.backend_application import BackendApplicati
 from oauthlib.oauth2.rfc6749.clients.legacy_application import LegacyApplicationClient
 from cement.ext.ext_argparse import ex
 from requests_oauthlib.oauth2_session import OAuth2Session
-from beehive3_cli.core.controller import ARGS, PARGS
+from beehive3_cli.core.controller import ARGS, BULK_ARGS, PARGS
 from beehive3_cli.plugins.auth.controllers.auth import AuthChildController
 
 logger = getLogger(__name__)
@@ -192,14 +192,15 @@ class Oauth2SessionController(Oauth2ControllerChild):
                         "type": str,
                     },
                 ),
-            ]
+            ],
+            BULK_ARGS,
         ),
     )
     def delete(self):
-        oids = self.app.pargs.id
-        for oid in oids.split(","):
-            uri = "%s/user_sessions/%s" % (self.baseuri, oid)
-            self.cmp_delete(uri, entity="user session %s" % oid)
+        oids = self.app.pargs.id.split(",")
+        self.cmp_bulk_run(
+            "DELETE", oids, lambda oid: ("%s/user_sessions/%s" % (self.baseuri, oid), ""), entity="user sessions"
+        )
 
 
 class AuthorizationCodeController(Oauth2ControllerChild):
@@ -270,14 +271,18 @@ class AuthorizationCodeController(Oauth2ControllerChild):
                         "type": str,
                     },
                 ),
-            ]
+            ],
+            BULK_ARGS,
         ),
     )
     def delete(self):
-        oids = self.app.pargs.id
-        for oid in oids.split(","):
-            uri = "%s/authorization_codes/%s" % (self.baseuri, oid)
-            self.cmp_delete(uri, entity="user session %s" % oid)
+        oids = self.app.pargs.id.split(",")
+        self.cmp_bulk_run(
+            "DELETE",
+            oids,
+            lambda oid: ("%s/authorization_codes/%s" % (self.baseuri, oid), ""),
+            entity="authorization codes",
+        )
 
 
 class ClientController(Oauth2ControllerChild):
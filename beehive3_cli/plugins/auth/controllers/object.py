@@ -4,7 +4,7 @@
 
 from urllib.parse import urlencode, quote
 from cement import ex
-from beehive3_cli.core.controller import PARGS, ARGS, StringAction
+from beehive3_cli.core.controller import PARGS, ARGS, BULK_ARGS, StringAction
 from beehive3_cli.plugins.auth.controllers.auth import AuthChildController
 
 
@@ -388,15 +388,17 @@ class AuthObjectController(AuthChildController):
                         "type": str,
                     },
                 ),
-            ]
+            ],
+            BULK_ARGS,
         ),
     )
     def del_object(self):
         oids = self.app.pargs.ids.split(",")
-        for oid in oids:
-            print(oid)
+
+        def request(oid):
             if oid.find(":") >= 0:
                 oid = quote(oid)
                 oid = oid.replace("//", "__")
-            uri = "%s/objects/%s" % (self.baseuri, oid)
-            self.cmp_delete(uri, entity="object %s" % oid)
+            return "%s/objects/%s" % (self.baseuri, oid), ""
+
+        self.cmp_bulk_run("DELETE", oids, request, entity="objects")
@@ -8,7 +8,7 @@ from jwt import encode as jwt_encode
 from cement import ex
 from requests_oauthlib import OAuth2Session
 from beehive.common.jwtclient import JWTClient
-from beehive3_cli.core.controller import PARGS, ARGS
+from beehive3_cli.core.controller import PARGS, ARGS, BULK_ARGS
 from beehive3_cli.plugins.auth.controllers.auth import AuthChildController
 
 
@@ -178,18 +178,18 @@ class AuthTokenController(AuthChildController):
                         "type": str,
                     },
                 ),
-            ]
+            ],
+            BULK_ARGS,
         ),
     )
     def delete(self):
         oid = self.app.pargs.id
         if oid == "all":
             uri = "%s/tokens" % self.baseuri
-            tokens = self.cmp_get(uri, data="").get("tokens")
-            for token in tokens:
-                token = token.get("token")
-                uri = "%s/tokens/%s" % (self.baseuri, token)
-                self.cmp_delete(uri, entity="token %s" % token)
+            tokens = [token.get("token") for token in self.cmp_get(uri, data="").get("tokens")]
+            self.cmp_bulk_run(
+                "DELETE", tokens, lambda token: ("%s/tokens/%s" % (self.baseuri, token), ""), entity="tokens"
+            )
         else:
             uri = "%s/tokens/%s" % (self.baseuri, oid)
             self.cmp_delete(uri, entity="token %s" % oid)
@@ -11,6 +11,7 @@ from beecell.types.type_dict import dict_get
 from beedrones.awx.client import AwxManager
 from beehive3_cli.core.controller import BaseController, BASE_ARGS, PAGINATION_ARGS
 from beehive3_cli.core.util import load_environment_config
+from beehive3_cli.plugins.awx.util.follow import AwxJobFollower, JOB_FINAL_STATUS, strip_ansi
 
 
 def AWX_ARGS(*list_args):
@@ -78,11 +79,23 @@ class AwxPlatformController(BaseController):
         self.client = AwxManager(uri)
         self.client.authorize(self.conf.get("user"), self.conf.get("pwd"), key=self.key)
 
+    def __check_job(self, job):
+        status = job["status"]
+        job_id = job["id"]
+        if status in ["failed", "error"]:
+            self.app.log.error(job["result_traceback"])
+            raise Exception("job %s error" % job_id)
+        elif status == "canceled":
+            self.app.log.error("job %s cancelled" % job_id)
+            raise Exception("job %s cancelled" % job_id)
+        else:
+            self.app.log.info("job %s successful" % job_id)
+
     def __wait_for_job(self, job_query_func, job_id, maxtime=600, delta=1):
         job = job_query_func(job_id)
         status = job["status"]
         elapsed = 0
-        while status not in ["successful", "failed", "error", "canceled"]:
+        while status not in JOB_FINAL_STATUS:
             stdout.write(".")
             stdout.flush()
             job = job_query_func(job_id)
@@ -91,14 +104,24 @@ class AwxPlatformController(BaseController):
             elapsed += delta
             if elapsed >= maxtime:
                 raise TimeoutError("job %s query timeout" % job_id)
-        if status in ["failed", "error"]:
-            self.app.log.error(job["result_traceback"])
-            raise Exception("job %s error" % job_id)
-        elif status == "cancelled":
-            self.app.log.error(job["job %s cancelled" % job_id])
-            raise Exception("job %s cancelled" % job_id)
+        self.__check_job(job)
+
+    def __follow_job(self, resource, job_id, maxtime=3600):
+        """write job output while the job runs"""
+        job = AwxJobFollower(resource, job_id, maxtime=maxtime).follow()
+        self.__check_job(job)
+
+    def __print_stdout(self, resource, oid):
+        if getattr(self.app.pargs, "follow", False) is True:
+            AwxJobFollower(resource, oid).follow()
+            return
+        res = resource.stdout(oid)
+        if self.is_output_text():
+            stdout.write(strip_ansi(res.get("content")))
+            stdout.write("\n")
+            stdout.flush()
         else:
-            self.app.log.info("job %s successful" % job_id)
+            self.app.render(res, details=True)
 
     @ex(help="ping awx", description="ping awx", arguments=AWX_ARGS())
     def ping(self):
@@ -666,6 +689,14 @@ class AwxPlatformController(BaseController):
                     ["-verbosity"],
                     {"help": "verbosity", "action": "store", "type": int, "default": 0},
                 ),
+                (
+                    ["-follow"],
+                    {
+                        "help": "write job output while the job runs",
+                        "action": "store_true",
+                        "dest": "follow",
+                    },
+                ),
             ]
         ),
     )
@@ -685,6 +716,8 @@ class AwxPlatformController(BaseController):
             extra_vars=extra_vars,
             become_enabled=False,
         )
+        if self.app.pargs.follow is True:
+            self.__follow_job(self.client.ad_hoc_command, res["id"])
         self.app.render(res, details=True)
 
     @ex(
@@ -713,28 +746,20 @@ class AwxPlatformController(BaseController):
                     ["id"],
                     {"help": "job id", "action": "store", "type": str, "default": None},
                 ),
+                (
+                    ["-follow"],
+                    {
+                        "help": "write job output while the job runs",
+                        "action": "store_true",
+                        "dest": "follow",
+                    },
+                ),
             ]
         ),
     )
     def ad_hoc_command_stdout(self):
         oid = self.app.pargs.id
-        res = self.client.ad_hoc_command.stdout(oid)
-        if self.is_output_text():
-            content = res.get("content").split("\n")
-            for i in content:
-                i = (
-                    i.replace("\x1b[0;32m", "")
-                    .replace("\x1b[0;33m", "")
-                    .replace("\x1b[1;31m", "")
-                    .replace("\x1b[1;35m", "")
-                    .replace("\x1b[0;31m", "")
-                    .replace("\x1b[0;36m", "")
-                )
-                if i == "\x1b[":
-                    continue
-                print(i.replace("\x1b[", "").replace("0m", ""))
-        else:
-            self.app.render(res, details=True)
+        self.__print_stdout(self.client.ad_hoc_command, oid)
 
     @ex(
         help="get jobs",
@@ -810,28 +835,20 @@ class AwxPlatformController(BaseController):
                     ["id"],
                     {"help": "job id", "action": "store", "type": str, "default": None},
                 ),
+                (
+                    ["-follow"],
+                    {
+                        "help": "write job output while the job runs",
+                        "action": "store_true",
+                        "dest": "follow",
+                    },
+                ),
             ]
         ),
     )
     def job_stdout(self):
         oid = self.app.pargs.id
-        res = self.client.job.stdout(oid)
-        if self.is_output_text():
-            content = res.get("content").split("\n")
-            for i in content:
-                i = (
-                    i.replace("\x1b[0;32m", "")
-                    .replace("\x1b[0;33m", "")
-                    .replace("\x1b[1;31m", "")
-                    .replace("\x1b[1;35m", "")
-                    .replace("\x1b[0;31m", "")
-                    .replace("\x1b[0;36m", "")
-                )
-                if i == "\x1b[":
-                    continue
-                print(i.replace("\x1b[", "").replace("0m", ""))
-        else:
-            self.app.render(res, details=True)
+        self.__print_stdout(self.client.job, oid)
 
     @ex(
         help="get job events",
@@ -1883,6 +1900,14 @@ class AwxPlatformController(BaseController):
                         "default": None,
                     },
                 ),
+                (
+                    ["-follow"],
+                    {
+                        "help": "write job output while the job runs",
+                        "action": "store_true",
+                        "dest": "follow",
+                    },
+                ),
             ]
         ),
     )
@@ -1919,7 +1944,10 @@ class AwxPlatformController(BaseController):
             # 'limit': limit
         }
         job = self.client.job_template.launch(oid, **params)
-        self.__wait_for_job(self.client.job.get, job["id"], delta=2)
+        if self.app.pargs.follow is True:
+            self.__follow_job(self.client.job, job["id"])
+        else:
+            self.__wait_for_job(self.client.job.get, job["id"], delta=2)
         self.app.render({"msg": "launch template %s" % oid})
 
     @ex(
@@ -0,0 +1,117 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from sys import stdout
+from time import sleep, time
+from beehive3_cli.core.table_plan import ANSI_ESCAPE
+
+# awx job final status
+JOB_FINAL_STATUS = ["successful", "failed", "error", "canceled"]
+
+
+def strip_ansi(text: str) -> str:
+    """remove ansi escape sequences with a single compiled pass"""
+    if text is None:
+        return ""
+    return ANSI_ESCAPE.sub("", text)
+
+
+class AwxJobFollower(object):
+    """Follow an awx job while it runs and write only the new output. When the awx resource exposes job events,
+    events are read incrementally with counter__gt, so the job output is never downloaded in full; otherwise the
+    stdout is read again at every poll and only the lines after the last printed one are written.
+
+    Polling backs off when there is no new output and comes back to min_delta as soon as new output arrives.
+
+    :param resource: awx client resource. Ex. client.job or client.ad_hoc_command
+    :param job_id: job id
+    :param min_delta: min poll interval in seconds [default=0.5]
+    :param max_delta: max poll interval in seconds [default=10]
+    :param maxtime: max follow time in seconds [default=3600]
+    :param page_size: max events read for every request [default=200]
+    :param stream: output stream [default=stdout]
+    """
+
+    def __init__(self, resource, job_id, min_delta=0.5, max_delta=10, maxtime=3600, page_size=200, stream=None):
+        self.resource = resource
+        self.job_id = job_id
+        self.min_delta = min_delta
+        self.max_delta = max_delta
+        self.maxtime = maxtime
+        self.page_size = page_size
+        self.stream = stream if stream is not None else stdout
+        self.counter = 0
+        self.line = 0
+        self.use_events = getattr(resource, "events", None) is not None
+
+    def write(self, text: str) -> int:
+        """write text without ansi sequences and return the number of lines"""
+        text = strip_ansi(text).rstrip("\n")
+        if text == "":
+            return 0
+        self.stream.write(text + "\n")
+        return text.count("\n") + 1
+
+    def poll_events(self) -> int:
+        """write the stdout of the events after the last one written
+
+        :return: number of lines written
+        """
+        lines = 0
+        while True:
+            query = {"counter__gt": self.counter, "order_by": "counter", "page_size": self.page_size}
+            events = self.resource.events(self.job_id, query=query)
+            for event in events:
+                self.counter = max(self.counter, event.get("counter", 0))
+                lines += self.write(event.get("stdout"))
+            if len(events) < self.page_size:
+                break
+        return lines
+
+    def poll_stdout(self, final=False) -> int:
+        """write the stdout lines after the last one written
+
+        :param final: if True write also the last line, that can be incomplete while the job runs
+        :return: number of lines written
+        """
+        content = strip_ansi(self.resource.stdout(self.job_id).get("content", "")).split("\n")
+        if final is False:
+            content = content[:-1]
+        new_lines = content[self.line :]
+        self.line = len(content)
+        for line in new_lines:
+            self.stream.write(line + "\n")
+        return len(new_lines)
+
+    def poll(self, final=False) -> int:
+        if self.use_events is True:
+            lines = self.poll_events()
+            # events can be saved by awx some time after the job end
+            while final is True and lines > 0 and self.poll_events() > 0:
+                pass
+        else:
+            lines = self.poll_stdout(final=final)
+        self.stream.flush()
+        return lines
+
+    def follow(self) -> dict:
+        """follow job until it ends
+
+        :return: job
+        """
+        start = time()
+        delta = self.min_delta
+        while True:
+            job = self.resource.get(self.job_id)
+            final = job.get("status") in JOB_FINAL_STATUS
+            lines = self.poll(final=final)
+            if final is True:
+                return job
+            if time() - start > self.maxtime:
+                raise TimeoutError("job %s query timeout" % self.job_id)
+            if lines > 0:
+                delta = self.min_delta
+            else:
+                delta = min(delta * 2, self.max_delta)
+            sleep(delta)
@@ -36,6 +36,7 @@ def load(app):
         OrganizationAuthController,
     )
     from beehive3_cli.plugins.business.controllers.business import BusinessController
+    from beehive3_cli.plugins.business.controllers.cache import NameCacheController
     from beehive3_cli.plugins.business.controllers.cpaas import (
         CPaaServiceController,
         ImageServiceController,
@@ -88,6 +89,7 @@ def load(app):
     )
 
     app.handler.register(BusinessController)
+    app.handler.register(NameCacheController)
     app.handler.register(CPaaServiceController)
     app.handler.register(ImageServiceController)
     app.handler.register(VolumeServiceController)
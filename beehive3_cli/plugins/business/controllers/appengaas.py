@@ -26,7 +26,7 @@ class AppEngineServiceController(BusinessControllerChild):
     )
     def info(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = "%s/appengineservices" % self.baseuri
         res = self.cmp_get(uri, data=urlencode(data))
@@ -44,7 +44,7 @@ class AppEngineServiceController(BusinessControllerChild):
     )
     def quotas(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = "%s/appengineservices/describeaccountattributes" % self.baseuri
         res = self.cmp_get(uri, data=urlencode(data))
@@ -278,7 +278,7 @@ class AppEngineInstanceController(BusinessControllerChild):
     def add(self):
         name = self.app.pargs.name
         farm_name = self.app.pargs.farm_name
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         template = self.get_service_def(self.app.pargs.type)
         subnet = self.get_service_instance(self.app.pargs.subnet, account_id=account)
         is_public = self.app.pargs.public
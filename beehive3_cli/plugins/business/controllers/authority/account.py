@@ -7,6 +7,7 @@ from cement import ex
 from beecell.types.type_string import str2bool
 from beehive3_cli.core.controller import PARGS, ARGS
 from beehive3_cli.plugins.business.controllers.authority import AuthorityControllerChild
+from beehive3_cli.plugins.business.util.teardown import ServiceTeardown
 
 
 class AccountController(AuthorityControllerChild):
@@ -345,7 +346,7 @@ class AccountController(AuthorityControllerChild):
     )
     def definition_get(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         data = {
             "size": self.app.pargs.size,
             "page": self.app.pargs.page,
@@ -391,7 +392,7 @@ class AccountController(AuthorityControllerChild):
     )
     def definition_add(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         definitions = self.app.pargs.definitions
         data = {"definitions": definitions.split(",")}
         uri = "%s/accounts/%s/definitions" % ("/v2.0/nws", oid)
@@ -656,7 +657,7 @@ class AccountController(AuthorityControllerChild):
     )
     def update(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
 
         # name = self.app.pargs.name
         desc = self.app.pargs.desc
@@ -775,7 +776,7 @@ class AccountController(AuthorityControllerChild):
     )
     def patch(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         data = {"account": {}}
         uri = "%s/accounts/%s" % (self.baseuri, oid)
         self.cmp_patch(uri, data=data, timeout=600)
@@ -813,7 +814,7 @@ class AccountController(AuthorityControllerChild):
         oid = self.app.pargs.id
         delete_services = str2bool(self.app.pargs.delete_services)
         delete_tags = str2bool(self.app.pargs.delete_tags)
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         uri = "/v2.0/nws/accounts/%s" % oid
         data = {
             "delete_services": delete_services,
@@ -837,7 +838,7 @@ class AccountController(AuthorityControllerChild):
     )
     def service_active_get(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         uri = "%s/accounts/%s/activeservices" % (self.baseuri, oid)
         res = self.cmp_get(uri).get("services", {}).get("service_container", [])
         for item in res:
@@ -848,25 +849,45 @@ class AccountController(AuthorityControllerChild):
 
     @ex(
         help="delete account services",
-        description="This command deletes account services by specifying the account id as a required argument. It also accepts a -y flag to skip confirmation prompt.",
-        example="beehive bu accounts service-del <uuid> -y;beehive bu accounts service-del <uuid> -y",
-        arguments=ARGS([(["id"], {"help": "account id", "action": "store", "type": str})]),
+        description="This command deletes account services by specifying the account id as a required argument. Services are deleted in dependency order: load balancers, network rules, instances, volumes and images, security groups, subnets, vpcs and then container services. The services of the same tier are deleted concurrently. It also accepts a -y flag to skip confirmation prompt.",
+        example="beehive bu accounts service-del <uuid> -y;beehive bu accounts service-del <uuid> -workers 20 -y",
+        arguments=ARGS(
+            [
+                (["id"], {"help": "account id", "action": "store", "type": str}),
+                (
+                    ["-workers"],
+                    {
+                        "help": "number of concurrent delete requests [default=10]",
+                        "action": "store",
+                        "type": int,
+                        "default": 10,
+                    },
+                ),
+            ]
+        ),
     )
     def service_del(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
 
         # delete all child services
         uri = "/v2.0/nws/serviceinsts"
         res = self.cmp_get(uri, data={"account_id": oid, "size": -1}).get("serviceinsts", [])
-        for item in res:
-            # delete service
-            uri = "/v2.0/nws/serviceinsts/%s" % item["uuid"]
-            entity = "service %s" % item["name"]
-            res = self.cmp_delete(uri, data={}, timeout=600, entity=entity, output=False)
-            state = self.wait_for_service(item["uuid"], delta=2)
-            if state == "DELETED":
-                print("%s deleted" % entity)
+        if len(res) == 0:
+            self.app.render({"msg": "account %s has no services" % oid})
+            return
+        if getattr(self.app.pargs, "assumeyes", False) is False:
+            if self.confirm("You are about to delete %s services of account %s" % (len(res), oid)) is False:
+                return
+
+        teardown = ServiceTeardown(self, oid, workers=self.app.pargs.workers)
+        report = teardown.run(res)
+        failed = [item for item in report if item["status"] != "DELETED"]
+        if len(failed) > 0:
+            self.app.render(failed, headers=["uuid", "name", "plugintype", "tier", "status", "elapsed", "error"])
+        self.app.render({"msg": "deleted %s of %s services" % (len(report) - len(failed), len(res))})
+        if len(failed) > 0:
+            self.app.exit_code = 1
 
     # @ex(
     #     help='get account consumes',
@@ -900,7 +921,7 @@ class AccountController(AuthorityControllerChild):
     )
     def user_role_get(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         uri = "%s/accounts/%s/userroles" % (self.baseuri, oid)
         params = []
         data = self.format_paginated_query(params)
@@ -1016,7 +1037,7 @@ class AccountAuthController(AuthorityControllerChild):
     )
     def role_get(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         uri = "%s/accounts/%s/roles" % (self.baseuri, oid)
         res = self.cmp_get(uri)
         self.app.render(res, key="roles", headers=["name", "desc", "role"], maxsize=200)
@@ -1033,7 +1054,7 @@ class AccountAuthController(AuthorityControllerChild):
     )
     def user_get(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         uri = "%s/accounts/%s/users" % (self.baseuri, oid)
         res = self.cmp_get(uri)
         self.app.render(
@@ -1060,7 +1081,7 @@ class AccountAuthController(AuthorityControllerChild):
     )
     def user_add(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         role = self.app.pargs.role
         user = self.app.pargs.user
         data = {"user": {"user_id": user, "role": role}}
@@ -1086,6 +1107,15 @@ class AccountAuthController(AuthorityControllerChild):
                         "default": False,
                     },
                 ),
+                (
+                    ["-workers"],
+                    {
+                        "help": "number of concurrent requests [default=10]",
+                        "action": "store",
+                        "type": int,
+                        "default": 10,
+                    },
+                ),
             ]
         ),
     )
@@ -1093,8 +1123,8 @@ class AccountAuthController(AuthorityControllerChild):
         srcid = self.app.pargs.srcid
         destid = self.app.pargs.destid
         onebyone = self.app.pargs.onebyone
-        srcuuid = self.get_account(srcid).get("uuid")
-        destuuid = self.get_account(destid).get("uuid")
+        srcuuid = self.get_account_uuid(srcid)
+        destuuid = self.get_account_uuid(destid)
         uri = "%s/accounts/%s/users" % (self.baseuri, srcuuid)
         res = self.cmp_get(uri)
         self.app.render(
@@ -1105,39 +1135,30 @@ class AccountAuthController(AuthorityControllerChild):
             # maxsize=200,
         )
         if self.confirm("add user roles to %s (%s)" % (destid, destuuid)):
-            srcdata = res.get("users", [])
-            counter = 0
-            for user in srcdata:
-                user_role = user.get("role", "viewer")
+            users = []
+            for user in res.get("users", []):
+                user["role"] = user.get("role", "viewer")
                 msg: str = "adding %s (%s) as %s to %s" % (
                     user.get("name", ""),
                     user.get("desc", ""),
-                    user_role,
+                    user["role"],
                     destid,
                 )
                 if not onebyone or self.confirm(msg):
-                    print(msg, end="...", flush=True)
-                    data = {"user": {"user_id": user.get("uuid"), "role": user_role}}
-                    try:
-                        addres = self.cmp_post(f"{self.baseuri}/accounts/{destuuid}/users", data)
-                        if addres.get("uuid"):
-                            print(self.app.colored_text.green("OK"))
-                            counter += 1
-                        else:
-                            print(self.app.colored_text.red("Fail"))
-                    except:
-                        print(self.app.colored_text.red("Fail"))
-            print(f"added {counter} users to {destid}")
-
-        # self.app.render(
-        #     res,
-        #     key="users",
-        #     headers=["id", "name", "desc", "role"],
-        #     fields=["uuid", "name", "desc", "role"],
-        #     maxsize=200,
-        # )
-
-        pass
+                    users.append(user)
+
+            def request(user):
+                data = {"user": {"user_id": user.get("uuid"), "role": user["role"]}}
+                return "%s/accounts/%s/users" % (self.baseuri, destuuid), data
+
+            report = self.cmp_bulk(
+                "POST",
+                users,
+                request,
+                fn_check=lambda x: isinstance(x, dict) and x.get("uuid") is not None,
+                workers=self.app.pargs.workers,
+            )
+            self.render_bulk_report(report, ["id", "name", "desc", "role"], ["uuid", "name", "desc", "role"])
 
     @ex(
         help="remove account role from a user",
@@ -1155,7 +1176,7 @@ class AccountAuthController(AuthorityControllerChild):
     )
     def user_del(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         role = self.app.pargs.role
         user = self.app.pargs.user
         data = {"user": {"user_id": user, "role": role}}
@@ -1175,7 +1196,7 @@ class AccountAuthController(AuthorityControllerChild):
     )
     def group_get(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         uri = "%s/accounts/%s/groups" % (self.baseuri, oid)
         res = self.cmp_get(uri)
         self.app.render(
@@ -1202,7 +1223,7 @@ class AccountAuthController(AuthorityControllerChild):
     )
     def group_add(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         role = self.app.pargs.role
         group = self.app.pargs.group
         data = {"group": {"group_id": group, "role": role}}
@@ -1226,7 +1247,7 @@ class AccountAuthController(AuthorityControllerChild):
     )
     def group_del(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         role = self.app.pargs.role
         group = self.app.pargs.group
         data = {"group": {"group_id": group, "role": role}}
@@ -1270,7 +1291,7 @@ class AccountCapabilityController(AuthorityControllerChild):
     )
     def get(self):
         oid = getattr(self.app.pargs, "id", None)
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         data = self.format_paginated_query([])
         uri = "%s/accounts/%s/capabilities" % (self.baseuri, oid)
         res = self.cmp_get(uri, data=data)
@@ -1311,6 +1332,23 @@ class AccountCapabilityController(AuthorityControllerChild):
         #     fields = ['status', 'name', 'report.required', 'report.created', 'report.error']
         #     self.app.render(res, key='capabilities', headers=headers, fields=fields, maxsize=40)
 
+    def __set_capabilities(self, method, uri, capabilities):
+        """send all the capabilities with one list request. If the api rejects the list request send one request for
+        every capability, so that the failed ones are reported. When the list request started a task the result of
+        the task is reported for every capability and nothing is sent again, because the task may have applied part
+        of the capabilities or may be still running
+        """
+        report = self.cmp_bulk(method, [capabilities], lambda x: (uri, {"capabilities": x}))
+        code = report[0]["code"]
+        if report[0]["status"] == "FAILURE" and code is not None and 400 <= code < 500:
+            self.app.log.warning("capabilities list request rejected: %s" % report[0]["error"])
+            report = self.cmp_bulk(
+                method, capabilities, lambda x: (uri, {"capabilities": [x]}), workers=self.app.pargs.workers
+            )
+        else:
+            report = [dict(report[0], item=capability) for capability in capabilities]
+        self.render_bulk_report(report, ["capability"], ["item"])
+
     @ex(
         help="add account capabilities",
         description="This command adds capabilities for a given account. It requires the account id and a comma separated list of capability names or ids as arguments.",
@@ -1326,23 +1364,25 @@ class AccountCapabilityController(AuthorityControllerChild):
                         "type": str,
                     },
                 ),
+                (
+                    ["-workers"],
+                    {
+                        "help": "number of concurrent requests when capabilities are sent one by one [default=5]",
+                        "action": "store",
+                        "type": int,
+                        "default": 5,
+                    },
+                ),
             ]
         ),
     )
     def add(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         capabilities = self.app.pargs.capabilities
         capabilities = capabilities.split(",")
         uri = "%s/accounts/%s/capabilities" % (self.baseuri, oid)
-        for capability in capabilities:
-            print("adding capability %s ..." % capability)
-            try:
-                self.cmp_post(uri, data={"capabilities": [capability]})
-            except Exception as ex:
-                msg = self.app.colored_text.red(str(ex))
-                print(msg)
-                continue
+        self.__set_capabilities("POST", uri, capabilities)
 
     @ex(
         help="update account capabilities",
@@ -1359,23 +1399,25 @@ class AccountCapabilityController(AuthorityControllerChild):
                         "type": str,
                     },
                 ),
+                (
+                    ["-workers"],
+                    {
+                        "help": "number of concurrent requests when capabilities are sent one by one [default=5]",
+                        "action": "store",
+                        "type": int,
+                        "default": 5,
+                    },
+                ),
             ]
         ),
     )
     def update(self):
         oid = self.app.pargs.id
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         capabilities = self.app.pargs.capabilities
         capabilities = capabilities.split(",")
         uri = "%s/accounts/%s/capabilities" % (self.baseuri, oid)
-        for capability in capabilities:
-            print("updating capability %s ..." % capability)
-            try:
-                self.cmp_put(uri, data={"capabilities": [capability]})
-            except Exception as ex:
-                msg = self.app.colored_text.red(str(ex))
-                print(msg)
-                continue
+        self.__set_capabilities("PUT", uri, capabilities)
 
 
 class AccountTagController(AuthorityControllerChild):
@@ -1404,7 +1446,7 @@ class AccountTagController(AuthorityControllerChild):
     )
     def get(self):
         oid = getattr(self.app.pargs, "id", None)
-        oid = self.get_account(oid).get("uuid")
+        oid = self.get_account_uuid(oid)
         params = []
         data = self.format_paginated_query(params)
         uri = "%s/accounts/%s/tags" % (self.baseuri, oid)
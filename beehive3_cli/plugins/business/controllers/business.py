@@ -3,11 +3,25 @@
 # (C) Copyright 2018-2024 CSI-Piemonte
 
 from sys import stdout
-from re import match
+from re import match, compile as re_compile
 from time import sleep
 from beecell.remote import NotFoundException
+from beehive3_cli.core.completion import remember
 from beehive3_cli.core.controller import CliController, BaseController
-from beehive3_cli.core.util import CmpUtils, rotating_bar
+from beehive3_cli.core.util import CmpUtils, open_local_store, rotating_bar
+from beehive3_cli.plugins.business.util.resolve import NameResolutionCache
+
+# business api uris whose entities are cached by the name resolution cache
+RESOLVE_URI = re_compile(r"^/v\d\.\d/nws/(organizations|divisions|accounts|servicedefs|serviceinsts)(?:/([^/?]+))?/?$")
+RESOLVE_KINDS = {
+    "organizations": "organization",
+    "divisions": "division",
+    "accounts": "account",
+    "servicedefs": "servicedef",
+    "serviceinsts": "serviceinst",
+}
+# plugin type api uris that create service instances. Ex. /v2.0/nws/computeservices/instance/runinstances
+PLUGIN_CREATE_URI = re_compile(r"^/v\d\.\d/nws/\w+services/\w+/(?:create|run|import)\w*/?$")
 
 
 class BusinessController(CliController):
@@ -29,10 +43,94 @@ class BusinessControllerChild(BaseController):
 
         cmp = {"baseuri": "/v1.0/nws", "subsystem": "service"}
 
+        #: ttl in seconds of the name resolution cache entries
+        resolve_ttl = {
+            "division": 86400,
+            "account": 3600,
+            "servicedef": 3600,
+            "serviceinst": 300,
+        }
+
     def pre_command_run(self):
         super(BusinessControllerChild, self).pre_command_run()
         self.configure_cmp_api_client()
 
+    @property
+    def resolve_cache(self) -> NameResolutionCache:
+        """name resolution cache of the current environment. It is shared by all the business controllers"""
+        caches = getattr(self.app, "resolve_caches", None)
+        if caches is None:
+            caches = self.app.resolve_caches = {}
+        cache = caches.get(self.app.env)
+        if cache is None:
+            ttl = self._meta.resolve_ttl
+            cache = open_local_store(
+                self.app, "names.db", lambda p: NameResolutionCache(p, ttl=ttl), name="name resolution cache"
+            )
+            if cache is None:
+                cache = NameResolutionCache(None, ttl=ttl)
+            caches[self.app.env] = cache
+        return cache
+
+    def __get_by_cached_uuid(self, kind, key, uri, response_key, data=""):
+        """get entity using the uuid cached for key. Return None if key is not cached or the entity does not exist"""
+        uuid = self.resolve_cache.get(kind, key)
+        if uuid is None:
+            return None
+        try:
+            entity = self.cmp_get("%s/%s" % (uri, uuid), data).get(response_key)
+        except NotFoundException:
+            entity = None
+        if entity is None:
+            self.resolve_cache.invalidate(kind, uuid)
+        else:
+            self.app.log.debug("get %s %s from name resolution cache: %s" % (kind, key, uuid))
+        return entity
+
+    def __invalidate_names(self, uri, created=False):
+        """invalidate the cached names of an entity created, updated or deleted by the api request
+
+        :param uri: request uri
+        :param created: True if the request creates an entity. The cached names of its kind are removed, because
+            the new entity can take the name of a cached one
+        """
+        res = RESOLVE_URI.match(uri.split("?")[0])
+        if res is None:
+            if created is True and PLUGIN_CREATE_URI.match(uri.split("?")[0]) is not None:
+                # service instances are also created by the plugin type apis
+                self.resolve_cache.clear("serviceinst")
+            return
+        kind = RESOLVE_KINDS[res.group(1)]
+        if kind in ["organization", "division"]:
+            # division and account keys contain the parent names
+            self.resolve_cache.clear("division")
+            self.resolve_cache.clear("account")
+        if created is True:
+            self.resolve_cache.clear(kind)
+        elif res.group(2) is not None:
+            self.resolve_cache.invalidate(kind, res.group(2))
+
+    def cmp_post(self, uri, *args, **kwargs):
+        try:
+            return super(BusinessControllerChild, self).cmp_post(uri, *args, **kwargs)
+        finally:
+            self.__invalidate_names(uri, created=True)
+
+    def cmp_put(self, uri, *args, **kwargs):
+        res = super(BusinessControllerChild, self).cmp_put(uri, *args, **kwargs)
+        self.__invalidate_names(uri)
+        return res
+
+    def cmp_patch(self, uri, *args, **kwargs):
+        res = super(BusinessControllerChild, self).cmp_patch(uri, *args, **kwargs)
+        self.__invalidate_names(uri)
+        return res
+
+    def cmp_delete(self, uri, *args, **kwargs):
+        res = super(BusinessControllerChild, self).cmp_delete(uri, *args, **kwargs)
+        self.__invalidate_names(uri)
+        return res
+
     def is_name(self, oid):
         """Check if id is uuid, id or literal name.
 
@@ -76,6 +174,11 @@ class BusinessControllerChild(BaseController):
         check = self.is_name(account_id)
         uri = "/v1.0/nws/accounts"
         if check is True:
+            if active is True:
+                account = self.__get_by_cached_uuid("account", account_id, uri, "account")
+                if account is not None:
+                    return account
+
             oid = account_id.split(".")
             if len(oid) == 1:
                 data = data_base + "name=%s" % oid[0]
@@ -85,15 +188,19 @@ class BusinessControllerChild(BaseController):
                 res = self.cmp_get(uri, data=data)
             elif len(oid) == 3:
                 # get division
-                data = data_base + "name=%s&organization_id=%s" % (oid[1], oid[0])
-                uri2 = "/v1.0/nws/divisions"
-                divs = self.cmp_get(uri2, data=data)
+                div_key = "%s.%s" % (oid[0], oid[1])
+                div_uuid = self.resolve_cache.get("division", div_key) if active is True else None
+                if div_uuid is None:
+                    data = data_base + "name=%s&organization_id=%s" % (oid[1], oid[0])
+                    uri2 = "/v1.0/nws/divisions"
+                    divs = self.cmp_get(uri2, data=data)
+                    if divs.get("count") > 0:
+                        div_uuid = divs["divisions"][0]["uuid"]
+                        if active is True:
+                            self.resolve_cache.set("division", div_key, div_uuid)
                 # get account
-                if divs.get("count") > 0:
-                    data = data_base + "name=%s&division_id=%s" % (
-                        oid[2],
-                        divs["divisions"][0]["uuid"],
-                    )
+                if div_uuid is not None:
+                    data = data_base + "name=%s&division_id=%s" % (oid[2], div_uuid)
                     res = self.cmp_get(uri, data=data)
                 else:
                     raise Exception("Account is wrong")
@@ -107,6 +214,8 @@ class BusinessControllerChild(BaseController):
                 raise Exception("The account %s does not exist" % account_id)
 
             account = res.get("accounts")[0]
+            if active is True:
+                self.resolve_cache.set("account", account_id, account.get("uuid"))
             self.app.log.info("get account by name: %s" % account)
             return account
         else:
@@ -114,9 +223,27 @@ class BusinessControllerChild(BaseController):
 
         uri += "/" + account_id
         account = self.cmp_get(uri, data).get("account")
+        if active is True and account is not None and self.is_uuid(account_id) is False:
+            self.resolve_cache.set("account", account_id, account.get("uuid"))
         self.app.log.info("get account by id: %s" % account)
         return account
 
+    def get_account_uuid(self, account_id, active=True):
+        """Get account uuid. Names are resolved with the name resolution cache, uuid are returned as they are
+
+        :param account_id: account uuid, id, name or triplet org.div.account
+        :param active: if False resolve also expired accounts
+        :return: account uuid
+        """
+        if self.is_uuid(account_id):
+            return account_id
+        # get_account checks that the account of a cached uuid still exists
+        uuid = self.get_account(account_id, active=active).get("uuid")
+        # account names used by bash completion
+        if not str(account_id).isdigit():
+            remember("accounts.%s" % self.app.env, [account_id])
+        return uuid
+
     def get_account_ids(self, account_ids):
         """Get account id list from string of comma separated id
 
@@ -125,7 +252,7 @@ class BusinessControllerChild(BaseController):
         """
         res = []
         for account_id in account_ids.split(","):
-            res.append(self.get_account(account_id).get("uuid"))
+            res.append(self.get_account_uuid(account_id))
 
         return res
 
@@ -140,6 +267,10 @@ class BusinessControllerChild(BaseController):
         check = self.is_name(division_id)
         uri = "/v1.0/nws/divisions"
         if check is True:
+            division = self.__get_by_cached_uuid("division", division_id, uri, "division")
+            if division is not None:
+                return division
+
             oid = division_id.split(".")
             if len(oid) == 1:
                 data = data_base + "name=%s" % oid[0]
@@ -159,6 +290,7 @@ class BusinessControllerChild(BaseController):
                 raise Exception("The account %s does not exist" % division_id)
 
             division = res.get("divisions")[0]
+            self.resolve_cache.set("division", division_id, division.get("uuid"))
             self.app.log.info("get divisions by name: %s" % division)
             return division
         else:
@@ -274,6 +406,10 @@ class BusinessControllerChild(BaseController):
         """
         check = self.is_name(oid)
         if check is True:
+            uuid = self.resolve_cache.get("servicedef", oid)
+            if uuid is not None:
+                return uuid
+
             uri = "/v1.0/nws/servicedefs"
             res = self.cmp_get(uri, data="name=%s" % oid)
             count = res.get("count")
@@ -282,7 +418,9 @@ class BusinessControllerChild(BaseController):
             if count == 0:
                 raise Exception("%s does not exist or you are not authorized to see it" % oid)
 
-            return res.get("servicedefs")[0]["uuid"]
+            uuid = res.get("servicedefs")[0]["uuid"]
+            self.resolve_cache.set("servicedef", oid, uuid)
+            return uuid
         return oid
 
     def get_service_instance_full(self, oid, account_id=None):
@@ -317,6 +455,11 @@ class BusinessControllerChild(BaseController):
         """
         check = self.is_name(oid)
         if check is True:
+            key = oid if account_id is None else "%s@%s" % (oid, account_id)
+            uuid = self.resolve_cache.get("serviceinst", key)
+            if uuid is not None:
+                return uuid
+
             uri = "/v2.0/nws/serviceinsts"
             data = "name=%s" % oid
             if account_id is not None:
@@ -328,11 +471,13 @@ class BusinessControllerChild(BaseController):
             if count == 0:
                 raise Exception("%s does not exist or you are not authorized to see it" % oid)
 
-            return res.get("serviceinsts")[0]["uuid"]
+            uuid = res.get("serviceinsts")[0]["uuid"]
+            self.resolve_cache.set("serviceinst", key, uuid)
+            return uuid
         return oid
 
     def get_service_definitions(self, plugintype):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         template = self.app.pargs.id
         if template is None:
             data = {"plugintype": plugintype, "size": -1}
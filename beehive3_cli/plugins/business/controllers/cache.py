@@ -0,0 +1,139 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from collections import Counter
+from cement import ex
+from beehive3_cli.core.controller import ARGS
+from beehive3_cli.core.util import run_concurrent
+from beehive3_cli.plugins.business.controllers.business import BusinessControllerChild
+
+
+class NameCacheController(BusinessControllerChild):
+    class Meta:
+        label = "name-cache"
+        description = "name resolution cache management"
+        help = "name resolution cache management"
+
+        headers = ["kind", "entries", "expired", "ttl"]
+
+    def __get_all(self, uri, key, pagesize, workers):
+        """get all the items of a paged list"""
+
+        def get_page(page):
+            return self.cmp_get(uri, data={"size": pagesize, "page": page})
+
+        res = get_page(0)
+        items = res.get(key, [])
+        pages = range(1, (res.get("total", 0) + pagesize - 1) // pagesize)
+        for page, res, err in run_concurrent(get_page, pages, workers=workers):
+            if err is not None:
+                raise err
+            items.extend(res.get(key, []))
+        return items
+
+    @ex(
+        help="preload name resolution cache",
+        description="This command loads all the organizations, divisions and accounts and stores in the name resolution cache of the environment the uuid of every name used by the commands: division as org.div and account as org.div.account triplet. Short names are stored only when they are unique.",
+        example="beehive bu name-cache warmup -e <env>",
+        arguments=ARGS(
+            [
+                (
+                    ["-pagesize"],
+                    {
+                        "help": "list page size [default=500]",
+                        "action": "store",
+                        "type": int,
+                        "default": 500,
+                    },
+                ),
+                (
+                    ["-workers"],
+                    {
+                        "help": "number of concurrent page requests [default=5]",
+                        "action": "store",
+                        "type": int,
+                        "default": 5,
+                    },
+                ),
+            ]
+        ),
+    )
+    def warmup(self):
+        pagesize = self.app.pargs.pagesize
+        workers = self.app.pargs.workers
+        orgs = self.__get_all("%s/organizations" % self.baseuri, "organizations", pagesize, workers)
+        divs = self.__get_all("%s/divisions" % self.baseuri, "divisions", pagesize, workers)
+        accounts = self.__get_all("%s/accounts" % self.baseuri, "accounts", pagesize, workers)
+
+        org_names = {}
+        for org in orgs:
+            for oid in (org.get("id"), org.get("uuid")):
+                org_names[str(oid)] = org.get("name")
+
+        # division index by id, uuid and unique name
+        div_index = {}
+        div_name_count = Counter(div.get("name") for div in divs)
+        div_items = []
+        for div in divs:
+            org_name = div.get("organization_name") or org_names.get(str(div.get("organization_id")))
+            div["__org_name"] = org_name
+            for oid in (div.get("id"), div.get("uuid")):
+                div_index[str(oid)] = div
+            if div_name_count[div.get("name")] == 1:
+                div_index[div.get("name")] = div
+                div_items.append((div.get("name"), div.get("uuid")))
+            if org_name is not None:
+                div_items.append(("%s.%s" % (org_name, div.get("name")), div.get("uuid")))
+
+        account_name_count = Counter(account.get("name") for account in accounts)
+        account_items = []
+        for account in accounts:
+            name = account.get("name")
+            div = div_index.get(str(account.get("division_id"))) or div_index.get(account.get("division_name"))
+            if account_name_count[name] == 1:
+                account_items.append((name, account.get("uuid")))
+            if div is not None:
+                account_items.append(("%s.%s" % (div.get("name"), name), account.get("uuid")))
+                if div["__org_name"] is not None:
+                    account_items.append(("%s.%s.%s" % (div["__org_name"], div.get("name"), name), account.get("uuid")))
+
+        self.resolve_cache.set_many("division", div_items)
+        self.resolve_cache.set_many("account", account_items)
+        self.app.render(
+            {
+                "msg": "Cached %s division and %s account names of %s organizations"
+                % (len(div_items), len(account_items), len(orgs))
+            }
+        )
+
+    @ex(
+        help="get name resolution cache entries count",
+        description="This command shows for every kind of entity the number of valid and expired entries of the name resolution cache of the environment and their ttl in seconds.",
+        example="beehive bu name-cache stats -e <env>",
+        arguments=ARGS(),
+    )
+    def stats(self):
+        self.app.render(self.resolve_cache.stats(), headers=self._meta.headers)
+
+    @ex(
+        help="clear name resolution cache",
+        description="This command removes the entries of the name resolution cache of the environment. Use -kind to remove only the entries of division, account, servicedef or serviceinst.",
+        example="beehive bu name-cache clear -e <env>;beehive bu name-cache clear -kind account -e <env>",
+        arguments=ARGS(
+            [
+                (
+                    ["-kind"],
+                    {
+                        "help": "entity kind: division, account, servicedef, serviceinst",
+                        "action": "store",
+                        "type": str,
+                        "default": None,
+                    },
+                ),
+            ]
+        ),
+    )
+    def clear(self):
+        count = self.resolve_cache.clear(self.app.pargs.kind)
+        self.app.render({"msg": "Removed %s name resolution cache entries" % count})
@@ -38,7 +38,7 @@ This command will display basic info about the compute service configuration and
     )
     def info(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = f"{self.baseuri}/computeservices"
         res = self.cmp_get(uri, data=data)
@@ -64,7 +64,7 @@ This command will return the quotas configured for the specified account for com
     )
     def quotas(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = f"{self.baseuri}/computeservices/describeaccountattributes"
         res = self.cmp_get(uri, data=data)
@@ -92,7 +92,7 @@ The account ID is required as it will return the availability zones accessible t
     )
     def availability_zones(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = f"{self.baseuri}/computeservices/describeavailabilityzones"
         res = self.cmp_get(uri, data=data)
@@ -310,7 +310,7 @@ uniquely identify and describe the new image being created.\
     )
     def add(self):
         name = self.app.pargs.name
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         itype = self.get_service_definition(self.app.pargs.type)
         desc = self.app.pargs.desc
 
@@ -407,7 +407,7 @@ No required arguments as the volumes will be loaded based on the configured reso
     )
     def load(self):
         name = self.app.pargs.volume_name
-        account_id = self.get_account(self.app.pargs.account).get("uuid")
+        account_id = self.get_account_uuid(self.app.pargs.account)
         resource_id = self.app.pargs.volume_resource_id
         data = {
             "serviceinst": {
@@ -619,7 +619,7 @@ operating on a specific volume.\
     def types(self):
         params = ["account"]
         mappings = {
-            "account": lambda x: self.get_account(x)["uuid"],
+            "account": lambda x: self.get_account_uuid(x),
         }
         aliases = {"account": "owner-id", "size": "MaxResults", "page": "NextToken"}
         data = self.format_paginated_query(params, mappings=mappings, aliases=aliases)
@@ -685,7 +685,7 @@ The required arguments are the volume name, parent account id, availability zone
     )
     def add(self):
         name = self.app.pargs.name
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         itype = self.get_service_definition(self.app.pargs.type)
         size = self.app.pargs.size
         iops = self.app.pargs.iops
@@ -1463,7 +1463,7 @@ Use <size>:<volume_type> to set a non default volume type e.g. "5:10" or "5:vol.
     )
     def add(self):
         name = self.app.pargs.name
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         itype = self.get_service_definition(self.app.pargs.type)
         subnet = self.get_service_instance(self.app.pargs.subnet, account_id=account)
         image = self.get_service_instance(self.app.pargs.image, account_id=account)
@@ -1667,7 +1667,7 @@ beehive bu cpaas vms clone new-cloned-vm <uuid>  -account <uuid> -subnet <uuid>
         if account is None:
             account = dict_get(vm, "nvl-ownerId")
         else:
-            account = self.get_account(self.app.pargs.account).get("uuid")
+            account = self.get_account_uuid(self.app.pargs.account)
 
         image = self.get_service_instance(image_name, account_id=account)
         if itype is None:
@@ -2582,7 +2582,7 @@ CPU, memory, storage etc. This helps the user to select the right type of VM dep
     def types(self):
         params = ["account"]
         mappings = {
-            "account": lambda x: self.get_account(x)["uuid"],
+            "account": lambda x: self.get_account_uuid(x),
         }
         aliases = {"account": "owner-id", "size": "MaxResults", "page": "NextToken"}
         data = self.format_paginated_query(params, mappings=mappings, aliases=aliases)
@@ -2671,7 +2671,7 @@ beehive bu cpaas vms backup-restore-point-get <uuid> \
     def backup_restore_point_get(self):
         params = ["account", "vm", "job", "restore_point"]
         mappings = {
-            "account": lambda x: self.get_account(x)["uuid"],
+            "account": lambda x: self.get_account_uuid(x),
         }
         aliases = {
             "account": "owner-id",
@@ -2771,7 +2771,7 @@ The account ID is required to identify the backup job account.\
         ),
     )
     def backup_restore_point_add(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         job_id = self.app.pargs.job
         name = self.app.pargs.name
         desc = self.app.pargs.desc
@@ -2812,7 +2812,7 @@ It requires the account ID and restore point ID as required arguments to identif
         ),
     )
     def backup_restore_point_del(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         job_id = self.app.pargs.job
         restore_point_id = self.app.pargs.restore_point
 
@@ -3049,7 +3049,7 @@ OpenStack, vSphere, or return all hypervisor types.\
     )
     def backup_job_list(self):
         account = self.app.pargs.account
-        account_id = self.get_account(account).get("uuid")
+        account_id = self.get_account_uuid(account)
         data = {
             "owner-id.N": [account_id],
         }
@@ -3103,7 +3103,7 @@ and get information of the particular backup job.\
     )
     def backup_job_get(self):
         account = self.app.pargs.account
-        account_id = self.get_account(account).get("uuid")
+        account_id = self.get_account_uuid(account)
         job_id = self.app.pargs.job
         data = {"owner-id.N": [account_id], "JobId": job_id}
         uri = "/v1.0/nws/computeservices/instancebackup/describebackupjobs"
@@ -3168,7 +3168,7 @@ to backup as required arguments. An optional description of the job can also be
         name = self.app.pargs.name
         desc = self.app.pargs.desc
         account = self.app.pargs.account
-        account_id = self.get_account(account).get("uuid")
+        account_id = self.get_account_uuid(account)
         zone = self.app.pargs.zone
         instance = self.app.pargs.instance
         policy = self.app.pargs.policy
@@ -3232,7 +3232,7 @@ The job can then be updated by passing additional arguments like -enabled to ena
     )
     def backup_job_update(self):
         account = self.app.pargs.account
-        account_id = self.get_account(account).get("uuid")
+        account_id = self.get_account_uuid(account)
         job_id = self.app.pargs.job
         data = {"owner-id": account_id, "JobId": job_id}
         data = self.add_field_from_pargs_to_data("name", data, "Name", reject_value=None, format=None)
@@ -3258,7 +3258,7 @@ It requires the account ID and job ID as required arguments to identify the spec
     )
     def backup_job_del(self):
         account = self.app.pargs.account
-        account_id = self.get_account(account).get("uuid")
+        account_id = self.get_account_uuid(account)
         job_id = self.app.pargs.job
         data = {"owner-id": account_id, "JobId": job_id}
         uri = "/v1.0/nws/computeservices/instancebackup/deletebackupjob"
@@ -3284,7 +3284,7 @@ and the instance to add to it.\
     )
     def backup_job_instance_add(self):
         account = self.app.pargs.account
-        account_id = self.get_account(account).get("uuid")
+        account_id = self.get_account_uuid(account)
         job_id = self.app.pargs.job
         instance = self.app.pargs.instance
         data = {
@@ -3323,7 +3323,7 @@ beehive bu cpaas vms backup-job-instance-del notify 8c750fce-5400-47cf-adae-f7e5
     )
     def backup_job_instance_del(self):
         account = self.app.pargs.account
-        account_id = self.get_account(account).get("uuid")
+        account_id = self.get_account_uuid(account)
         job_id = self.app.pargs.job
         instance = self.app.pargs.instance
         data = {
@@ -3356,7 +3356,7 @@ The policies define how backups of the virtual machines are configured for that
     )
     def backup_job_policies(self):
         account = self.app.pargs.account
-        account_id = self.get_account(account).get("uuid")
+        account_id = self.get_account_uuid(account)
         data = {"owner-id": account_id}
         uri = "/v1.0/nws/computeservices/instancebackup/describebackupjobpolicies"
         res = self.cmp_get(uri, data=urlencode(data, doseq=True), timeout=600)
@@ -3557,7 +3557,7 @@ It requires the account ID, key pair name and key type (-type) as required argum
         ),
     )
     def add(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         name = self.app.pargs.name
         key_type = self.app.pargs.type
         data = {
@@ -3600,7 +3600,7 @@ The public key will be associated with the specified key pair name in the given
         ),
     )
     def import_public_key(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         name = self.app.pargs.name
         file_name = self.app.pargs.publickey
         key_type = self.app.pargs.type
@@ -3762,7 +3762,7 @@ The required arguments are the account id, service instance id and the tag key t
     )
     def add(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         service = self.app.pargs.service
         tag = self.app.pargs.tag
         data = {
@@ -3863,7 +3863,7 @@ The types returned can then be used as a reference for other CPAAS customization
     def types(self):
         oid = self.app.pargs.id
         if oid is not None:
-            account = self.get_account(self.app.pargs.account)["uuid"]
+            account = self.get_account_uuid(self.app.pargs.account)
             data = urlencode({"CustomizationType": oid, "owner-id": account}, doseq=True)
             uri = f"{self.baseuri}/computeservices/customization/describecustomizationtypes"
             res = self.cmp_get(uri, data=data)
@@ -3878,7 +3878,7 @@ The types returned can then be used as a reference for other CPAAS customization
         else:
             params = ["account"]
             mappings = {
-                "account": lambda x: self.get_account(x)["uuid"],
+                "account": lambda x: self.get_account_uuid(x),
             }
             aliases = {"account": "owner-id", "size": "MaxResults", "page": "NextToken"}
             data = self.format_paginated_query(params, mappings=mappings, aliases=aliases)
@@ -4083,7 +4083,7 @@ It also takes an optional args argument to pass customization params in key-valu
     )
     def add(self):
         name = self.app.pargs.name
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         itype = self.get_service_definition(self.app.pargs.type)
         instances = self.app.pargs.instances.split(",")
         args = self.app.pargs.args.split(",")
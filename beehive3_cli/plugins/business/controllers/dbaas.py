@@ -27,7 +27,7 @@ class DBaaServiceController(BusinessControllerChild):
     )
     def info(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = "%s/databaseservices" % self.baseuri
         res = self.cmp_get(uri, data=data)
@@ -46,7 +46,7 @@ class DBaaServiceController(BusinessControllerChild):
     )
     def quotas(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = "%s/databaseservices/describeaccountattributes" % self.baseuri
         res = self.cmp_get(uri, data=urlencode(data))
@@ -138,7 +138,7 @@ class DBServiceInstanceController(BusinessControllerChild):
     def types(self):
         params = ["account"]
         mappings = {
-            "account": lambda x: self.get_account(x)["uuid"],
+            "account": lambda x: self.get_account_uuid(x),
         }
         aliases = {"account": "owner-id", "size": "MaxResults", "page": "NextToken"}
         data = self.format_paginated_query(params, mappings=mappings, aliases=aliases)
@@ -183,7 +183,7 @@ class DBServiceInstanceController(BusinessControllerChild):
         ),
     )
     def engines(self):
-        data = {"owner-id": self.get_account(self.app.pargs.account)["uuid"]}
+        data = {"owner-id": self.get_account_uuid(self.app.pargs.account)}
         uri = "/v2.0/nws/databaseservices/instance/enginetypes"
         res = self.cmp_get(uri, data=data).get("DescribeDBInstanceEngineTypesResponse")
         self.app.render(
@@ -533,7 +533,7 @@ class DBServiceInstanceController(BusinessControllerChild):
 
     def __add_common(self):
         name = self.app.pargs.name
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         template = self.get_service_definition(self.app.pargs.type)
         subnet = self.get_service_instance(self.app.pargs.subnet, account_id=account)
         engine_version = self.app.pargs.version
@@ -1863,7 +1863,7 @@ class DBServiceInstanceController(BusinessControllerChild):
         engine = self.app.pargs.engine
         version = self.app.pargs.version
         vm_pwd = self.app.pargs.vm_pwd
-        account_id = self.get_account(self.app.pargs.account).get("uuid")
+        account_id = self.get_account_uuid(self.app.pargs.account)
 
         # register server as resource
         # - get container type
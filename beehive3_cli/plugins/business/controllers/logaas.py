@@ -27,7 +27,7 @@ class LogaaServiceController(BusinessControllerChild):
     )
     def info(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = "%s/loggingservices" % self.baseuri
         res = self.cmp_get(uri, data=data)
@@ -48,7 +48,7 @@ class LogaaServiceController(BusinessControllerChild):
     )
     def quotas(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = "%s/loggingservices/describeaccountattributes" % self.baseuri
         res = self.cmp_get(uri, data=urlencode(data))
@@ -91,7 +91,7 @@ class LoggingServiceInstanceController(BusinessControllerChild):
         ),
     )
     def configs(self):
-        data = {"owner-id": self.get_account(self.app.pargs.account)["uuid"]}
+        data = {"owner-id": self.get_account_uuid(self.app.pargs.account)}
         uri = "/v1.0/nws/loggingservices/instance/describelogconfig"
         res = self.cmp_get(uri, data=data).get("DescribeLoggingInstanceLogConfigResponse")
         self.app.render(res, headers=["name", "title", "type"], fields=["name", "title", "type"], key="logConfigSet")
@@ -283,7 +283,7 @@ class LoggingServiceInstanceController(BusinessControllerChild):
         ),
     )
     def add(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         instance = self.app.pargs.instance
         definition = self.app.pargs.definition
         norescreate = self.app.pargs.norescreate
@@ -577,7 +577,7 @@ class LoggingServiceSpaceController(BusinessControllerChild):
         ),
     )
     def add(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         name = self.app.pargs.name
         definition = self.app.pargs.definition
         norescreate = self.app.pargs.norescreate
@@ -662,7 +662,7 @@ class LoggingServiceSpaceController(BusinessControllerChild):
         ),
     )
     def dashboards(self):
-        data = {"owner-id": self.get_account(self.app.pargs.account)["uuid"]}
+        data = {"owner-id": self.get_account_uuid(self.app.pargs.account)}
         uri = "%s/loggingservices/spaces/describespaceconfig" % (self.baseuri)
         res = self.cmp_get(uri, data=data).get("DescribeSpaceConfigResponse")
         self.app.render(
@@ -27,7 +27,7 @@ class MonitoraaServiceController(BusinessControllerChild):
     )
     def info(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = "%s/monitoringservices" % self.baseuri
         res = self.cmp_get(uri, data=data)
@@ -49,7 +49,7 @@ class MonitoraaServiceController(BusinessControllerChild):
     )
     def quotas(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = "%s/monitoringservices/describeaccountattributes" % self.baseuri
         res = self.cmp_get(uri, data=urlencode(data))
@@ -73,7 +73,7 @@ class MonitoraaServiceController(BusinessControllerChild):
     )
     def availability_zones(self):
         account = self.app.pargs.account
-        account_id = self.get_account(account).get("uuid")
+        account_id = self.get_account_uuid(account)
         data = {"owner-id": account_id}
 
         uri = "%s/monitoringservices/describeavailabilityzones" % self.baseuri
@@ -264,7 +264,7 @@ class MonitoringServiceInstanceController(BusinessControllerChild):
         ),
     )
     def add(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         instance = self.app.pargs.instance
         definition = self.app.pargs.definition
         norescreate = self.app.pargs.norescreate
@@ -499,7 +499,7 @@ class MonitoringServiceFolderController(BusinessControllerChild):
         ),
     )
     def add(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         name = self.app.pargs.name
         definition = self.app.pargs.definition
         norescreate = self.app.pargs.norescreate
@@ -585,7 +585,7 @@ class MonitoringServiceFolderController(BusinessControllerChild):
         ),
     )
     def dashboards(self):
-        data = {"owner-id": self.get_account(self.app.pargs.account)["uuid"]}
+        data = {"owner-id": self.get_account_uuid(self.app.pargs.account)}
         uri = "%s/monitoringservices/folders/describefolderconfig" % (self.baseuri)
         res = self.cmp_get(uri, data=data).get("DescribeFolderConfigResponse")
         self.app.render(
@@ -840,7 +840,7 @@ class MonitoringServiceAlertController(BusinessControllerChild):
         ),
     )
     def add(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         name = self.app.pargs.name
         zone = self.app.pargs.zone
         definition = self.app.pargs.definition
@@ -7,9 +7,10 @@ from cement import ex
 from beecell.types.type_dict import dict_get
 from beecell.types.type_string import str2bool
 from beecell.types.type_id import is_name, is_uuid
-from beehive3_cli.core.controller import ARGS
+from beehive3_cli.core.controller import ARGS, BULK_ARGS
 from beehive3_cli.plugins.business.controllers.business import BusinessControllerChild
 from beehive3_cli.plugins.administration.controllers.child import AdminChildController
+from beehive3_cli.plugins.business.util.teardown import ServiceTeardown
 
 
 class NetaaServiceController(BusinessControllerChild):
@@ -30,7 +31,7 @@ class NetaaServiceController(BusinessControllerChild):
     )
     def info(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = "%s/networkservices" % self.baseuri
         res = self.cmp_get(uri, data=data)
@@ -49,7 +50,7 @@ class NetaaServiceController(BusinessControllerChild):
     )
     def quotas(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = "%s/networkservices/describeaccountattributes" % self.baseuri
         res = self.cmp_get(uri, data=data)
@@ -74,7 +75,7 @@ class NetaaServiceController(BusinessControllerChild):
     )
     def availability_zones(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = "%s/computeservices/describeavailabilityzones" % self.baseuri
         res = self.cmp_get(uri, data=data)
@@ -235,7 +236,7 @@ class VpcNetServiceController(BusinessControllerChild):
     def add(self):
         data = {
             "VpcName": self.app.pargs.name,
-            "owner_id": self.get_account(self.app.pargs.account).get("uuid"),
+            "owner_id": self.get_account_uuid(self.app.pargs.account),
             "VpcType": self.app.pargs.template,
             "CidrBlock": self.app.pargs.cidr_block,
             "InstanceTenancy": self.app.pargs.tenancy,
@@ -1129,7 +1130,7 @@ class GatewayNetServiceController(BusinessControllerChild):
         ),
     )
     def add(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         data = {"owner-id": account}
         gateway_type = self.app.pargs.template
         if gateway_type is not None:
@@ -1685,7 +1686,7 @@ class HealthMonitorNetServiceController(BusinessControllerChild):
         ),
     )
     def add(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         protocol = self.app.pargs.protocol
         method = self.app.pargs.method
         if method is not None:
@@ -1803,15 +1804,16 @@ class HealthMonitorNetServiceController(BusinessControllerChild):
                         "type": str,
                     },
                 ),
-            ]
+            ],
+            BULK_ARGS,
         ),
     )
     def delete(self):
         oids = self.app.pargs.ids.split(",")
-        for oid in oids:
-            data = {"healthMonitorId": oid}
-            uri = "%s/networkservices/loadbalancer/healthmonitor/deletehealthmonitor" % self.baseuri
-            self.cmp_delete(uri, data=data, timeout=600, entity="Health monitor %s" % oid)
+        uri = "%s/networkservices/loadbalancer/healthmonitor/deletehealthmonitor" % self.baseuri
+        self.cmp_bulk_run(
+            "DELETE", oids, lambda oid: (uri, {"healthMonitorId": oid}), entity="health monitors", timeout=600
+        )
 
 
 class TargetGroupNetServiceController(BusinessControllerChild):
@@ -2112,7 +2114,7 @@ class TargetGroupNetServiceController(BusinessControllerChild):
         ),
     )
     def add(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         data = {
             "owner-id": account,
             "Name": self.app.pargs.name,
@@ -2196,15 +2198,16 @@ class TargetGroupNetServiceController(BusinessControllerChild):
                         "type": str,
                     },
                 ),
-            ]
+            ],
+            BULK_ARGS,
         ),
     )
     def delete(self):
         oids = self.app.pargs.ids.split(",")
-        for oid in oids:
-            data = {"targetGroupId": oid}
-            uri = "%s/networkservices/loadbalancer/targetgroup/deletetargetgroup" % self.baseuri
-            self.cmp_delete(uri, data=data, timeout=600, entity="Target group %s" % oid)
+        uri = "%s/networkservices/loadbalancer/targetgroup/deletetargetgroup" % self.baseuri
+        self.cmp_bulk_run(
+            "DELETE", oids, lambda oid: (uri, {"targetGroupId": oid}), entity="target groups", timeout=600
+        )
 
     @ex(
         help="register targets with target group",
@@ -2639,7 +2642,7 @@ class ListenerNetServiceController(BusinessControllerChild):
         ),
     )
     def add(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         data = {
             "owner-id": account,
             "Name": self.app.pargs.name,
@@ -2767,15 +2770,14 @@ class ListenerNetServiceController(BusinessControllerChild):
                         "type": str,
                     },
                 ),
-            ]
+            ],
+            BULK_ARGS,
         ),
     )
     def delete(self):
         oids = self.app.pargs.ids.split(",")
-        for oid in oids:
-            data = {"listenerId": oid}
-            uri = "%s/networkservices/loadbalancer/listener/deletelistener" % self.baseuri
-            self.cmp_delete(uri, data=data, timeout=600, entity="Listener %s" % oid)
+        uri = "%s/networkservices/loadbalancer/listener/deletelistener" % self.baseuri
+        self.cmp_bulk_run("DELETE", oids, lambda oid: (uri, {"listenerId": oid}), entity="listeners", timeout=600)
 
     @staticmethod
     def get_traffic_type(**kvargs):
@@ -3113,7 +3115,7 @@ class LoadBalancerNetServiceController(BusinessControllerChild, AdminChildContro
         ),
     )
     def add(self):
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
         protocol = self.app.pargs.protocol
         data = {
             "owner-id": account,
@@ -3274,8 +3276,9 @@ class LoadBalancerNetServiceController(BusinessControllerChild, AdminChildContro
         ),
     )
     def delete_predefined_service(self):
-        account = self.app.pargs.account
+        account = self.get_account_uuid(self.app.pargs.account)
 
+        services = []
         plugintypes = ["NetworkHealthMonitor", "NetworkListener"]
         for plugintype in plugintypes:
             version = "v2.0"
@@ -3284,24 +3287,26 @@ class LoadBalancerNetServiceController(BusinessControllerChild, AdminChildContro
             data = {
                 "account_id": account,
                 "plugintype": plugintype,
-                "page": 0,
-                "size": 10,
+                "size": -1,
             }
             res = self.cmp_get(uri, data=data)
-            serviceinsts = res.get("serviceinsts")
-            for serviceinst in serviceinsts:
-                uuid = serviceinst["uuid"]
-                name = serviceinst["name"]
-                plugintype = serviceinst["plugintype"]
-                if plugintype == plugintype:
-                    print("deleting %s ..." % name)
-
-                    value = uuid
-                    force = False
-                    propagate = False
-                    data = {"force": force, "propagate": propagate}
-                    uri = "/v2.0/nws/serviceinsts/%s" % value
-                    self.cmp_delete(uri, data=data, timeout=180, entity="service instance %s" % value)
+            services.extend([s for s in res.get("serviceinsts", []) if s["plugintype"] == plugintype])
+
+        if len(services) == 0:
+            self.app.render({"msg": "account %s has no predefined load balancer services" % account})
+            return
+        if getattr(self.app.pargs, "assumeyes", False) is False:
+            if self.confirm("You are about to delete %s services of account %s" % (len(services), account)) is False:
+                return
+
+        data = {"force": False, "propagate": False}
+        teardown = ServiceTeardown(self, account, delete_data=data)
+        report = teardown.run(services)
+        failed = [item for item in report if item["status"] != "DELETED"]
+        if len(failed) > 0:
+            self.app.render(failed, headers=["uuid", "name", "plugintype", "tier", "status", "elapsed", "error"])
+            self.app.exit_code = 1
+        self.app.render({"msg": "deleted %s of %s services" % (len(report) - len(failed), len(services))})
 
 
 class SshGatewayNetServiceController(BusinessControllerChild):
@@ -1128,7 +1128,7 @@ class ServiceInstanceController(ServiceControllerChild):
         creates service instance and service instance config for existing resource
         """
         name = self.app.pargs.name
-        account_id = self.get_account(self.app.pargs.account).get("uuid")
+        account_id = self.get_account_uuid(self.app.pargs.account)
         plugintype = self.app.pargs.plugintype
         container_plugintype = self.app.pargs.container_plugintype
         resource_id = self.app.pargs.resource
@@ -1413,7 +1413,7 @@ class ServiceInstanceController(ServiceControllerChild):
     )
     def tag_add_account_insts(self):
         account_id = self.app.pargs.account_id
-        account = self.get_account(account_id).get("uuid")
+        account = self.get_account_uuid(account_id)
         tags = self.app.pargs.tags.split(",")
         data = {"serviceinst": {"tags": {"cmd": "add", "values": tags}}}
         uri = "/v2.0/nws/serviceinsts/account/%s" % account
@@ -1972,7 +1972,7 @@ class ServiceTagController(ServiceControllerChild):
     )
     def add(self):
         value = self.app.pargs.value
-        account = self.get_account(self.app.pargs.account).get("uuid")
+        account = self.get_account_uuid(self.app.pargs.account)
 
         data = {"value": value, "account": account}
         uri = "%s/tags" % self.baseuri
@@ -27,7 +27,7 @@ class STaaServiceController(BusinessControllerChild):
     )
     def info(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = "%s/storageservices" % self.baseuri
         res = self.cmp_get(uri, data=urlencode(data))
@@ -46,7 +46,7 @@ class STaaServiceController(BusinessControllerChild):
     )
     def quotas(self):
         account = self.app.pargs.account
-        account = self.get_account(account).get("uuid")
+        account = self.get_account_uuid(account)
         data = {"owner-id": account}
         uri = "%s/storageservices/describeaccountattributes" % self.baseuri
         res = self.cmp_get(uri, data=urlencode(data))
@@ -338,7 +338,7 @@ class STaaServiceEfsController(BusinessControllerChild):
             )
         data = {
             "CreationToken": self.app.pargs.name,
-            "owner_id": self.get_account(self.app.pargs.account).get("uuid"),
+            "owner_id": self.get_account_uuid(self.app.pargs.account),
             "Nvl_FileSystem_Size": self.app.pargs.size,
             "Nvl_FileSystem_Type": self.app.pargs.type,
             "PerformanceMode": self.app.pargs.mode,
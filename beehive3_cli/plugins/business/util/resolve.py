@@ -0,0 +1,161 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from sqlite3 import connect
+from threading import Lock
+from time import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class NameResolutionCache(object):
+    """Cache of the name to uuid resolution of business entities. Entries are kept in memory and in a sqlite file
+    of the environment, so that the resolution done by a command is reused by the next ones. Keys are the names
+    used on the command line, like org.div.account triplets, and every entry expires after the ttl of its kind.
+
+    :param path: sqlite file path. Use None for a memory only cache
+    :param ttl: dict with entry ttl in seconds for every kind [optional]
+    :param default_ttl: ttl of kinds not in ttl [default=3600]
+    """
+
+    def __init__(self, path: Optional[str], ttl: Dict[str, int] = None, default_ttl: int = 3600):
+        self.path = path
+        self.ttl = ttl if ttl is not None else {}
+        self.default_ttl = default_ttl
+        self.entries = {}
+        self.lock = Lock()
+        self.conn = None
+        if path is not None:
+            self.conn = connect(path, check_same_thread=False)
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS names (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    uuid TEXT NOT NULL,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (kind, key)
+                );
+                CREATE INDEX IF NOT EXISTS names_uuid ON names (kind, uuid);
+                """
+            )
+            self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __expired(self, kind: str, updated: float) -> bool:
+        return time() - updated > self.ttl.get(kind, self.default_ttl)
+
+    def get(self, kind: str, key: str) -> Optional[str]:
+        """get uuid of a name. Return None if the entry is missing or expired
+
+        :param kind: entity kind. Ex. account
+        :param key: entity name or triplet
+        :return: uuid or None
+        """
+        with self.lock:
+            entry = self.entries.get((kind, key))
+            if entry is None and self.conn is not None:
+                row = self.conn.execute(
+                    "SELECT uuid, updated FROM names WHERE kind = ? AND key = ?", (kind, key)
+                ).fetchone()
+                if row is not None:
+                    entry = self.entries[(kind, key)] = (row[0], row[1])
+            if entry is None or self.__expired(kind, entry[1]):
+                return None
+            return entry[0]
+
+    def get_names(self, kind: str, uuid: str) -> List[str]:
+        """get the names cached for a uuid
+
+        :param kind: entity kind
+        :param uuid: entity uuid
+        :return: list of keys
+        """
+        with self.lock:
+            if self.conn is not None:
+                rows = self.conn.execute("SELECT key, updated FROM names WHERE kind = ? AND uuid = ?", (kind, uuid))
+                return [key for key, updated in rows if not self.__expired(kind, updated)]
+            return [
+                k[1]
+                for k, v in self.entries.items()
+                if k[0] == kind and v[0] == uuid and not self.__expired(kind, v[1])
+            ]
+
+    def set(self, kind: str, key: str, uuid: str):
+        """cache the uuid of a name"""
+        self.set_many(kind, [(key, uuid)])
+
+    def set_many(self, kind: str, items: Iterable[Tuple[str, str]]):
+        """cache many names with a single transaction
+
+        :param kind: entity kind
+        :param items: iterable of (key, uuid)
+        """
+        now = time()
+        items = [(kind, str(key), uuid, now) for key, uuid in items if key is not None and uuid is not None]
+        with self.lock:
+            for kind, key, uuid, updated in items:
+                self.entries[(kind, key)] = (uuid, updated)
+            if self.conn is not None:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO names (kind, key, uuid, updated) VALUES (?, ?, ?, ?)", items
+                )
+                self.conn.commit()
+
+    def invalidate(self, kind: str, oid: str):
+        """remove the entries of an entity
+
+        :param kind: entity kind
+        :param oid: entity uuid or name
+        """
+        with self.lock:
+            for k in [k for k, v in self.entries.items() if k[0] == kind and oid in (k[1], v[0])]:
+                self.entries.pop(k)
+            if self.conn is not None:
+                self.conn.execute("DELETE FROM names WHERE kind = ? AND (uuid = ? OR key = ?)", (kind, oid, oid))
+                self.conn.commit()
+
+    def clear(self, kind: str = None) -> int:
+        """remove all the entries or the entries of a kind
+
+        :param kind: entity kind [optional]
+        :return: number of entries removed
+        """
+        with self.lock:
+            if kind is None:
+                count = len(self.entries)
+                self.entries = {}
+            else:
+                keys = [k for k in self.entries if k[0] == kind]
+                count = len(keys)
+                for k in keys:
+                    self.entries.pop(k)
+            if self.conn is not None:
+                if kind is None:
+                    count = self.conn.execute("DELETE FROM names").rowcount
+                else:
+                    count = self.conn.execute("DELETE FROM names WHERE kind = ?", (kind,)).rowcount
+                self.conn.commit()
+            return count
+
+    def stats(self) -> List[dict]:
+        """get number of valid and expired entries for every kind"""
+        with self.lock:
+            if self.conn is not None:
+                rows = self.conn.execute("SELECT kind, updated FROM names").fetchall()
+            else:
+                rows = [(k[0], v[1]) for k, v in self.entries.items()]
+        res = {}
+        for kind, updated in rows:
+            item = res.setdefault(
+                kind, {"kind": kind, "entries": 0, "expired": 0, "ttl": self.ttl.get(kind, self.default_ttl)}
+            )
+            if self.__expired(kind, updated):
+                item["expired"] += 1
+            else:
+                item["entries"] += 1
+        return list(res.values())
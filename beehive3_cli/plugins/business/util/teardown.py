@@ -0,0 +1,161 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from sys import stdout
+from time import sleep, time
+from typing import Dict, List
+from beecell.remote import NotFoundException
+from beehive3_cli.core.util import run_concurrent
+
+# service plugin types in teardown order. Types of the same tier are deleted together
+TEARDOWN_TIERS = [
+    ["NetworkLoadBalancer"],
+    ["NetworkListener", "NetworkTargetGroup", "NetworkHealthMonitor"],
+    ["ComputeInstance", "DatabaseInstance", "AppEngineInstance", "StorageEFS"],
+    ["ComputeVolume", "ComputeImage", "ComputeKeyPairs", "ComputeTag"],
+    ["ComputeSecurityGroup", "NetworkGateway"],
+    ["ComputeSubnet"],
+    ["ComputeVPC"],
+]
+
+# tier of plugin types not in TEARDOWN_TIERS
+DEFAULT_TIER = 2
+
+
+class ServiceTeardown(object):
+    """Delete the service instances of an account. Services are grouped in tiers by plugin type: resources that use
+    other services are deleted first and container services (plugin type ending with Service) last. The delete
+    requests of a tier are sent concurrently without waiting their tasks, then the tasks of the tier are waited
+    with a single poll loop and the service states are tracked with a single list request of the account services
+    for every poll, instead of one request for every service. When a service of a tier is not deleted the next
+    tiers, that the service may still depend on, are skipped.
+
+    :param controller: business controller used to call the api
+    :param account_id: account uuid
+    :param workers: number of concurrent delete requests [default=10]
+    :param delta: poll interval in seconds [default=2]
+    :param maxtime: max time to wait for a tier [default=3600]
+    :param delete_data: data of the delete request [default={}]
+    """
+
+    def __init__(self, controller, account_id, workers=10, delta=2, maxtime=3600, delete_data=None):
+        self.controller = controller
+        self.account_id = account_id
+        self.workers = workers
+        self.delta = delta
+        self.maxtime = maxtime
+        self.delete_data = delete_data if delete_data is not None else {}
+        self.tier_index = {}
+        for idx, plugintypes in enumerate(TEARDOWN_TIERS):
+            for plugintype in plugintypes:
+                self.tier_index[plugintype] = idx
+
+    def get_tier(self, plugintype: str) -> int:
+        if plugintype is not None and plugintype.endswith("Service"):
+            return len(TEARDOWN_TIERS)
+        return self.tier_index.get(plugintype, DEFAULT_TIER)
+
+    def tiers(self, services: List[dict]) -> List[List[dict]]:
+        """group services by tier in teardown order"""
+        res = {}
+        for service in services:
+            res.setdefault(self.get_tier(service.get("plugintype")), []).append(service)
+        return [res[k] for k in sorted(res.keys())]
+
+    def get_states(self) -> Dict[str, dict]:
+        """get the state of all the account services with one request"""
+        uri = "/v2.0/nws/serviceinsts"
+        res = self.controller.cmp_get(uri, data={"account_id": self.account_id, "size": -1})
+        return {s["uuid"]: s for s in res.get("serviceinsts", [])}
+
+    def __delete(self, service: dict):
+        """send the delete request of a service. Return the delete task id if any"""
+        uri = "/v2.0/nws/serviceinsts/%s" % service["uuid"]
+        try:
+            res = self.controller.api.call(uri, "DELETE", data=self.delete_data, timeout=600)
+        except NotFoundException:
+            # already removed with its parent service
+            return None
+        finally:
+            self.controller.resolve_cache.invalidate("serviceinst", service["uuid"])
+        if isinstance(res, dict):
+            return res.get("taskid", None)
+        return None
+
+    def __report(self, service, status, start, error=None):
+        return {
+            "uuid": service["uuid"],
+            "name": service["name"],
+            "plugintype": service.get("plugintype"),
+            "tier": self.get_tier(service.get("plugintype")),
+            "status": status,
+            "elapsed": round(time() - start, 1),
+            "error": error,
+        }
+
+    def run(self, services: List[dict]) -> List[dict]:
+        """delete services
+
+        :param services: list of service instances
+        :return: list of report items with uuid, name, plugintype, tier, status, elapsed and error
+        """
+        report = []
+        tiers = self.tiers(services)
+        total = len(services)
+        for idx, tier in enumerate(tiers):
+            start = time()
+            number = self.get_tier(tier[0].get("plugintype"))
+            self.controller.app.log.info("teardown tier %s: %s services" % (number, len(tier)))
+
+            # issue deletes
+            pending = {}
+            tasks = {}
+            for service, taskid, err in run_concurrent(self.__delete, tier, workers=self.workers):
+                if err is not None:
+                    report.append(self.__report(service, "ERROR", start, error=str(err)))
+                    print("service %s delete error: %s" % (service["name"], err))
+                else:
+                    pending[service["uuid"]] = service
+                    if taskid is not None:
+                        tasks[taskid] = service["uuid"]
+
+            # wait the delete tasks of the tier with one poll loop
+            statuses = self.controller.api.wait_tasks(
+                list(tasks.keys()), delta=self.delta, maxtime=self.maxtime, workers=self.workers, output=False
+            )
+            for taskid, status in statuses.items():
+                if status != "SUCCESS" and tasks[taskid] in pending:
+                    error = "delete task %s %s" % (taskid, status)
+                    report.append(self.__report(pending.pop(tasks[taskid]), "ERROR", start, error=error))
+                    print("service %s delete error: %s" % (report[-1]["name"], error))
+
+            # track pending services with one poll for all of them
+            while len(pending) > 0:
+                states = self.get_states()
+                for uuid in list(pending.keys()):
+                    state = states.get(uuid)
+                    status = "DELETED" if state is None else state.get("status")
+                    if status == "DELETED":
+                        report.append(self.__report(pending.pop(uuid), "DELETED", start))
+                        print("service %s deleted [%s/%s]" % (report[-1]["name"], len(report), total))
+                    elif status == "ERROR":
+                        error = state.get("last_error")
+                        report.append(self.__report(pending.pop(uuid), "ERROR", start, error=error))
+                        print("service %s delete error: %s" % (report[-1]["name"], error))
+                if len(pending) > 0 and time() - start > self.maxtime:
+                    for uuid in list(pending.keys()):
+                        report.append(self.__report(pending.pop(uuid), "TIMEOUT", start))
+                if len(pending) > 0:
+                    sleep(self.delta)
+                stdout.flush()
+
+            # services of the next tiers may depend on the services not deleted
+            if len([item for item in report if item["tier"] == number and item["status"] != "DELETED"]) > 0:
+                print("tier %s not deleted, %s services of the next tiers skipped" % (number, total - len(report)))
+                for next_tier in tiers[idx + 1 :]:
+                    for service in next_tier:
+                        error = "tier %s not deleted" % number
+                        report.append(self.__report(service, "SKIPPED", time(), error=error))
+                break
+        return report
@@ -5,11 +5,13 @@
 from pygments.formatters.terminal256 import Terminal256Formatter
 from pygments import format
 from pygments.token import Token
+from urllib.parse import urlencode
 from cement import ex
-from tinydb import TinyDB, Query
 from beecell.simple import dict_get
 from beehive3_cli.core.controller import BaseController, PARGS
-from beehive3_cli.core.util import TreeStyle
+from beehive3_cli.core.util import TreeStyle, run_concurrent
+from beehive3_cli.plugins.dq.util.graph import DqResourceGraph
+from beehive3_cli.plugins.dq.util.store import DqResultStore
 
 
 class DqResourceEntityController(BaseController):
@@ -22,6 +24,11 @@ class DqResourceEntityController(BaseController):
 
         cmp = {"baseuri": "/v1.0/nrs", "subsystem": "resource"}
 
+        # local store with bad resources and scan progress
+        store = "./bad_resource.db"
+        # tinydb store of the previous versions, imported when the store is created
+        legacy_store = "./bad_resource.json"
+
         headers = [
             "id",
             "uuid",
@@ -94,9 +101,7 @@ class DqResourceEntityController(BaseController):
 
         self.configure_cmp_api_client()
 
-        db = TinyDB("./bad_resource.json")
-        self.table_resource = db.table("resources")
-        self.query = Query()
+        self.store = DqResultStore(self._meta.store, legacy_path=self._meta.legacy_store)
 
     def __print_tree(self, resource, space="   ", print_header=False):
         if print_header is True:
@@ -254,6 +259,40 @@ class DqResourceEntityController(BaseController):
                         "default": None,
                     },
                 ),
+                (
+                    ["-all"],
+                    {
+                        "help": "check all the pages starting from -page. -size is used as page size",
+                        "action": "store_true",
+                        "dest": "all",
+                    },
+                ),
+                (
+                    ["-resume"],
+                    {
+                        "help": "with -all resume the last interrupted scan with the same filters",
+                        "action": "store_true",
+                        "dest": "resume",
+                    },
+                ),
+                (
+                    ["-incremental"],
+                    {
+                        "help": "with -all check only entities modified since the last completed scan with the same "
+                        "filters",
+                        "action": "store_true",
+                        "dest": "incremental",
+                    },
+                ),
+                (
+                    ["-workers"],
+                    {
+                        "help": "number of concurrent checks [default=10]",
+                        "action": "store",
+                        "type": int,
+                        "default": 10,
+                    },
+                ),
             ]
         ),
     )
@@ -279,19 +318,21 @@ class DqResourceEntityController(BaseController):
                 "tags",
             ]
             mappings = {"name": lambda n: "%" + n + "%"}
-            data = self.format_paginated_query(params, mappings=mappings)
-            uri = "%s/entities" % self.baseuri
-            res = self.cmp_get(uri, data=data)
-
-            if "page" in res:
-                print("Page: %s" % res["page"])
-                print("Count: %s" % res["count"])
-                print("Total: %s" % res["total"])
-                print("From: %s To: %s" % (res["page"] * res["count"], (res["page"] + 1) * res["count"]))
-                print("Order: %s %s" % (res.get("sort").get("field"), res.get("sort").get("order")))
+            query = self.format_query(params, mappings=mappings)
+            workers = self.app.pargs.workers
+            scan_all = self.app.pargs.all
+
+            scan_id = None
+            checked_ids = set()
+            since = None
+            if scan_all is True:
+                scan_id = self.store.start_scan(query, resume=self.app.pargs.resume)
+                checked_ids = self.store.checked_ids(scan_id)
+                if self.app.pargs.incremental is True:
+                    since = self.store.last_finished_scan(query)
+                print("Scan: %s - already checked: %s - modified since: %s" % (scan_id, len(checked_ids), since))
 
             tmpl = "{idx:6} {id:8} {name:60.60} {container:10} {parent:10} {active:7} {state:10.10}"
-            line = "".join(["-" for i in range(40)])
             headers = {
                 "idx": "idx",
                 "id": "id",
@@ -301,24 +342,98 @@ class DqResourceEntityController(BaseController):
                 "active": "active",
                 "state": "state",
             }
-            print(tmpl.format(**headers))
 
-            idx = res["page"] * res["count"] + 1
-            for item in res.get("resources", []):
+            def entities():
+                for item in self.__get_entity_pages(query, scan_all):
+                    if item["id"] in checked_ids:
+                        continue
+                    # entity dates have the same format used by the store
+                    if since is not None and (dict_get(item, "date.modified") or "") < since:
+                        continue
+                    yield item
+
+            def check_entity(item):
                 uri = "%s/entities/%s/check" % (self.baseuri, item["id"])
-                item = self.cmp_get(uri).get("resource")
+                res = self.cmp_get(uri).get("resource")
+                if res is None:
+                    raise Exception("no resource returned by %s" % uri)
+                return res
 
-                if item.get("state") != "ACTIVE":
-                    data = self.table_resource.search(self.query.id == item["id"])
-                    if len(data) == 0:
-                        self.table_resource.insert(item)
+            print(tmpl.format(**headers))
+            idx = self.app.pargs.page * self.app.pargs.size + 1
+            checked = bad = errors = 0
+            for item, res, err in run_concurrent(check_entity, entities(), workers=workers):
+                if err is not None:
+                    self.app.error("entity %s check failed: %s" % (item["id"], err))
+                    errors += 1
+                    continue
 
-                item["idx"] = idx
-                self.app.log.warning(item)
-                check = item.pop("check")
-                repr = tmpl.format(**item) + str(check)
-                print(repr)
+                check = res.get("check", {})
+                if res.get("state") != "ACTIVE" or check.get("check") is False:
+                    self.store.add_bad(res, commit=False)
+                    bad += 1
+                else:
+                    self.store.remove_bad(res["id"], commit=False)
+                if scan_id is not None:
+                    self.store.add_checked(scan_id, res["id"], res.get("state"), commit=False)
+                # commit periodically so an interrupted scan keeps its progress
+                checked += 1
+                if checked % 50 == 0:
+                    self.store.commit()
+
+                res["idx"] = idx
+                self.app.log.debug(res)
+                res.pop("check", None)
+                print(tmpl.format(**res) + str(check))
                 idx += 1
+            self.store.commit()
+
+            # a scan with errors is left open so that it can be resumed
+            if scan_id is not None and errors == 0:
+                self.store.finish_scan(scan_id)
+            print("checked: %s - bad: %s - errors: %s" % (checked, bad, errors))
+
+    def __get_graph(self, bulk=False):
+        """get resource graph. If bulk is True load all entities and links in bulk
+
+        :param bulk: if True preload entities and links
+        :return: DqResourceGraph instance
+        """
+        graph = DqResourceGraph(self, baseuri=self.baseuri)
+        if bulk is True:
+            graph.load_entities()
+            graph.load_links()
+            print("loaded %s entities and %s links" % (len(graph.entities), len(graph.links)))
+        return graph
+
+    def __get_entity_pages(self, query, scan_all):
+        """get entities page by page
+
+        :param query: filter query
+        :param scan_all: if True get all the pages starting from -page else get only one page
+        :return: entities generator
+        """
+        uri = "%s/entities" % self.baseuri
+        page = self.app.pargs.page
+        size = self.app.pargs.size
+        field = self.app.pargs.field
+        order = self.app.pargs.order
+        if scan_all is True:
+            # sort by id so that new entities do not shift the pages still to read
+            field, order = "id", "ASC"
+        while True:
+            data = urlencode({"size": size, "page": page, "field": field, "order": order})
+            if query != "":
+                data = "%s&%s" % (query, data)
+            res = self.cmp_get(uri, data=data)
+            if page == self.app.pargs.page:
+                print("Total: %s" % res.get("total"))
+            resources = res.get("resources", [])
+            for item in resources:
+                yield item
+            if scan_all is False or len(resources) < size or (page + 1) * size >= res.get("total", 0):
+                break
+            page += 1
 
     @ex(
         help="get bad resources",
@@ -339,10 +454,7 @@ class DqResourceEntityController(BaseController):
     )
     def bad_get(self):
         definition = self.app.pargs.definition
-        if definition is not None:
-            items = self.table_resource.search(self.query.__meta__.definition == definition)
-        else:
-            items = self.table_resource.all()
+        items = self.store.get_bad(definition=definition)
         headers = [
             "definition",
             "id",
@@ -384,9 +496,7 @@ class DqResourceEntityController(BaseController):
     )
     def bad_remove(self):
         oid = self.app.pargs.id
-        data = self.table_resource.search(self.query.id == oid)
-        if len(data) > 0:
-            self.table_resource.remove(doc_ids=[data[0].doc_id])
+        self.store.remove_bad(oid)
 
     @ex(
         help="remove bad resource",
@@ -409,10 +519,7 @@ class DqResourceEntityController(BaseController):
         oid = self.app.pargs.id
         uri = "%s/entities/%s" % (self.baseuri, oid)
         self.cmp_delete(uri, data="")
-
-        data = self.table_resource.search(self.query.id == oid)
-        if len(data) > 0:
-            self.table_resource.remove(doc_ids=[data[0].doc_id])
+        self.store.remove_bad(oid)
 
     @ex(
         help="repair compute volume tree",
@@ -444,12 +551,7 @@ class DqResourceEntityController(BaseController):
         oid = self.app.pargs.id
         definition = self.app.pargs.definition
 
-        if oid is not None:
-            items = self.table_resource.search(self.query.id == oid)
-        elif definition is not None:
-            items = self.table_resource.search(self.query.__meta__.definition == definition)
-        else:
-            items = self.table_resource.all()
+        items = self.store.get_bad(oid=oid, definition=definition)
 
         for item in items:
             oid = item["id"]
@@ -467,9 +569,7 @@ class DqResourceEntityController(BaseController):
             print("# check:                     %s" % res["check"])
 
             if res["check"] is True:
-                data = self.table_resource.search(self.query.id == oid)
-                if len(data) > 0:
-                    self.table_resource.remove(doc_ids=[data[0].doc_id])
+                self.store.remove_bad(oid)
                 continue
 
             uri = "/v1.0/nrs/provider/instances/%s" % server_name
@@ -556,6 +656,14 @@ class DqResourceEntityController(BaseController):
                         "default": None,
                     },
                 ),
+                (
+                    ["-bulk"],
+                    {
+                        "help": "load entities and links in bulk and resolve trees and links locally",
+                        "action": "store_true",
+                        "dest": "bulk",
+                    },
+                ),
             ]
         ),
     )
@@ -563,20 +671,19 @@ class DqResourceEntityController(BaseController):
         oid = self.app.pargs.id
         definition = self.app.pargs.definition
 
-        if oid is not None:
-            items = self.table_resource.search(self.query.id == oid)
-        elif definition is not None:
-            items = self.table_resource.search(self.query.__meta__.definition == definition)
-        else:
-            items = self.table_resource.all()
+        items = self.store.get_bad(oid=oid, definition=definition)
+        graph = self.__get_graph(self.app.pargs.bulk)
+        sites = {}
 
         for item in items:
             oid = item["id"]
             name = item["name"]
-            uri = "%s/entities/%s/tree" % (self.baseuri, oid)
-            res = self.cmp_get(uri, data="").get("resourcetree", {})
+            res = graph.tree(oid)
+            if len(res) == 0:
+                self.app.error("compute volume %s does not exist" % oid)
+                continue
             main = None
-            for children in res["children"]:
+            for children in res.get("children", []):
                 if dict_get(children, "attributes.main", default=False):
                     main = children
 
@@ -594,9 +701,10 @@ class DqResourceEntityController(BaseController):
 
                 # get container
                 site_id = children.get("relation").split(".")[1]
-                uri = "/v1.0/nrs/provider/sites/%s" % site_id
-                site = self.cmp_get(uri).get("site")
-                orchestrators = site.pop("orchestrators")
+                if site_id not in sites:
+                    uri = "/v1.0/nrs/provider/sites/%s" % site_id
+                    sites[site_id] = self.cmp_get(uri).get("site")
+                orchestrators = sites[site_id].get("orchestrators")
                 container = [o for o in orchestrators if o["type"] == dict_get(children, "attributes.type")][0]["id"]
 
                 uri = "%s/entities" % self.baseuri
@@ -627,9 +735,7 @@ class DqResourceEntityController(BaseController):
 
                     if p["name"].find("volume") > 0 and vol_size == size:
                         # check volume is already linked
-                        uri = "%s/links" % self.baseuri
-                        data = {"end_resource": p["id"], "type": "relation"}
-                        links = self.cmp_get(uri, data=data).get("count", 0)
+                        links = graph.count_links_to(p["id"], link_type="relation")
                         if links > 0:
                             continue
 
@@ -662,10 +768,9 @@ class DqResourceEntityController(BaseController):
                     uri = "%s/links" % self.baseuri
                     res = self.cmp_post(uri, data={"resourcelink": data})
                     print("MSG: create link: %s" % res["uuid"])
-
-                    data = self.table_resource.search(self.query.id == oid)
-                    if len(data) > 0:
-                        self.table_resource.remove(doc_ids=[data[0].doc_id])
+                    self.store.remove_bad(oid)
+                    # the next items of the run must see the physical volume as linked
+                    graph.add_link({"id": res.get("id", res["uuid"]), "uuid": res["uuid"], "details": data})
 
                 # print check
                 uri = "%s/entities/%s/check" % (self.baseuri, oid)
@@ -682,6 +787,7 @@ class DqResourceEntityController(BaseController):
                 self.__print_tree(res, print_header=True)
 
                 # input()
+        self.app.log.debug("resource graph api requests: %s" % graph.requests)
 
     @ex(
         help="check compute instance",
@@ -706,6 +812,14 @@ class DqResourceEntityController(BaseController):
                         "default": "vsphere",
                     },
                 ),
+                (
+                    ["-bulk"],
+                    {
+                        "help": "load entities and links in bulk and resolve trees and links locally",
+                        "action": "store_true",
+                        "dest": "bulk",
+                    },
+                ),
             ]
         ),
     )
@@ -717,6 +831,7 @@ class DqResourceEntityController(BaseController):
         uri = "/v1.0/nrs/provider/instances"
         data = {"hypervisor": hypervisor, "page": page, "name": name}
         instances = self.cmp_get(uri, data=data).get("instances", [])
+        graph = self.__get_graph(self.app.pargs.bulk)
 
         # compute instance block device mapping
         for instance in instances:
@@ -724,12 +839,14 @@ class DqResourceEntityController(BaseController):
             oid = instance.get("id")
 
             # get tree
-            uri = "%s/entities/%s/tree" % (self.baseuri, oid)
-            tree = self.cmp_get(uri, data="").get("resourcetree", {})
+            tree = graph.tree(oid)
+            if len(tree) == 0:
+                self.app.error("compute instance %s does not exist" % oid)
+                continue
             self.c("\ncompute instance tree", "underline")
             self.__print_tree(tree, print_header=True)
             main = None
-            for children in tree["children"]:
+            for children in tree.get("children", []):
                 if dict_get(children, "attributes.main", default=False):
                     main = children
 
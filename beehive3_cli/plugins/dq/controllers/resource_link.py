@@ -3,8 +3,9 @@
 # (C) Copyright 2018-2024 CSI-Piemonte
 
 from beehive3_cli.core.controller import BaseController, PARGS
+from beehive3_cli.plugins.dq.util.graph import DqResourceGraph
+from beehive3_cli.plugins.dq.util.store import DqResultStore
 from cement import ex
-from tinydb import TinyDB, Query
 
 
 class DqResourceLinkController(BaseController):
@@ -17,6 +18,11 @@ class DqResourceLinkController(BaseController):
 
         cmp = {"baseuri": "/v1.0/nrs", "subsystem": "resource"}
 
+        # local store with bad links
+        store = "./bad_link.db"
+        # tinydb store of the previous versions, imported when the store is created
+        legacy_store = "./bad_link.json"
+
         headers = [
             "id",
             "uuid",
@@ -89,9 +95,7 @@ class DqResourceLinkController(BaseController):
 
         self.configure_cmp_api_client()
 
-        db = TinyDB("./bad_resource.json")
-        self.table_resource = db.table("resources")
-        self.query = Query()
+        self.store = DqResultStore(self._meta.store, legacy_path=self._meta.legacy_store, legacy_table="links")
 
     @ex(
         help="repair resource links",
@@ -107,58 +111,56 @@ class DqResourceLinkController(BaseController):
                         "default": None,
                     },
                 ),
+                (
+                    ["-pagesize"],
+                    {
+                        "help": "page size used to load links and entities [default=500]",
+                        "action": "store",
+                        "type": int,
+                        "default": 500,
+                    },
+                ),
             ]
         ),
     )
     def check(self):
-        # size = self.app.pargs.size
-        # page = self.app.pargs.page
-        uri = "%s/links" % self.baseuri
-        res = self.cmp_get(uri, data={"size": 1})
-        total = res["total"]
-        print("found %s links" % total)
-
-        page_size = 500
-        page_num = round(total / page_size)
-        print(total, page_num)
-        for page in range(0, page_num):
-            uri = "%s/links" % self.baseuri
-            res = self.cmp_get(uri, data={"size": page_size, "page": page})
-            print("found %s links from %s" % (res["count"], res["total"]))
-            res = res.get("resourcelinks", [])
-            idx = page_size * page + 1
-
-            for item in res:
-                oid = item["id"]
-                print("# idx: %s - id: %s - name: %s" % (idx, oid, item["name"]))
-
-                details = item.get("details")
-                start_resource = details.get("start_resource")
-                end_resource = details.get("end_resource")
-                check = True
-
-                uri = "%s/entities/%s" % (self.baseuri, start_resource)
-                try:
-                    self.cmp_get(uri).get("resource")
-                    # print(' - start resource: %s - OK' % start_resource)
-                except:
-                    self.app.error(" - start resource: %s - KO" % start_resource)
-                    check = False
-
-                uri = "%s/entities/%s" % (self.baseuri, end_resource)
-                try:
-                    self.cmp_get(uri).get("resource")
-                    # print(' - end resource: %s - OK' % end_resource)
-                except:
-                    self.app.error(" - end resource: %s - KO" % end_resource)
-                    check = False
-
-                if check is False:
-                    data = self.table_link.search(self.query.id == item["id"])
-                    if len(data) == 0:
-                        self.table_link.insert(item)
-
-                idx += 1
+        oid = self.app.pargs.id
+        pagesize = self.app.pargs.pagesize
+
+        # load links and entities in bulk and check links against the entity index
+        graph = DqResourceGraph(self, baseuri=self.baseuri, pagesize=pagesize)
+        if oid is not None:
+            links = [self.cmp_get("%s/links/%s" % (self.baseuri, oid)).get("resourcelink")]
+        else:
+            graph.load_links()
+            links = list(graph.links.values())
+            graph.load_entities()
+        print("found %s links" % len(links))
+
+        idx = 1
+        bad = 0
+        for item in links:
+            details = item.get("details")
+            start_resource = details.get("start_resource")
+            end_resource = details.get("end_resource")
+            check = True
+
+            if graph.exists(start_resource) is False:
+                self.app.error("# idx: %s - id: %s - start resource: %s - KO" % (idx, item["id"], start_resource))
+                check = False
+
+            if graph.exists(end_resource) is False:
+                self.app.error("# idx: %s - id: %s - end resource: %s - KO" % (idx, item["id"], end_resource))
+                check = False
+
+            if check is False:
+                self.store.add_bad(item, commit=False)
+                bad += 1
+            else:
+                self.store.remove_bad(item["id"], commit=False)
+            idx += 1
+        self.store.commit()
+        print("checked: %s - bad: %s - api requests: %s" % (len(links), bad, graph.requests))
 
     @ex(
         help="get bad links",
@@ -179,10 +181,7 @@ class DqResourceLinkController(BaseController):
     )
     def bad_get(self):
         definition = self.app.pargs.definition
-        if definition is not None:
-            items = self.table_link.search(self.query.__meta__.definition == definition)
-        else:
-            items = self.table_link.all()
+        items = self.store.get_bad(definition=definition)
         headers = ["definition", "id", "name", "type", "start_resource", "end_resource"]
         fields = [
             "__meta__.definition",
@@ -213,9 +212,7 @@ class DqResourceLinkController(BaseController):
     )
     def bad_remove(self):
         oid = self.app.pargs.id
-        data = self.table_link.search(self.query.id == oid)
-        if len(data) > 0:
-            self.table_link.remove(doc_ids=[data[0].doc_id])
+        self.store.remove_bad(oid)
 
     @ex(
         help="remove bad link",
@@ -238,7 +235,4 @@ class DqResourceLinkController(BaseController):
         oid = self.app.pargs.id
         uri = "%s/links/%s" % (self.baseuri, oid)
         self.cmp_delete(uri, data="")
-
-        data = self.table_link.search(self.query.id == oid)
-        if len(data) > 0:
-            self.table_link.remove(doc_ids=[data[0].doc_id])
+        self.store.remove_bad(oid)
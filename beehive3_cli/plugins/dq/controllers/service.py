@@ -4,8 +4,9 @@
 
 from beecell.simple import dict_get
 from beehive3_cli.core.controller import BaseController, PARGS
+from beehive3_cli.core.util import run_concurrent
+from beehive3_cli.plugins.dq.util.store import DqResultStore
 from cement import ex
-from tinydb import TinyDB, Query
 
 
 class DqServiceEntityController(BaseController):
@@ -18,6 +19,11 @@ class DqServiceEntityController(BaseController):
 
         cmp = {"baseuri": "/v2.0/nws", "subsystem": "resource"}
 
+        # local store with bad service instances
+        store = "./bad_service.db"
+        # tinydb store of the previous versions, imported when the store is created
+        legacy_store = "./bad_service.json"
+
         headers = [
             "id",
             "uuid",
@@ -90,11 +96,7 @@ class DqServiceEntityController(BaseController):
 
         self.configure_cmp_api_client()
 
-        db = TinyDB("./bad_service.json")
-        self.table_service = db.table("services")
-        db = TinyDB("./bad_link.json")
-        self.table_link = db.table("links")
-        self.query = Query()
+        self.store = DqResultStore(self._meta.store, legacy_path=self._meta.legacy_store, legacy_table="services")
 
     @ex(
         help="check service instances",
@@ -200,6 +202,15 @@ class DqServiceEntityController(BaseController):
                         "default": None,
                     },
                 ),
+                (
+                    ["-workers"],
+                    {
+                        "help": "number of concurrent checks [default=10]",
+                        "action": "store",
+                        "type": int,
+                        "default": 10,
+                    },
+                ),
             ]
         ),
     )
@@ -246,15 +257,20 @@ class DqServiceEntityController(BaseController):
             }
             print(tmpl.format(**headers))
 
-            idx = res["page"] * res["count"] + 1
-            for item in res.get("serviceinsts", []):
+            def check_service(item):
                 uri = "%s/serviceinsts/%s/check" % (self.baseuri, item["id"])
-                item = self.cmp_get(uri).get("serviceinst")
+                return self.cmp_get(uri).get("serviceinst")
+
+            idx = res["page"] * res["count"] + 1
+            items = res.get("serviceinsts", [])
+            for item, res, err in run_concurrent(check_service, items, workers=self.app.pargs.workers):
+                if err is not None:
+                    self.app.error("service instance %s check failed: %s" % (item["id"], err))
+                    continue
+                item = res
 
                 if item.get("status") != "ACTIVE":
-                    data = self.table_service.search(self.query.id == item["id"])
-                    if len(data) == 0:
-                        self.table_service.insert(item)
+                    self.store.add_bad(item)
 
                 item["idx"] = idx
                 self.app.log.warning(item)
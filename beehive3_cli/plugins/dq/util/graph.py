@@ -0,0 +1,192 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from collections import defaultdict
+from typing import List, Optional
+from beecell.simple import dict_get
+from beehive3_cli.core.util import run_concurrent
+
+
+class DqResourceGraph(object):
+    """In memory resource graph used by data quality checks. Entities and links are loaded in bulk with paged list
+    requests (pages after the first one are fetched concurrently) and indexed by id, uuid, parent, start and end
+    resource, so that tree and link consistency checks run locally instead of calling the api once per resource.
+
+    Every query falls back to the api when the related index has not been loaded.
+
+    :param controller: cli controller used to call the api
+    :param baseuri: resource api base uri [default=/v1.0/nrs]
+    :param pagesize: list page size [default=500]
+    :param workers: number of concurrent page requests [default=5]
+    """
+
+    def __init__(self, controller, baseuri="/v1.0/nrs", pagesize=500, workers=5):
+        self.controller = controller
+        self.baseuri = baseuri
+        self.pagesize = pagesize
+        self.workers = workers
+        self.requests = 0
+
+        self.entities = {}
+        self.uuids = {}
+        self.container_names = {}
+        self.children_idx = defaultdict(list)
+        self.links = {}
+        self.links_from_idx = defaultdict(list)
+        self.links_to_idx = defaultdict(list)
+        self.entities_loaded = False
+        self.links_loaded = False
+
+    def __get_all(self, uri: str, key: str, filters: dict) -> List[dict]:
+        """get all the items of a paged list"""
+        filters = {k: v for k, v in filters.items() if v is not None}
+
+        def get_page(page):
+            data = {"size": self.pagesize, "page": page, "field": "id", "order": "ASC"}
+            data.update(filters)
+            return self.controller.cmp_get(uri, data=data)
+
+        res = get_page(0)
+        items = res.get(key, [])
+        total = res.get("total", 0)
+        pages = range(1, (total + self.pagesize - 1) // self.pagesize)
+        for page, res, err in run_concurrent(get_page, pages, workers=self.workers):
+            if err is not None:
+                raise err
+            items.extend(res.get(key, []))
+        self.requests += 1 + len(pages)
+        self.controller.app.log.debug("load %s %s with %s requests" % (len(items), key, 1 + len(pages)))
+        return items
+
+    def _key(self, oid) -> Optional[str]:
+        """normalize an entity id or uuid to the key used by the indexes"""
+        if oid is None:
+            return None
+        oid = str(oid)
+        return self.uuids.get(oid, oid)
+
+    def load_entities(self, container=None, objdef=None, **filters):
+        """load entities in bulk
+
+        :param container: container id, uuid or name [optional]
+        :param objdef: entity definition [optional]
+        :param filters: other list filters [optional]
+        """
+        for item in self.__get_all("%s/containers" % self.baseuri, "resourcecontainers", {}):
+            for key in [item.get("id"), item.get("uuid"), item.get("name")]:
+                if key is not None:
+                    self.container_names[str(key)] = item.get("name")
+
+        filters.update({"container": container, "type": objdef})
+        for entity in self.__get_all("%s/entities" % self.baseuri, "resources", filters):
+            key = str(entity["id"])
+            self.entities[key] = entity
+            self.uuids[entity.get("uuid")] = key
+            parent = entity.get("parent")
+            if parent is not None:
+                self.children_idx[str(parent)].append(key)
+        self.entities_loaded = True
+
+    def load_links(self, link_type=None, **filters):
+        """load links in bulk
+
+        :param link_type: link type [optional]
+        :param filters: other list filters [optional]
+        """
+        filters.update({"type": link_type})
+        for link in self.__get_all("%s/links" % self.baseuri, "resourcelinks", filters):
+            self.add_link(link)
+        self.links_loaded = True
+
+    def add_link(self, link: dict):
+        """add a link to the indexes. Use it to record a link created after the bulk load"""
+        self.links[str(link["id"])] = link
+        self.links_from_idx[self._key(dict_get(link, "details.start_resource"))].append(link)
+        self.links_to_idx[self._key(dict_get(link, "details.end_resource"))].append(link)
+
+    def entity(self, oid) -> Optional[dict]:
+        """get entity. Return None if it does not exist"""
+        if self.entities_loaded is True:
+            return self.entities.get(self._key(oid))
+        try:
+            self.requests += 1
+            return self.controller.cmp_get("%s/entities/%s" % (self.baseuri, oid)).get("resource")
+        except Exception:
+            return None
+
+    def exists(self, oid) -> bool:
+        return self.entity(oid) is not None
+
+    def children(self, oid) -> List[dict]:
+        """get entity direct children"""
+        return [self.entities[c] for c in self.children_idx.get(self._key(oid), [])]
+
+    def links_from(self, oid, link_type=None) -> List[dict]:
+        """get links starting from entity"""
+        return self.__filter_links(self.links_from_idx.get(self._key(oid), []), link_type)
+
+    def links_to(self, oid, link_type=None) -> List[dict]:
+        """get links ending to entity"""
+        return self.__filter_links(self.links_to_idx.get(self._key(oid), []), link_type)
+
+    @staticmethod
+    def __filter_links(links, link_type):
+        if link_type is None:
+            return links
+        return [link for link in links if dict_get(link, "details.type", default="").startswith(link_type)]
+
+    def count_links_to(self, oid, link_type=None) -> int:
+        """count links ending to entity"""
+        if self.links_loaded is True:
+            return len(self.links_to(oid, link_type=link_type))
+        self.requests += 1
+        data = {"end_resource": oid}
+        if link_type is not None:
+            data["type"] = link_type
+        return self.controller.cmp_get("%s/links" % self.baseuri, data=data).get("count", 0)
+
+    def __tree_node(self, entity, link=None, path=None) -> dict:
+        key = str(entity["id"])
+        if path is None:
+            path = set()
+        path = path | {key}
+        node = {
+            "id": entity.get("id"),
+            "uuid": entity.get("uuid"),
+            "name": entity.get("name"),
+            "type": dict_get(entity, "__meta__.definition"),
+            "ext_id": entity.get("ext_id"),
+            "state": entity.get("state"),
+            "container": entity.get("container"),
+            "container_name": self.container_names.get(str(entity.get("container")), entity.get("container")),
+            "attributes": entity.get("attributes", {}),
+            "__meta__": entity.get("__meta__", {}),
+            "children": [],
+        }
+        if link is not None:
+            # linked resources expose link id, type and attributes like the api resource tree
+            attributes = dict_get(link, "details.attributes", default={}) or {}
+            node["link"] = link.get("id")
+            node["relation"] = dict_get(link, "details.type")
+            node["attributes"] = attributes
+            node["reuse"] = attributes.get("reuse", False)
+
+        for child in self.children_idx.get(key, []):
+            if child not in path:
+                node["children"].append(self.__tree_node(self.entities[child], path=path))
+        for child_link in self.links_from_idx.get(key, []):
+            child = self.entities.get(self._key(dict_get(child_link, "details.end_resource")))
+            if child is not None and str(child["id"]) not in path:
+                node["children"].append(self.__tree_node(child, link=child_link, path=path))
+        return node
+
+    def tree(self, oid) -> dict:
+        """get entity tree with the same structure returned by the api resource tree"""
+        if self.entities_loaded is False or self.links_loaded is False:
+            self.requests += 1
+            return self.controller.cmp_get("%s/entities/%s/tree" % (self.baseuri, oid), data="").get("resourcetree", {})
+        entity = self.entity(oid)
+        if entity is None:
+            return {}
+        return self.__tree_node(entity)
@@ -0,0 +1,155 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from os.path import exists
+from sqlite3 import connect, Row
+from time import time, gmtime, strftime
+from json import dumps, loads
+from typing import List, Optional, Set
+from beecell.simple import dict_get
+
+
+class DqResultStore(object):
+    """Local data quality result store. Findings are indexed by id in a sqlite file, so lookups and inserts do not
+    depend on the number of findings already stored. Every scan is recorded together with the ids it has already
+    checked, which makes an interrupted scan resumable and gives a reference time for incremental scans.
+
+    :param path: sqlite file path
+    :param legacy_path: json file of the previous tinydb store. Its bad items are imported when the sqlite file is
+        created [optional]
+    :param legacy_table: table of the tinydb store with the bad items [default=resources]
+    """
+
+    def __init__(self, path, legacy_path=None, legacy_table="resources"):
+        self.path = path
+        created = exists(path) is False
+        self.conn = connect(path)
+        self.conn.row_factory = Row
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS bad (
+                id INTEGER PRIMARY KEY,
+                definition TEXT,
+                state TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS bad_definition ON bad (definition);
+            CREATE TABLE IF NOT EXISTS scans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query TEXT NOT NULL,
+                started TEXT NOT NULL,
+                finished TEXT
+            );
+            CREATE INDEX IF NOT EXISTS scans_query ON scans (query);
+            CREATE TABLE IF NOT EXISTS scan_items (
+                scan_id INTEGER NOT NULL,
+                id INTEGER NOT NULL,
+                state TEXT,
+                PRIMARY KEY (scan_id, id)
+            );
+            """
+        )
+        self.conn.commit()
+        if created is True and legacy_path is not None and exists(legacy_path) is True:
+            self.import_legacy(legacy_path, table=legacy_table)
+
+    def import_legacy(self, legacy_path: str, table: str = "resources") -> int:
+        """import the bad items of a tinydb json store. Items are stored by tinydb in a table as
+        {"<table>": {"<doc id>": item}}
+
+        :param legacy_path: json file of the tinydb store
+        :param table: tinydb table [default=resources]
+        :return: number of imported items
+        """
+        with open(legacy_path, "r") as f:
+            data = loads(f.read() or "{}")
+        items = list((data.get(table) or {}).values())
+        for item in items:
+            self.add_bad(item, commit=False)
+        self.conn.commit()
+        return len(items)
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def now() -> str:
+        """utc timestamp with the same format used by api dates"""
+        return strftime("%Y-%m-%dT%H:%M:%SZ", gmtime(time()))
+
+    #
+    # bad items
+    #
+    def add_bad(self, item: dict, commit=True):
+        """insert or replace a bad item"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO bad (id, definition, state, data) VALUES (?, ?, ?, ?)",
+            (item["id"], dict_get(item, "__meta__.definition"), item.get("state"), dumps(item)),
+        )
+        if commit is True:
+            self.conn.commit()
+
+    def remove_bad(self, oid: int, commit=True):
+        """remove a bad item if present"""
+        self.conn.execute("DELETE FROM bad WHERE id = ?", (oid,))
+        if commit is True:
+            self.conn.commit()
+
+    def get_bad(self, oid: int = None, definition: str = None) -> List[dict]:
+        """get bad items filtered by id or definition"""
+        if oid is not None:
+            rows = self.conn.execute("SELECT data FROM bad WHERE id = ?", (oid,))
+        elif definition is not None:
+            rows = self.conn.execute("SELECT data FROM bad WHERE definition = ? ORDER BY id", (definition,))
+        else:
+            rows = self.conn.execute("SELECT data FROM bad ORDER BY id")
+        return [loads(row["data"]) for row in rows]
+
+    #
+    # scans
+    #
+    def start_scan(self, query: str, resume: bool = False) -> int:
+        """start a new scan. If resume is True reuse the last unfinished scan with the same query
+
+        :param query: normalized scan query used as scan key
+        :param resume: if True resume last unfinished scan
+        :return: scan id
+        """
+        if resume is True:
+            row = self.conn.execute(
+                "SELECT id FROM scans WHERE query = ? AND finished IS NULL ORDER BY id DESC LIMIT 1", (query,)
+            ).fetchone()
+            if row is not None:
+                return row["id"]
+        cur = self.conn.execute("INSERT INTO scans (query, started) VALUES (?, ?)", (query, self.now()))
+        self.conn.commit()
+        return cur.lastrowid
+
+    def finish_scan(self, scan_id: int):
+        self.conn.execute("UPDATE scans SET finished = ? WHERE id = ?", (self.now(), scan_id))
+        self.conn.commit()
+
+    def last_finished_scan(self, query: str) -> Optional[str]:
+        """get start time of the last finished scan with the same query"""
+        row = self.conn.execute(
+            "SELECT started FROM scans WHERE query = ? AND finished IS NOT NULL ORDER BY id DESC LIMIT 1", (query,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row["started"]
+
+    def checked_ids(self, scan_id: int) -> Set[int]:
+        """get ids already checked by a scan"""
+        rows = self.conn.execute("SELECT id FROM scan_items WHERE scan_id = ?", (scan_id,))
+        return {row["id"] for row in rows}
+
+    def add_checked(self, scan_id: int, oid: int, state: str, commit=True):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO scan_items (scan_id, id, state) VALUES (?, ?, ?)", (scan_id, oid, state)
+        )
+        if commit is True:
+            self.conn.commit()
+
+    def commit(self):
+        self.conn.commit()
@@ -5,6 +5,7 @@
 from logging import getLogger
 from urllib.parse import urlencode
 from datetime import datetime
+from uuid import uuid4
 from six import string_types
 from requests import get as req_get
 from cement.ext.ext_argparse import ex
@@ -16,10 +17,53 @@ from beecell.simple import jsonDumps
 from beedrones.openstack.client import OpenstackManager
 from beedrones.trilio.client import TrilioManager
 from beedrones.zabbix.client import ZabbixManager
+from beehive3_cli.plugins.metrics.util.sqlwriter import BatchedSqlWriter, parse_date
+from beehive3_cli.plugins.metrics.util.upsert import MetricBulkUpsert
 
 
 logger = getLogger(__name__)
 
+UPSERT_ARGS = [
+    (
+        ["-workers"],
+        {
+            "help": "number of concurrent metric requests [default=10]",
+            "action": "store",
+            "type": int,
+            "default": 10,
+        },
+    ),
+    (
+        ["-batch"],
+        {
+            "help": "number of metrics written by every batch [default=100]",
+            "action": "store",
+            "type": int,
+            "default": 100,
+        },
+    ),
+    (
+        ["-dry-run"],
+        {
+            "help": "show the metric changes without writing them",
+            "action": "store_true",
+            "dest": "dry_run",
+        },
+    ),
+]
+
+SQL_BATCH_ARGS = [
+    (
+        ["-batch"],
+        {
+            "help": "number of rows written by every transaction [default=500]",
+            "action": "store",
+            "type": int,
+            "default": 500,
+        },
+    ),
+]
+
 
 class MetricsBaseController(BaseController):
     class Meta:
@@ -185,10 +229,13 @@ class MetricsController(MetricsBaseController):
                         "default": None,
                     },
                 ),
-            ]
+            ],
+            UPSERT_ARGS,
         ),
     )
     def add_bck_metrics(self):
+        """Add or replace the backup metrics of the accounts. Metrics are computed locally and only the changed
+        ones are written"""
         oid = getattr(self.app.pargs, "id", None)
 
         czs = self.get_compute_zones()
@@ -216,35 +263,30 @@ class MetricsController(MetricsBaseController):
                     "veeam_used_capacity": veeam_usage.get(cz_id, {}),
                 }
 
-        accounts = accounts.values()
-        for a in accounts:
-            try:
-                print("add or replace metrics for account %s %s" % (a.get("uuid"), a.get("name")))
-                service_id = a.get("compute_service", {}).get("id", None)
-                trilio_used_capacity = dict_get(a, "compute_service.trilio_used_capacity.tot")
-                veeam_used_capacity = dict_get(a, "compute_service.veeam_used_capacity.tot")
-
-                # now = datetime.today().date()
-                # date = '%sT00:00:00Z' % str(now)
-                date = datetime.today().strftime("%Y-%m-%dT%H:%M:%SZ")
-                print("===========================%s" % date)
-
-                os_metrictype = "vm_backup_os1"
-                if trilio_used_capacity is not None and trilio_used_capacity > 500:
-                    os_metrictype = "vm_backup_os2"
-                if service_id is not None and trilio_used_capacity is not None:
-                    self.add_or_replace_metric(service_id, trilio_used_capacity, os_metrictype, date)
-                if service_id is not None and veeam_used_capacity is not None:
-                    self.add_or_replace_metric(service_id, veeam_used_capacity, "vm_backup_com", date)
-            except Exception as ex:
-                logger.warning(ex, exc_info=True)
-                print("==============ERR")
-                print(ex)
+        # now = datetime.today().date()
+        # date = '%sT00:00:00Z' % str(now)
+        date = datetime.today().strftime("%Y-%m-%dT%H:%M:%SZ")
+        print("===========================%s" % date)
+
+        upsert = self.get_metric_upsert()
+        for a in accounts.values():
+            service_id = a.get("compute_service", {}).get("id", None)
+            trilio_used_capacity = dict_get(a, "compute_service.trilio_used_capacity.tot")
+            veeam_used_capacity = dict_get(a, "compute_service.veeam_used_capacity.tot")
+
+            os_metrictype = "vm_backup_os1"
+            if trilio_used_capacity is not None and trilio_used_capacity > 500:
+                os_metrictype = "vm_backup_os2"
+            if service_id is not None and trilio_used_capacity is not None:
+                upsert.add(service_id, os_metrictype, trilio_used_capacity, date)
+            if service_id is not None and veeam_used_capacity is not None:
+                upsert.add(service_id, "vm_backup_com", veeam_used_capacity, date)
+        self.run_metric_upsert(upsert)
 
     @ex(
         help="monitoring metrics",
         description="Create monitoring metrics",
-        arguments=PARGS([]),
+        arguments=PARGS(UPSERT_ARGS),
     )
     def add_monit_metrics(self):
         """
@@ -259,9 +301,10 @@ class MetricsController(MetricsBaseController):
         print("===========================%s" % metricsdate)
         usage_list = self.get_monit_list()
 
+        upsert = self.get_metric_upsert()
         for item in usage_list:
-            self.add_or_replace_metric(item["compute_service_id"], item["monit_hosts"], "vm_monit", metricsdate)
-            pass
+            upsert.add(item["compute_service_id"], "vm_monit", item["monit_hosts"], metricsdate)
+        self.run_metric_upsert(upsert)
 
     @ex(
         help="get monitoring metrics",
@@ -286,7 +329,7 @@ class MetricsController(MetricsBaseController):
             fields=self._meta.monit_headers_fields,
         )
 
-    @ex(help="update-volumes", description="update-volumes", arguments=PARGS([]))
+    @ex(help="update-volumes", description="update-volumes", arguments=PARGS(SQL_BATCH_ARGS))
     def add_volumes_info(self):
         """estrai dati circa i volumi e li carica nelle strutture temporanee di gestione dei volumi.
         N.B. idempotente
@@ -297,10 +340,13 @@ class MetricsController(MetricsBaseController):
 
         server.create_simple_engine()
 
+        connection = None
         try:
             connection = server.engine.connect()
-            for item in vols:
-                self.add_or_update_volume_item(connection, item)
+            with self.get_volume_writer(connection) as writer:
+                for item in vols:
+                    self.add_or_update_volume_item(writer, item)
+            print("volumes: %s" % writer.stats)
         except Exception as ex:
             logger.warning(ex, exc_info=True)
             print(ex)
@@ -309,7 +355,7 @@ class MetricsController(MetricsBaseController):
                 self.finalize_volumes_update(connection)
                 connection.close()
 
-    @ex(help="update-oracle", description="update-oracle", arguments=PARGS([]))
+    @ex(help="update-oracle", description="update-oracle", arguments=PARGS(SQL_BATCH_ARGS))
     def add_oracle_info(self):
         """estrai dati circa i database oracle e li carica nelle strutture temporanee di gestione dei db.
         N.B. idempotente
@@ -319,10 +365,13 @@ class MetricsController(MetricsBaseController):
         server = self.get_db_connection()
         server.create_simple_engine()
 
+        connection = None
         try:
             connection = server.engine.connect()
-            for item in dbs:
-                self.add_or_update_ora_dbitem(connection, item)
+            with self.get_ora_db_writer(connection) as writer:
+                for item in dbs:
+                    self.add_or_update_ora_dbitem(writer, item)
+            print("oracle dbs: %s" % writer.stats)
         except Exception as ex:
             logger.warning(ex, exc_info=True)
             print(ex)
@@ -515,6 +564,28 @@ class MetricsController(MetricsBaseController):
         else:
             return None
 
+    def get_metric_upsert(self):
+        """get a bulk metric upsert configured with the command arguments"""
+        return MetricBulkUpsert(
+            self, self.metrictypes, workers=self.app.pargs.workers, batch=max(self.app.pargs.batch, 1)
+        )
+
+    def run_metric_upsert(self, upsert):
+        """write the changed metrics of a bulk metric upsert and render a summary"""
+        items = upsert.run(dry_run=self.app.pargs.dry_run)
+        headers = ["service", "type", "date", "value", "current", "action", "status", "error"]
+        fields = ["service_id", "metric_type", "date", "value", "current.value", "action", "status", "error"]
+        changed = [i for i in items if i["action"] != "unchanged"]
+        self.app.render(changed, headers=headers, fields=fields, maxsize=80)
+        failed = len([i for i in changed if i["status"] == "FAILURE"])
+        if self.is_output_text():
+            print(
+                "%s metrics: %s unchanged, %s changed, %s failed"
+                % (len(items), len(items) - len(changed), len(changed), failed)
+            )
+        if failed > 0:
+            self.app.exit_code = 1
+
     def add_or_replace_metric(self, service_id, value, metrictype, date):
         print("==== ADDING %s to service %s value %s " % (metrictype, service_id, value))
         metrictype_id = self.metrictypes.get(metrictype).get("id")
@@ -662,107 +733,67 @@ class MetricsController(MetricsBaseController):
         server = MysqlManager(1, db_uri)
         return server
 
-    def add_or_update_volume_item(self, dbconn, voldesc):
-        selectsqlstmnt = """SELECT
-            id,
-            date_format(creation_date,'%%Y-%%m-%%dT%%TZ' ) creation_date ,
-            date_format(modification_date,'%%Y-%%m-%%dT%%TZ') modification_date
-            from service.tmp_volumes_
-            where resource_uuid  = '{resource_uuid}' """
-        updatesqlstmnt = """UPDATE  service.tmp_volumes_  set
-            modification_date = str_to_date('{modified_date}','%%Y-%%m-%%dT%%TZ'),
-            `desc` = '{desc}',
-            name = '{name}',
-            params = '{params}',
-            instance_resource_uuid = '{instance_resource_uuid}',
-            instance_uuid = null,
-            status = '{state}',
-            size = '{size}',
-            container = '{container_name}'
-           where id = {id}"""
-        insertsqlstmnt = """INSERT INTO service.tmp_volumes_ (
-            creation_date, modification_date, uuid, objid,
-            `desc`, name, fk_service_definition_id, params,
-            resource_uuid, instance_resource_uuid, instance_uuid,
-            status, size, container ) VALUES (
-            str_to_date('{creation_date}','%%Y-%%m-%%dT%%TZ'),
-            str_to_date('{modified_date}','%%Y-%%m-%%dT%%TZ'),
-            uuid(), '', '{desc}', '{name}',  72,
-            '{params}', '{resource_uuid}', '{instance_resource_uuid}', null,
-            '{state}', '{size}', '{container_name}')"""
+    def get_volume_writer(self, dbconn, table="service.tmp_volumes_"):
+        """get the batched writer of the volumes temporary table"""
+        return BatchedSqlWriter(
+            dbconn,
+            table,
+            key="resource_uuid",
+            columns=[
+                "creation_date",
+                "modification_date",
+                "uuid",
+                "objid",
+                "desc",
+                "name",
+                "fk_service_definition_id",
+                "params",
+                "resource_uuid",
+                "instance_resource_uuid",
+                "instance_uuid",
+                "status",
+                "size",
+                "container",
+            ],
+            update_columns=[
+                "modification_date",
+                "desc",
+                "name",
+                "params",
+                "instance_resource_uuid",
+                "instance_uuid",
+                "status",
+                "size",
+                "container",
+            ],
+            compare="modification_date",
+            batch=getattr(self.app.pargs, "batch", 500),
+        )
 
+    def add_or_update_volume_item(self, writer, voldesc):
+        """add a volume to the batched writer of the volumes temporary table. The volume is inserted if it does not
+        exist and updated if its modification date changed"""
         resource_uuid = voldesc.get("uuid", None)
-        modified_date = voldesc.get("date", {}).get("modified", None)
-
-        if resource_uuid is not None:
-            res = None
-            try:
-                sqlstmnt = selectsqlstmnt.format(resource_uuid=resource_uuid)
-                # print(sqlstmnt)
-                res = dbconn.execute(sqlstmnt)
-                row = res.fetchone()
-                if row is None:
-                    creation_date = voldesc.get("date", {}).get("creation", None)
-                    instance_resource_uuid = voldesc.get("instance", {}).get("uuid", None)
-                    name = voldesc.get("name", None)
-                    desc = voldesc.get("desc", None)
-                    state = voldesc.get("state", None)
-                    size = voldesc.get("size", None)
-                    container_name = voldesc.get("container", {}).get("name", None)
-                    params = sqlquote(jsonDumps(voldesc, ensure_ascii=False))
-
-                    sqlstmnt = insertsqlstmnt.format(
-                        resource_uuid=resource_uuid,
-                        creation_date=creation_date,
-                        modified_date=modified_date,
-                        instance_resource_uuid=instance_resource_uuid,
-                        name=name,
-                        desc=desc,
-                        size=size,
-                        state=state,
-                        container_name=container_name,
-                        params=params,
-                    )
-                    print("inserting volume resource_uuid: {resource_uuid}".format(resource_uuid=resource_uuid))
-                    # print(sqlstmnt)
-                    dbconn.execute(sqlstmnt)
-                elif row["modification_date"] != modified_date:
-                    instance_resource_uuid = voldesc.get("instance", {}).get("uuid", None)
-                    name = voldesc.get("name", None)
-                    desc = voldesc.get("desc", None)
-                    state = voldesc.get("state", None)
-                    size = voldesc.get("size", None)
-                    container_name = voldesc.get("container", {}).get("name", None)
-                    params = sqlquote(jsonDumps(voldesc, ensure_ascii=False))
-
-                    sqlstmnt = updatesqlstmnt.format(
-                        id=row["id"],
-                        resource_uuid=resource_uuid,
-                        modified_date=modified_date,
-                        instance_resource_uuid=instance_resource_uuid,
-                        name=name,
-                        desc=desc,
-                        size=size,
-                        state=state,
-                        container_name=container_name,
-                        params=params,
-                    )
-                    print("updating volume resource_uuid: {resource_uuid}".format(resource_uuid=resource_uuid))
-                    # print(sqlstmnt)
-                    dbconn.execute(sqlstmnt)
-                else:
-                    print(
-                        "Volume resource_uuid: {resource_uuid} already up to date".format(resource_uuid=resource_uuid)
-                    )
-
-                res.close()
-            except Exception as ex:
-                logger.warning(ex, exc_info=True)
-                print(ex)
-                if res:
-                    res.close()
-            finally:
-                pass
+        if resource_uuid is None:
+            return
+        writer.add(
+            {
+                "creation_date": parse_date(voldesc.get("date", {}).get("creation", None)),
+                "modification_date": parse_date(voldesc.get("date", {}).get("modified", None)),
+                "uuid": str(uuid4()),
+                "objid": "",
+                "desc": voldesc.get("desc", None),
+                "name": voldesc.get("name", None),
+                "fk_service_definition_id": 72,
+                "params": jsonDumps(voldesc, ensure_ascii=False),
+                "resource_uuid": resource_uuid,
+                "instance_resource_uuid": voldesc.get("instance", {}).get("uuid", None),
+                "instance_uuid": None,
+                "status": voldesc.get("state", None),
+                "size": voldesc.get("size", None),
+                "container": voldesc.get("container", {}).get("name", None),
+            }
+        )
 
     def finalize_volumes_update(self, dbconn):
         """esegue le elaborazioni sicessive al caricamento delle info sui volumi"""
@@ -866,70 +897,34 @@ class MetricsController(MetricsBaseController):
         print("get service instances: %s" % len(res))
         return res
 
-    def add_or_update_ora_dbitem(self, dbconn, dbdesc):
-        getsqlstmnt = """SELECT
-            id,
-            date_format(creation_date,'%%Y-%%m-%%dT%%TZ' ) creation_date ,
-            date_format(modification_date,'%%Y-%%m-%%dT%%TZ') modification_date
-            from service.tmp_databases_
-            where resource_uuid  = '{resource_uuid}' """
-        updatesqlstmnt = """UPDATE  service.tmp_databases_  set
-            params ='{jsondescription}' ,
-            modification_date = str_to_date('{date_modified}','%%Y-%%m-%%dT%%TZ')
-            where id = {id}"""
-        insertsqlstmnt = """INSERT INTO service.tmp_databases_
-            (creation_date, modification_date, uuid, resource_uuid, dbtype, params)
-            VALUES(
-                str_to_date('{date_created}','%%Y-%%m-%%dT%%TZ'),
-                str_to_date('{date_modified}','%%Y-%%m-%%dT%%TZ'),
-                NULL,
-                '{resource_uuid}',
-                'ORACLE', '{jsondescription}') """
+    def get_ora_db_writer(self, dbconn, table="service.tmp_databases_"):
+        """get the batched writer of the databases temporary table"""
+        return BatchedSqlWriter(
+            dbconn,
+            table,
+            key="resource_uuid",
+            columns=["creation_date", "modification_date", "uuid", "resource_uuid", "dbtype", "params"],
+            update_columns=["params", "modification_date"],
+            compare="modification_date",
+            batch=getattr(self.app.pargs, "batch", 500),
+        )
 
+    def add_or_update_ora_dbitem(self, writer, dbdesc):
+        """add an oracle db to the batched writer of the databases temporary table. The db is inserted if it does
+        not exist and updated if its modification date changed"""
         uuid = dbdesc.get("uuid", None)
-        creation_date = dbdesc.get("date", {}).get("creation", None)
-        modified_date = dbdesc.get("date", {}).get("modified", None)
-        if uuid is not None:
-            # trans = None
-            res = None
-            try:
-                # trans = dbconn.begin()
-                sqlstmnt = getsqlstmnt.format(resource_uuid=uuid)
-                # print(sqlstmnt)
-                res = dbconn.execute(sqlstmnt)
-                row = res.fetchone()
-                if row is None:
-                    sqlstmnt = insertsqlstmnt.format(
-                        resource_uuid=uuid,
-                        date_created=creation_date,
-                        date_modified=modified_date,
-                        jsondescription=sqlquote(jsonDumps(dbdesc, ensure_ascii=False)),
-                    )
-                    print("inserting db ORACLE resource_uuid: {resource_uuid}".format(resource_uuid=uuid))
-                    # print(sqlstmnt)
-                    dbconn.execute(sqlstmnt)
-                elif row["modification_date"] != modified_date:
-                    sqlstmnt = updatesqlstmnt.format(
-                        id=row["id"],
-                        date_modified=modified_date,
-                        jsondescription=sqlquote(jsonDumps(dbdesc, ensure_ascii=False)),
-                    )
-                    print("updating db ORACLE resource_uuid: {resource_uuid}".format(resource_uuid=uuid))
-                    # print(sqlstmnt)
-                    dbconn.execute(sqlstmnt)
-                else:
-                    print("db ORACLE resource_uuid: {resource_uuid} already up to date".format(resource_uuid=uuid))
-
-                res.close()
-            except Exception as ex:
-                logger.warning(ex, exc_info=True)
-                print(ex)
-                if res:
-                    res.close()
-            finally:
-                pass
-                # if trans:
-                #     trans.commit()
+        if uuid is None:
+            return
+        writer.add(
+            {
+                "creation_date": parse_date(dbdesc.get("date", {}).get("creation", None)),
+                "modification_date": parse_date(dbdesc.get("date", {}).get("modified", None)),
+                "uuid": None,
+                "resource_uuid": uuid,
+                "dbtype": "ORACLE",
+                "params": jsonDumps(dbdesc, ensure_ascii=False),
+            }
+        )
 
     def get_oracle_usage(self):
         dbs = {d["uuid"]: d for d in self.get_oracle_dbs()}
@@ -954,7 +949,3 @@ class MetricsController(MetricsBaseController):
             }
             resp.append(item)
         return resp
-
-
-def sqlquote(statement):
-    return statement.replace("'", "''").replace("%", "%%")
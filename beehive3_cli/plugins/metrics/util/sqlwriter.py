@@ -0,0 +1,178 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from datetime import datetime
+from logging import getLogger
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, text
+
+logger = getLogger(__name__)
+
+
+def parse_date(value) -> Optional[datetime]:
+    """parse an api date like 2024-01-31T10:20:30Z. Return None if value is empty"""
+    if value is None or isinstance(value, datetime):
+        return value
+    value = str(value).replace(" ", "T")
+    if value == "":
+        return None
+    return datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S")
+
+
+def format_date(value) -> Optional[str]:
+    """format a date read from the database or from the api as 2024-01-31T10:20:30Z"""
+    value = parse_date(value)
+    if value is None:
+        return None
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class BatchedSqlWriter(object):
+    """Insert or update many rows of a table with few statements. Rows are collected and flushed every batch rows:
+    the rows already in the table are read with a single select on the key column, new rows are inserted with a
+    single multi row insert and the changed rows are updated with one executemany. Every batch runs in its own
+    transaction and all the values are bound parameters. When a batch fails its rows are written one at a time.
+
+    Use it as a context manager, so that the last batch is flushed when the writer is closed.
+
+    :param conn: sqlalchemy connection
+    :param table: table name. Ex. service.tmp_volumes_
+    :param key: key column used to find the rows already in the table. Ex. resource_uuid
+    :param columns: columns written by insert
+    :param update_columns: columns written by update. If None rows already in the table are not updated [optional]
+    :param compare: column compared to decide if a row changed. If None rows already in the table are always
+        updated [optional]
+    :param batch: number of rows of every batch [default=500]
+    """
+
+    def __init__(
+        self,
+        conn,
+        table: str,
+        key: str,
+        columns: List[str],
+        update_columns: List[str] = None,
+        compare: str = None,
+        batch: int = 500,
+    ):
+        self.conn = conn
+        self.table = table
+        self.key = key
+        self.columns = columns
+        self.update_columns = update_columns
+        self.compare = compare
+        self.batch = max(batch, 1)
+        self.rows = []
+        self.stats = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def quote(self, name: str) -> str:
+        preparer = self.conn.dialect.identifier_preparer
+        return ".".join(preparer.quote(n) for n in name.split("."))
+
+    def add(self, row: Dict):
+        """add a row. The batch is flushed when it is full"""
+        self.rows.append(row)
+        if len(self.rows) >= self.batch:
+            self.flush()
+
+    def __read_current(self, keys: List) -> Dict:
+        columns = [self.key, self.compare] if self.compare is not None else [self.key]
+        stmt = text(
+            "SELECT %s FROM %s WHERE %s IN :keys"
+            % (", ".join(self.quote(c) for c in columns), self.quote(self.table), self.quote(self.key))
+        ).bindparams(bindparam("keys", expanding=True))
+        res = self.conn.execute(stmt, {"keys": keys})
+        return {row[0]: row[1] if self.compare is not None else None for row in res.fetchall()}
+
+    def __insert(self, rows: List[Dict]):
+        values = []
+        params = {}
+        for idx, row in enumerate(rows):
+            names = []
+            for pos, column in enumerate(self.columns):
+                name = "p%s_%s" % (idx, pos)
+                params[name] = row.get(column)
+                names.append(":%s" % name)
+            values.append("(%s)" % ", ".join(names))
+        stmt = "INSERT INTO %s (%s) VALUES %s" % (
+            self.quote(self.table),
+            ", ".join(self.quote(c) for c in self.columns),
+            ", ".join(values),
+        )
+        self.conn.execute(text(stmt), params)
+
+    def __update(self, rows: List[Dict]):
+        stmt = "UPDATE %s SET %s WHERE %s = :key_" % (
+            self.quote(self.table),
+            ", ".join("%s = :%s" % (self.quote(c), "p%s" % pos) for pos, c in enumerate(self.update_columns)),
+            self.quote(self.key),
+        )
+        params = []
+        for row in rows:
+            item = {"p%s" % pos: row.get(c) for pos, c in enumerate(self.update_columns)}
+            item["key_"] = row[self.key]
+            params.append(item)
+        self.conn.execute(text(stmt), params)
+
+    def __changed(self, row: Dict, current) -> bool:
+        if self.compare is None:
+            return True
+        value = row.get(self.compare)
+        if isinstance(value, datetime) or isinstance(current, datetime):
+            return format_date(value) != format_date(current)
+        return value != current
+
+    def __write(self, rows: Dict) -> Tuple[int, int]:
+        """write rows in a single transaction. Return the number of inserted and updated rows"""
+        with self.conn.begin():
+            current = self.__read_current(list(rows.keys()))
+            inserts = [row for key, row in rows.items() if key not in current]
+            updates = []
+            if self.update_columns is not None:
+                updates = [row for key, row in rows.items() if key in current and self.__changed(row, current[key])]
+            if len(inserts) > 0:
+                self.__insert(inserts)
+            if len(updates) > 0:
+                self.__update(updates)
+        return len(inserts), len(updates)
+
+    def flush(self):
+        """write the collected rows in a single transaction. If the transaction fails the rows of the batch are
+        written again one at a time, so only the rows that really fail are counted as failed"""
+        rows = {}
+        for row in self.rows:
+            rows[row[self.key]] = row
+        self.rows = []
+        if len(rows) == 0:
+            return
+
+        try:
+            inserted, updated = self.__write(rows)
+            written = len(rows)
+        except Exception as ex:
+            logger.warning("write of %s rows in %s failed, retry one row at a time: %s" % (len(rows), self.table, ex))
+            inserted = updated = written = 0
+            for key, row in rows.items():
+                try:
+                    row_inserted, row_updated = self.__write({key: row})
+                    inserted += row_inserted
+                    updated += row_updated
+                    written += 1
+                except Exception as ex:
+                    self.stats["failed"] += 1
+                    logger.warning("write of row %s in %s failed: %s" % (key, self.table, ex), exc_info=True)
+        self.stats["inserted"] += inserted
+        self.stats["updated"] += updated
+        self.stats["unchanged"] += written - inserted - updated
+        logger.debug("%s: %s inserted, %s updated" % (self.table, inserted, updated))
+
+    def close(self):
+        """flush the last batch"""
+        self.flush()
@@ -0,0 +1,138 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from logging import getLogger
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+from beehive3_cli.core.util import chunks, run_concurrent
+
+logger = getLogger(__name__)
+
+
+def same_value(a, b) -> bool:
+    """compare two metric values as numbers when possible"""
+    try:
+        return float(a) == float(b)
+    except (TypeError, ValueError):
+        return str(a) == str(b)
+
+
+class MetricBulkUpsert(object):
+    """Add or replace many service metrics with few requests. The desired metrics are collected locally, the
+    current metrics of every metric type and date are read with one list request and only the changed metrics are
+    written: a metric with the same value is left as it is, a metric with a different value is deleted and added
+    again, a missing metric is added. Writes run concurrently in batches.
+
+    :param controller: metrics controller configured with the service api
+    :param metrictypes: dict {metric type name: metric type}
+    :param workers: number of concurrent requests [default=10]
+    :param batch: number of metrics written by every batch [default=100]
+    """
+
+    def __init__(self, controller, metrictypes: Dict[str, dict], workers: int = 10, batch: int = 100):
+        self.controller = controller
+        self.metrictypes = metrictypes
+        self.workers = workers
+        self.batch = batch
+        self.desired = {}
+
+    @property
+    def uri(self) -> str:
+        return "%s/services/metrics" % self.controller.baseuri
+
+    def add(self, service_id, metrictype: str, value, date: str):
+        """add a desired metric. A later metric with the same service, type and date replaces it"""
+        if metrictype not in self.metrictypes:
+            raise Exception("metric type %s does not exist" % metrictype)
+        self.desired[(str(service_id), metrictype, date)] = value
+
+    def __list_current(self, metrictype: str, date: str) -> Dict[Tuple[str, str, str], dict]:
+        data = urlencode({"metric_type": metrictype, "creation_date": date, "size": -1})
+        res = self.controller.cmp_get(self.uri, data=data)
+        metrics = res.get("metrics", [])
+        # a paged or truncated list would make existing metrics look missing and add them again
+        total = res.get("total", None)
+        if total is None or len(metrics) != total:
+            raise Exception("list returned %s of %s metrics" % (len(metrics), total))
+        return {(str(m.get("service_instance_id")), metrictype, date): m for m in metrics}
+
+    def __get_current(self, key: Tuple[str, str, str]) -> Optional[dict]:
+        return self.controller.get_metric(key[0], key[1], key[2])
+
+    def read_current(self) -> Dict[Tuple[str, str, str], dict]:
+        """read the current metrics of the desired metric types and dates. One list request is made for every
+        metric type and date, when it fails or it does not return all the metrics the metrics are read one by
+        one"""
+        current = {}
+        groups = {(k[1], k[2]) for k in self.desired.keys()}
+        for group, metrics, err in run_concurrent(lambda g: self.__list_current(*g), groups, workers=self.workers):
+            if err is None:
+                current.update(metrics)
+                continue
+            logger.warning("bulk read of metrics %s failed, read one by one: %s" % (group, err))
+            keys = [k for k in self.desired.keys() if (k[1], k[2]) == group]
+            for key, metric, err2 in run_concurrent(self.__get_current, keys, workers=self.workers):
+                if err2 is not None:
+                    raise err2
+                if metric is not None:
+                    current[key] = metric
+        return current
+
+    def diff(self, current: Dict[Tuple[str, str, str], dict]) -> List[dict]:
+        """compare the desired metrics with the current ones
+
+        :return: list of {"service_id":.., "metric_type":.., "date":.., "value":.., "current":.., "action":..}.
+            action is unchanged, add or replace
+        """
+        res = []
+        for key, value in self.desired.items():
+            metric = current.get(key)
+            action = "add"
+            if metric is not None:
+                action = "unchanged" if same_value(metric.get("value"), value) else "replace"
+            res.append(
+                {
+                    "service_id": key[0],
+                    "metric_type": key[1],
+                    "date": key[2],
+                    "value": value,
+                    "current": metric,
+                    "action": action,
+                }
+            )
+        return res
+
+    def write(self, item: dict):
+        """write a changed metric"""
+        if item["action"] == "replace":
+            data = {
+                "metric": {
+                    "metric_oid": str(item["current"].get("id")),
+                    "service_instance_oid": item["service_id"],
+                }
+            }
+            self.controller.cmp_delete(self.uri, data=data, confirm=False, output=False)
+        metrictype_id = self.metrictypes[item["metric_type"]].get("id")
+        self.controller.add_metric(metrictype_id, item["value"], item["service_id"], item["date"])
+
+    def run(self, dry_run: bool = False) -> List[dict]:
+        """read the current metrics and write the changed ones
+
+        :param dry_run: if True compute the changes without writing them [default=False]
+        :return: diff items with status SUCCESS, FAILURE or SKIP and error
+        """
+        items = self.diff(self.read_current())
+        changed = []
+        for item in items:
+            item.update({"status": "SKIP", "error": None})
+            if item["action"] != "unchanged" and dry_run is False:
+                changed.append(item)
+
+        for idx, batch in enumerate(chunks(changed, self.batch)):
+            for item, res, err in run_concurrent(self.write, batch, workers=self.workers):
+                item["status"], item["error"] = "SUCCESS", None
+                if err is not None:
+                    item["status"], item["error"] = "FAILURE", str(err)
+            logger.info("metric upsert batch %s: %s metrics written" % (idx, len(batch)))
+        return items
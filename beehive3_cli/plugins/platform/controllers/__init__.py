@@ -11,6 +11,7 @@ from beecell.types.type_string import str2bool, truncate
 from beecell.types.type_list import merge_list
 from beehive3_cli.core.controller import BaseController, BASE_ARGS
 from beehive3_cli.core.util import load_environment_config
+from beehive3_cli.core.log import LazyFormat
 
 
 def PLATFORM_ARGS(*list_args):
@@ -212,7 +213,7 @@ class ChildPlatformController(BaseController):
 
         # res = es.search(index=index, body=body, from_=page, size=size, sort=sort)
         res = elasticsearch.search(index=index, from_=page, size=size, sort=sort, query=query)
-        self.app.log.debug("_query - query result: %s" % truncate(res, size=10000))
+        self.app.log.debug("_query - query result: %s", LazyFormat(truncate, res, size=10000))
 
         hits = res.get("hits", {})
         values = []
@@ -2,13 +2,21 @@
 #
 # (C) Copyright 2018-2024 CSI-Piemonte
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from beecell.simple import str2bool
 from beehive3_cli.core.controller import PAGINATION_ARGS
+from beehive3_cli.core.util import open_local_store
 from beehive3_cli.plugins.platform.controllers import (
     ChildPlatformController,
     PLATFORM_ARGS,
 )
+from beehive3_cli.plugins.platform.util.dfwlog import (
+    DfwLogAnalyzer,
+    DfwLogCache,
+    dfw_query,
+    parse_dfw_message,
+    scan_hits,
+)
 from cement import ex
 
 
@@ -43,6 +51,13 @@ class FirewallLogController(ChildPlatformController):
     def get_current_elastic_index(self):
         return "*-filebeat-7.10.0-%s-infr_nivola" % datetime.now().strftime("%Y.%m.%d")
 
+    def get_elastic_index(self, date):
+        return "*-filebeat-7.10.0-%s-infr_nivola" % date.strftime("%Y.%m.%d")
+
+    def get_dfw_cache(self):
+        """open the dfw log cache of the environment. Return None if the cache can not be used"""
+        return open_local_store(self.app, "dfwlog.db", DfwLogCache, env=self.env, name="dfw log cache")
+
     @ex(
         help="show log for dfw",
         description="show log for dfw",
@@ -246,3 +261,169 @@ class FirewallLogController(ChildPlatformController):
 
         header = "{@timestamp} - {message}"
         self._query(index, query, page, size, sort, pretty=pretty, header=header)
+
+    @ex(
+        help="analyze dfw packet logs",
+        description="analyze dfw packet logs. Logs of the selected hours are read with search_after, parsed in rule, "
+        "action, source, destination, port and protocol and aggregated in top talkers, rejects per rule, rejects per "
+        "source and flows over time. With -cache true the parsed logs of the closed hours are stored locally and "
+        "reused by the next analysis of the same hours",
+        example="beehive platform fwlog dfw-analyze -hours 4 -e <env>;beehive platform fwlog dfw-analyze -ip 10.102.185.10 -reject false -cache true -e <env>",
+        arguments=PLATFORM_ARGS(
+            [
+                (
+                    ["-hours"],
+                    {
+                        "help": "number of hours to analyze [default=1]",
+                        "action": "store",
+                        "type": int,
+                        "default": 1,
+                    },
+                ),
+                (
+                    ["-end"],
+                    {
+                        "help": "analysis end time, utc. Ex. 2024-05-10T14:00 [default=now]",
+                        "action": "store",
+                        "type": str,
+                        "default": None,
+                    },
+                ),
+                (
+                    ["-reject"],
+                    {
+                        "help": "if true analyze only rejected and dropped packets",
+                        "action": "store",
+                        "type": str,
+                        "default": "true",
+                    },
+                ),
+                (
+                    ["-ip"],
+                    {
+                        "help": "ip address",
+                        "action": "store",
+                        "type": str,
+                        "default": None,
+                    },
+                ),
+                (
+                    ["-top"],
+                    {
+                        "help": "number of items of the top lists [default=10]",
+                        "action": "store",
+                        "type": int,
+                        "default": 10,
+                    },
+                ),
+                (
+                    ["-bucket"],
+                    {
+                        "help": "flows over time interval in minutes [default=5]",
+                        "action": "store",
+                        "type": int,
+                        "default": 5,
+                    },
+                ),
+                (
+                    ["-pagesize"],
+                    {
+                        "help": "logs read with every request [default=1000]",
+                        "action": "store",
+                        "type": int,
+                        "default": 1000,
+                    },
+                ),
+                (
+                    ["-maxhits"],
+                    {
+                        "help": "max logs read for every hour [optional]",
+                        "action": "store",
+                        "type": int,
+                        "default": None,
+                    },
+                ),
+                (
+                    ["-cache"],
+                    {
+                        "help": "if true use the local cache of the parsed logs [default=false]",
+                        "action": "store",
+                        "type": str,
+                        "default": "false",
+                    },
+                ),
+            ]
+        ),
+    )
+    def dfw_analyze(self):
+        hours = self.app.pargs.hours
+        end = self.app.pargs.end
+        reject = str2bool(self.app.pargs.reject)
+        ip = self.app.pargs.ip
+        pagesize = self.app.pargs.pagesize
+        maxhits = self.app.pargs.maxhits
+        use_cache = str2bool(self.app.pargs.cache)
+
+        now = datetime.utcnow()
+        end = now if end is None else datetime.strptime(end, "%Y-%m-%dT%H:%M")
+        start = end - timedelta(hours=hours)
+        analyzer = DfwLogAnalyzer(top=self.app.pargs.top, bucket=self.app.pargs.bucket * 60)
+        cache = self.get_dfw_cache() if use_cache is True else None
+        stats = {"windows": 0, "cached": 0, "logs": 0, "unparsed": 0}
+
+        # read logs by hour, so every window is in a single daily index and closed windows can be cached
+        window_start = start
+        while window_start < end:
+            window_end = min(window_start.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1), end)
+            index = self.get_elastic_index(window_start)
+            query = dfw_query(self.env, reject=reject, ip=ip, start=window_start, end=window_end)
+            self.app.log.debug(query)
+            stats["windows"] += 1
+
+            # only full hours already closed are cached
+            key = None
+            if cache is not None and window_end < now and window_start.minute == 0 and window_end.minute == 0:
+                key = DfwLogCache.window_key(index, query, window_start)
+            records = cache.get(key) if key is not None else None
+            if records is not None:
+                stats["cached"] += 1
+                for record in records:
+                    analyzer.add(record)
+            else:
+                records = []
+                window_logs = 0
+                for hit in scan_hits(self.es, index, query, page_size=pagesize, max_hits=maxhits):
+                    window_logs += 1
+                    record = parse_dfw_message(hit.get("message"), ts=hit.get("@timestamp"))
+                    if record is None:
+                        stats["unparsed"] += 1
+                        continue
+                    analyzer.add(record)
+                    if key is not None:
+                        records.append(record)
+                stats["logs"] += window_logs
+                # a window truncated by maxhits is not complete
+                if key is not None and (maxhits is None or window_logs < maxhits):
+                    cache.set(key, records)
+            window_start = window_end
+
+        if cache is not None:
+            cache.close()
+        self.app.log.debug("dfw analysis: %s" % stats)
+
+        report = analyzer.report()
+        if self.is_output_text():
+            print(
+                "analyzed %s dfw logs from %s to %s: %s read, %s unparsed, %s of %s hours from cache"
+                % (report["total"], start, end, stats["logs"], stats["unparsed"], stats["cached"], stats["windows"])
+            )
+            self.c("\ntop talkers", "underline")
+            self.app.render(report["talkers"], headers=["src", "dst", "dport", "proto", "count"])
+            self.c("\nrejects per rule", "underline")
+            self.app.render(report["rules"], headers=["rule", "rejects"])
+            self.c("\nrejects per source", "underline")
+            self.app.render(report["sources"], headers=["src", "rejects"])
+            self.c("\nflows over time", "underline")
+            self.app.render(report["timeline"], headers=["time", "flows", "rejects"])
+        else:
+            self.app.render(report, details=True)
@@ -0,0 +1,246 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from collections import Counter
+from datetime import datetime, timezone
+from re import compile as re_compile
+from sqlite3 import connect
+from threading import Lock
+from time import time
+from typing import Iterator, List, Optional
+from ujson import dumps
+
+# nsx dfw packet log. Ex.
+# dfwpktlogs: 2151 INET match REJECT domain-c7/1045 IN 60 TCP 10.102.185.10/51938->10.138.144.20/22 S
+# dfwpktlogs: 2151 INET match PASS domain-c7/1001 OUT 84 PROTO 1 10.102.185.10->10.138.144.20
+DFW_LOG_RE = re_compile(
+    r"dfwpktlogs:\s+\S+\s+INET6?\s+\w+\s+(?P<action>[A-Z]+)\s+(?P<ruleset>[^/\s]+)/(?P<rule>\d+)\s+"
+    r"(?P<direction>IN|OUT)\s+(?P<length>\d+)\s+(?P<proto>PROTO\s+\d+|\w+)\s+(?:[\d\s]*?\s)?"
+    r"(?P<src>[0-9a-fA-F.:]+?)(?:/(?P<sport>\d+))?->(?P<dst>[0-9a-fA-F.:]+?)(?:/(?P<dport>\d+))?(?:\s|$)"
+)
+
+# dfw actions counted as rejects
+DFW_REJECT_ACTIONS = ["REJECT", "DROP"]
+
+# parsed record fields
+DFW_FIELDS = ["ts", "action", "ruleset", "rule", "direction", "length", "proto", "src", "sport", "dst", "dport"]
+
+
+def parse_dfw_message(message: str, ts: str = None) -> Optional[dict]:
+    """parse a dfw packet log line
+
+    :param message: log message
+    :param ts: log timestamp [optional]
+    :return: dict with DFW_FIELDS or None if message is not a dfw packet log
+    """
+    match = DFW_LOG_RE.search(message or "")
+    if match is None:
+        return None
+    record = match.groupdict()
+    record["ts"] = ts
+    record["proto"] = record["proto"].replace("PROTO ", "")
+    return record
+
+
+def dfw_query(env: str, reject: bool = False, ip: str = None, start: datetime = None, end: datetime = None) -> dict:
+    """build the elastic query of the dfw packet logs. Message filters use match_phrase on the indexed terms
+    instead of leading wildcards, that force a scan of all the terms of the index
+
+    :param env: environment
+    :param reject: if True select only rejected and dropped packets
+    :param ip: ip address [optional]
+    :param start: start time, utc [optional]
+    :param end: end time, utc [optional]
+    :return: elastic query
+    """
+    filters = [
+        {"query_string": {"query": "fields.log_server:%s-vsphere*" % env}},
+        {"match_phrase": {"message": "dfwpktlogs"}},
+    ]
+    if reject is True:
+        filters.append(
+            {
+                "bool": {
+                    "should": [{"match_phrase": {"message": a}} for a in DFW_REJECT_ACTIONS],
+                    "minimum_should_match": 1,
+                }
+            }
+        )
+    if ip is not None:
+        filters.append({"match_phrase": {"message": ip}})
+    if start is not None or end is not None:
+        timerange = {"format": "strict_date_optional_time"}
+        if start is not None:
+            timerange["gte"] = start.strftime("%Y-%m-%dT%H:%M:%SZ")
+        if end is not None:
+            timerange["lt"] = end.strftime("%Y-%m-%dT%H:%M:%SZ")
+        filters.append({"range": {"@timestamp": timerange}})
+    return {"bool": {"filter": filters}}
+
+
+def scan_hits(elasticsearch, index: str, query: dict, page_size: int = 1000, max_hits: int = None) -> Iterator[dict]:
+    """read all the hits of a query with search_after, in @timestamp order. A point in time is used when the server
+    supports it, so that pages are consistent and the shard doc is the sort tiebreaker
+
+    :param elasticsearch: elasticsearch client
+    :param index: index name or pattern
+    :param query: elastic query
+    :param page_size: hits read with every request [default=1000]
+    :param max_hits: max hits to read [optional]
+    :return: iterator of hit _source
+    """
+    pit = None
+    try:
+        pit = elasticsearch.open_point_in_time(index=index, keep_alive="2m").get("id")
+    except Exception:
+        pass
+
+    sort = [{"@timestamp": "asc"}]
+    if pit is None:
+        sort.append({"_doc": "asc"})
+    search_after = None
+    count = 0
+    try:
+        while max_hits is None or count < max_hits:
+            kwargs = {
+                "query": query,
+                "size": page_size,
+                "sort": sort,
+                "source": ["@timestamp", "message"],
+                "track_total_hits": False,
+            }
+            if pit is not None:
+                kwargs["pit"] = {"id": pit, "keep_alive": "2m"}
+            else:
+                kwargs["index"] = index
+            if search_after is not None:
+                kwargs["search_after"] = search_after
+            res = elasticsearch.search(**kwargs)
+            pit = res.get("pit_id", pit)
+            hits = res.get("hits", {}).get("hits", [])
+            for hit in hits:
+                yield hit.get("_source", {})
+                count += 1
+                if max_hits is not None and count >= max_hits:
+                    break
+            if len(hits) < page_size:
+                break
+            search_after = hits[-1].get("sort")
+    finally:
+        if pit is not None:
+            try:
+                elasticsearch.close_point_in_time(id=pit)
+            except Exception:
+                pass
+
+
+class DfwLogAnalyzer(object):
+    """Aggregate parsed dfw packet logs while they are read: top talkers, rejects per rule and per source and
+    flows over time. Only the counters are kept in memory.
+
+    :param top: number of items of every top list [default=10]
+    :param bucket: timeline bucket in seconds [default=300]
+    """
+
+    def __init__(self, top: int = 10, bucket: int = 300):
+        self.top = top
+        self.bucket = bucket
+        self.total = 0
+        self.talkers = Counter()
+        self.rule_rejects = Counter()
+        self.source_rejects = Counter()
+        self.timeline = {}
+
+    def __bucket(self, ts: str) -> Optional[str]:
+        try:
+            date = datetime.strptime(ts[:19], "%Y-%m-%dT%H:%M:%S")
+        except (TypeError, ValueError):
+            return None
+        epoch = (date - datetime(1970, 1, 1)).total_seconds()
+        return datetime.fromtimestamp(epoch - epoch % self.bucket, timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+    def add(self, record: dict):
+        self.total += 1
+        self.talkers[(record["src"], record["dst"], record["dport"], record["proto"])] += 1
+        reject = record["action"] in DFW_REJECT_ACTIONS
+        if reject is True:
+            self.rule_rejects["%s/%s" % (record["ruleset"], record["rule"])] += 1
+            self.source_rejects[record["src"]] += 1
+        bucket = self.__bucket(record["ts"])
+        if bucket is not None:
+            item = self.timeline.setdefault(bucket, {"time": bucket, "flows": 0, "rejects": 0})
+            item["flows"] += 1
+            if reject is True:
+                item["rejects"] += 1
+
+    def report(self) -> dict:
+        return {
+            "total": self.total,
+            "talkers": [
+                {"src": k[0], "dst": k[1], "dport": k[2], "proto": k[3], "count": v}
+                for k, v in self.talkers.most_common(self.top)
+            ],
+            "rules": [{"rule": k, "rejects": v} for k, v in self.rule_rejects.most_common(self.top)],
+            "sources": [{"src": k, "rejects": v} for k, v in self.source_rejects.most_common(self.top)],
+            "timeline": [self.timeline[k] for k in sorted(self.timeline.keys())],
+        }
+
+
+class DfwLogCache(object):
+    """Local sqlite cache of the parsed dfw packet logs of closed time windows. A window is identified by the
+    index, the query and the window start, so a repeated analysis over the same hours reads only the windows not
+    yet cached.
+
+    :param path: sqlite file path
+    :param max_age: windows older than max_age seconds are removed when the cache is opened [default=7 days]
+    """
+
+    def __init__(self, path: str, max_age: int = 604800):
+        self.lock = Lock()
+        self.conn = connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS windows (
+                key TEXT PRIMARY KEY,
+                created REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS records (
+                key TEXT NOT NULL,
+                %s
+            );
+            CREATE INDEX IF NOT EXISTS records_key ON records (key);
+            """
+            % ",\n".join("%s TEXT" % f for f in DFW_FIELDS)
+        )
+        limit = time() - max_age
+        self.conn.execute("DELETE FROM records WHERE key IN (SELECT key FROM windows WHERE created < ?)", (limit,))
+        self.conn.execute("DELETE FROM windows WHERE created < ?", (limit,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def window_key(index: str, query: dict, start: datetime) -> str:
+        return "%s|%s|%s" % (index, dumps(query, sort_keys=True), start.strftime("%Y-%m-%dT%H:%M"))
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        """get the records of a window. Return None if the window is not cached"""
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM windows WHERE key = ?", (key,)).fetchone() is None:
+                return None
+            rows = self.conn.execute("SELECT %s FROM records WHERE key = ?" % ", ".join(DFW_FIELDS), (key,))
+            return [dict(zip(DFW_FIELDS, row)) for row in rows]
+
+    def set(self, key: str, records: List[dict]):
+        """store the records of a window with a single transaction"""
+        with self.lock:
+            self.conn.execute("DELETE FROM records WHERE key = ?", (key,))
+            self.conn.executemany(
+                "INSERT INTO records (key, %s) VALUES (?, %s)"
+                % (", ".join(DFW_FIELDS), ", ".join("?" * len(DFW_FIELDS))),
+                [[key] + [r.get(f) for f in DFW_FIELDS] for r in records],
+            )
+            self.conn.execute("INSERT OR REPLACE INTO windows (key, created) VALUES (?, ?)", (key, time()))
+            self.conn.commit()
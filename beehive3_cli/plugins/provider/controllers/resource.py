@@ -11,7 +11,21 @@ from beecell.file import read_file
 from beecell.types.type_string import truncate, bool2str, str2bool
 from beecell.types.type_dict import dict_get
 from beehive3_cli.core.controller import BaseController, PARGS, ARGS
-from beehive3_cli.core.util import load_config
+from beehive3_cli.core.util import load_config, open_local_store, run_concurrent
+from beehive3_cli.plugins.provider.util.metrics import ZoneMetricSnapshot
+
+METRIC_SNAPSHOT_ARGS = [
+    (
+        ["-max-age"],
+        {
+            "help": "max age in seconds of the compute zone metrics read from the local snapshot [default=3600]",
+            "action": "store",
+            "type": int,
+            "default": 3600,
+            "dest": "max_age",
+        },
+    ),
+]
 
 
 class ResourceProviderController(BaseController):
@@ -1394,9 +1408,21 @@ class ResourceProviderController(BaseController):
             fields=["uuid", "name", "desc", "date.creation"],
         )
 
+    def get_metric_snapshot(self):
+        """open the compute zone metrics snapshot of the environment. Return None if the snapshot can not be used"""
+        max_age = getattr(self.app.pargs, "max_age", 3600)
+        return open_local_store(
+            self.app,
+            "zonemetrics.db",
+            lambda p: ZoneMetricSnapshot(p, max_age=max_age),
+            env=self.env,
+            name="compute zone metrics snapshot",
+        )
+
     @ex(
         help="get compute zone metrics",
-        description="get compute zone metrics",
+        description="get compute zone metrics. With -snapshot the metrics are read from the local snapshot when "
+        "younger than -max-age, otherwise they are requested and stored in the snapshot",
         arguments=ARGS(
             [
                 (
@@ -1407,14 +1433,33 @@ class ResourceProviderController(BaseController):
                         "type": str,
                         "default": None,
                     },
-                )
-            ]
+                ),
+                (
+                    ["-snapshot"],
+                    {
+                        "help": "use the local metrics snapshot",
+                        "action": "store_true",
+                    },
+                ),
+            ],
+            METRIC_SNAPSHOT_ARGS,
         ),
     )
     def compute_zone_metric_get(self):
         oid = getattr(self.app.pargs, "id", None)
-        uri = self.baseuri + "/compute_zones/%s/metrics" % oid
-        res = self.cmp_get(uri).get("compute_zone")
+        snapshot = self.get_metric_snapshot() if self.app.pargs.snapshot is True else None
+        res = None
+        if snapshot is not None:
+            res = snapshot.get(oid)
+            self.app.log.debug("compute zone %s metrics snapshot hit: %s" % (oid, res is not None))
+        if res is None:
+            uri = self.baseuri + "/compute_zones/%s/metrics" % oid
+            res = self.cmp_get(uri).get("compute_zone")
+            if snapshot is not None:
+                zone = self.cmp_get(self.baseuri + "/compute_zones/%s" % oid).get("compute_zone")
+                snapshot.set(zone, res)
+        if snapshot is not None:
+            snapshot.close()
         resp = []
         for item in res:
             for m in item.get("metrics"):
@@ -1463,22 +1508,119 @@ class ResourceProviderController(BaseController):
         oid = getattr(self.app.pargs, "id", None)
         uri = self.baseuri + "/compute_zones/%s/metrics/cache" % oid
         res = self.cmp_delete(uri)
+        snapshot = self.get_metric_snapshot()
+        if snapshot is not None:
+            snapshot.delete(oid)
+            snapshot.close()
         self.app.render({"msg": "delete compute zone metric cache %s" % (res)})
 
     @ex(
         help="pre load compute zones metrics",
-        description="pre load compute zones metrics",
-        arguments=ARGS(),
+        description="pre load compute zones metrics. Metrics of the compute zones are stored in a local snapshot, "
+        "only the zones missing or older than -max-age are requested, concurrently",
+        example="beehive res-provider compute-zone-metric-preload -e <env>;beehive res-provider compute-zone-metric-preload -max-age 600 -workers 10 -e <env>",
+        arguments=ARGS(
+            [
+                (
+                    ["-workers"],
+                    {
+                        "help": "number of concurrent requests [default=5]",
+                        "action": "store",
+                        "type": int,
+                        "default": 5,
+                    },
+                ),
+                (
+                    ["-force"],
+                    {
+                        "help": "refresh all the compute zones",
+                        "action": "store_true",
+                    },
+                ),
+            ],
+            METRIC_SNAPSHOT_ARGS,
+        ),
     )
     def compute_zone_metric_preload(self):
         uri = self.baseuri + "/compute_zones"
         css = self.cmp_get(uri, data={"size": -1}).get("compute_zones")
-        for cs in css:
+        snapshot = self.get_metric_snapshot()
+        stale = [str(cs["id"]) for cs in css]
+        if snapshot is not None and self.app.pargs.force is False:
+            stale = snapshot.get_stale(stale)
+        stale = set(stale)
+
+        def get_metrics(cs):
             start = time()
             uri = self.baseuri + "/compute_zones/%s/metrics" % cs["id"]
             res = self.cmp_get(uri).get("compute_zone")
-            elapsed = time() - start
-            print(cs["name"], elapsed)
+            return res, time() - start
+
+        resp = [{"id": cs["id"], "name": cs["name"], "status": "cached", "elapsed": None} for cs in css]
+        resp = {str(r["id"]): r for r in resp}
+        refresh = [cs for cs in css if str(cs["id"]) in stale]
+        for cs, res, err in run_concurrent(get_metrics, refresh, workers=self.app.pargs.workers):
+            item = resp[str(cs["id"])]
+            if err is not None:
+                item["status"] = "error: %s" % err
+                self.app.exit_code = 1
+            else:
+                item["status"], item["elapsed"] = "refreshed", round(res[1], 3)
+                if snapshot is not None:
+                    snapshot.set(cs, res[0])
+            if self.is_output_text():
+                print("%-40s %-10s %s" % (cs["name"], item["status"], item["elapsed"]))
+        if snapshot is not None:
+            snapshot.close()
+        self.app.render(list(resp.values()), headers=["id", "name", "status", "elapsed"])
+
+    @ex(
+        help="get compute zones metrics snapshot",
+        description="get the compute zones metrics of the local snapshot written by compute-zone-metric-preload. "
+        "No api request is made",
+        arguments=ARGS(
+            [
+                (
+                    ["-id"],
+                    {
+                        "help": "compute zone id, uuid or name",
+                        "action": "store",
+                        "type": str,
+                        "default": None,
+                    },
+                ),
+            ]
+        ),
+    )
+    def compute_zone_metric_snapshot(self):
+        oid = getattr(self.app.pargs, "id", None)
+        snapshot = self.get_metric_snapshot()
+        if snapshot is None:
+            raise Exception("compute zone metrics snapshot can not be used")
+        zones = snapshot.get_all()
+        snapshot.close()
+        resp = []
+        for zone in zones:
+            for item in zone["metrics"]:
+                if oid is not None and oid not in [zone["id"], zone["name"], item.get("uuid")]:
+                    continue
+                for m in item.get("metrics"):
+                    resp.append(
+                        {
+                            "zone": zone["name"],
+                            "age": zone["age"],
+                            "id": item.get("uuid"),
+                            "type": item.get("type"),
+                            "extraction-date": item.get("extraction_date"),
+                            "metric": m.get("key"),
+                            "metric-value": m.get("value"),
+                            "metric-unit": m.get("unit"),
+                        }
+                    )
+        self.app.render(
+            resp,
+            headers=["zone", "age", "id", "type", "extraction-date", "metric", "metric-value", "metric-unit"],
+        )
 
     @ex(
         help="get provider childs",
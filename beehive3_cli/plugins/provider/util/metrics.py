@@ -0,0 +1,89 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from sqlite3 import connect
+from threading import Lock
+from time import time
+from typing import Dict, List, Optional
+from ujson import dumps, loads
+
+
+class ZoneMetricSnapshot(object):
+    """Local sqlite snapshot of the compute zone metrics. Every zone is stored with the time it was read, so that
+    reporting commands read the zones younger than max_age from the snapshot and request only the stale ones.
+
+    :param path: sqlite file path
+    :param max_age: zones older than max_age seconds are stale [default=3600]
+    """
+
+    def __init__(self, path: str, max_age: int = 3600):
+        self.max_age = max_age
+        self.lock = Lock()
+        self.conn = connect(path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS zones (
+                id TEXT PRIMARY KEY,
+                uuid TEXT,
+                name TEXT,
+                created REAL NOT NULL,
+                metrics TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def get_ages(self) -> Dict[str, float]:
+        """get the age in seconds of every zone in the snapshot"""
+        now = time()
+        with self.lock:
+            rows = self.conn.execute("SELECT id, created FROM zones").fetchall()
+        return {row[0]: now - row[1] for row in rows}
+
+    def get_stale(self, oids: List[str]) -> List[str]:
+        """get the zones missing from the snapshot or older than max_age"""
+        ages = self.get_ages()
+        return [oid for oid in oids if ages.get(oid, self.max_age + 1) > self.max_age]
+
+    def get(self, oid: str, fresh: bool = True) -> Optional[List[dict]]:
+        """get the metrics of a zone by id, uuid or name. Return None if the zone is not in the snapshot or, with
+        fresh True, if it is older than max_age"""
+        query = "SELECT metrics FROM zones WHERE (id = ? OR uuid = ? OR name = ?)"
+        params = [oid, oid, oid]
+        if fresh is True:
+            query += " AND created >= ?"
+            params.append(time() - self.max_age)
+        with self.lock:
+            row = self.conn.execute(query, params).fetchone()
+        if row is None:
+            return None
+        return loads(row[0])
+
+    def get_all(self) -> List[dict]:
+        """get all the zones of the snapshot as {"id":.., "name":.., "age":.., "metrics":..}"""
+        now = time()
+        with self.lock:
+            rows = self.conn.execute("SELECT id, name, created, metrics FROM zones ORDER BY name").fetchall()
+        return [{"id": r[0], "name": r[1], "age": round(now - r[2]), "metrics": loads(r[3])} for r in rows]
+
+    def set(self, zone: dict, metrics: List[dict]):
+        """store the metrics of a zone"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO zones (id, uuid, name, created, metrics) VALUES (?, ?, ?, ?, ?)",
+                (str(zone["id"]), zone.get("uuid"), zone.get("name"), time(), dumps(metrics)),
+            )
+            self.conn.commit()
+
+    def delete(self, oid: str = None):
+        """delete a zone by id, uuid or name from the snapshot or all the zones if oid is None"""
+        with self.lock:
+            if oid is None:
+                self.conn.execute("DELETE FROM zones")
+            else:
+                self.conn.execute("DELETE FROM zones WHERE id = ? OR uuid = ? OR name = ?", (oid, oid, oid))
+            self.conn.commit()
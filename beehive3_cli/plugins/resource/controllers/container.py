@@ -6,7 +6,31 @@ from time import time
 from cement import ex
 from beecell.types.type_string import str2bool
 from beehive3_cli.core.controller import BaseController, PARGS, ARGS
-from beehive3_cli.core.util import load_config
+from beehive3_cli.core.util import load_config, run_concurrent
+
+WORKERS_ARGS = [
+    (
+        ["-workers"],
+        {
+            "help": "number of concurrent requests [default=5]",
+            "action": "store",
+            "type": int,
+            "default": 5,
+        },
+    ),
+]
+
+CONTAINERS_ARGS = [
+    (
+        ["id"],
+        {
+            "help": "comma separated container uuids or all",
+            "action": "store",
+            "type": str,
+            "default": None,
+        },
+    ),
+] + WORKERS_ARGS
 
 
 class ResourceOrchestratorController(BaseController):
@@ -294,32 +318,64 @@ class ResourceOrchestratorController(BaseController):
             headers=["resourcecontainer", "ping"],
         )
 
+    def __get_containers(self, oids="all"):
+        """get containers from a comma separated list of uuids or all the containers"""
+        if oids == "all":
+            uri = "%s/containers" % self.baseuri
+            return self.cmp_get(uri)["resourcecontainers"]
+        return [{"uuid": oid, "name": oid} for oid in oids.split(",")]
+
+    def __get_discover_types(self, containers):
+        """get the discover types of the containers concurrently and yield (container, type) as soon as the types
+        of a container are known, so that the following step can start before all the types are read"""
+        workers = self.app.pargs.workers
+
+        def get_types(container):
+            uri = "%s/containers/%s/discover/types" % (self.baseuri, container["uuid"])
+            return self.cmp_get(uri, data="").get("discover_types")
+
+        for container, types, err in run_concurrent(get_types, containers, workers=workers):
+            if err is not None:
+                self.app.error("container %s discover types error: %s" % (container["name"], err))
+                continue
+            for discover_type in types:
+                yield container, discover_type
+
     @ex(
         help="ping all resource containers",
-        description="ping all resource container ",
-        arguments=ARGS(),
+        description="ping all resource container. Containers are pinged concurrently and the status of every "
+        "container is printed as soon as it is known",
+        arguments=ARGS(WORKERS_ARGS),
     )
     def pings(self):
         """Ping all containers"""
-        resp = []
-        uri = "%s/containers" % self.baseuri
-        res = self.cmp_get(uri)
-        for rc in res["resourcecontainers"]:
+
+        def ping(rc):
             start = time()
             uri = "%s/containers/%s/ping" % (self.baseuri, rc["id"])
             res = self.cmp_get(uri)
-            elapsed = time() - start
+            return res["ping"], time() - start
+
+        resp = []
+        containers = self.__get_containers()
+        for rc, res, err in run_concurrent(ping, containers, workers=self.app.pargs.workers):
+            ping_res, elapsed = (False, None) if err is not None else res
+            if err is not None:
+                self.app.log.error("container %s ping error: %s" % (rc["name"], err))
+            if self.is_output_text():
+                print("%-40s %-10s %s" % (rc["name"], ping_res, round(elapsed or 0, 3)))
             resp.append(
                 {
                     "uuid": rc["uuid"],
                     "name": rc["name"],
-                    "ping": res["ping"],
+                    "ping": ping_res,
                     "category": rc["category"],
                     "type": rc["__meta__"]["definition"],
                     "elapsed": elapsed,
                 }
             )
 
+        resp.sort(key=lambda x: x["name"])
         self.app.render(resp, headers=["uuid", "name", "category", "type", "ping", "elapsed"])
 
     @ex(
@@ -388,38 +444,42 @@ class ResourceOrchestratorController(BaseController):
 
     @ex(
         help="discover container",
-        description="discover container",
-        example="beehive res containers discover Podto1Openstack Provider.ComputeZone.ComputeStackV2 -e <env>;beehive res containers discover Podto1Vsphere Vsphere.DataCenter.Folder.Server -e <env>",
-        arguments=ARGS(
-            [
-                (
-                    ["id"],
-                    {
-                        "help": "entity uuid",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                )
-            ]
-        ),
+        description="discover all the resource types of one or more containers. Containers and discover types are "
+        "read concurrently and a summary of every type is printed as soon as it is discovered",
+        example="beehive res containers discovers Podto1Openstack -e <env>;beehive res containers discovers Podto1Vsphere,Podto2Vsphere -e <env>;beehive res containers discovers all -workers 10 -e <env>",
+        arguments=ARGS(CONTAINERS_ARGS),
     )
     def discovers(self):
         oid = self.app.pargs.id
 
-        # get types
-        uri = "%s/containers/%s/discover/types" % (self.baseuri, oid)
-        types = self.cmp_get(uri, data="").get("discover_types")
+        def discover(item):
+            container, discover_type = item
+            uri = "%s/containers/%s/discover" % (self.baseuri, container["uuid"])
+            return self.cmp_get(uri, data="type=%s" % discover_type, timeout=240).get("discover_resources")
 
         res = {"new": [], "died": [], "changed": []}
-        for type in types:
-            uri = "%s/containers/%s/discover" % (self.baseuri, oid)
-            parres = self.cmp_get(uri, data="type=%s" % type).get("discover_resources")
-            res["new"].extend(parres["new"])
-            res["died"].extend(parres["died"])
-            res["changed"].extend(parres["changed"])
+        items = self.__get_discover_types(self.__get_containers(oid))
+        for (container, discover_type), parres, err in run_concurrent(discover, items, workers=self.app.pargs.workers):
+            if err is not None:
+                self.app.error("container %s discover %s error: %s" % (container["name"], discover_type, err))
+                continue
+            if self.is_output_text():
+                print(
+                    "%-30s %-60s new: %s, died: %s, changed: %s"
+                    % (
+                        container["name"],
+                        discover_type,
+                        len(parres["new"]),
+                        len(parres["died"]),
+                        len(parres["changed"]),
+                    )
+                )
+            for key in res.keys():
+                for entity in parres[key]:
+                    entity["container"] = container["name"]
+                    res[key].append(entity)
 
-        headers = ["id", "name", "parent", "type"]
+        headers = ["container", "id", "name", "parent", "type"]
         self.c("new resources", "underline")
         self.app.render(res, key="new", headers=headers)
         self.c("died resources", "underline")
@@ -506,38 +566,42 @@ class ResourceOrchestratorController(BaseController):
 
     @ex(
         help="synchronize container resources",
-        description="synchronize container resources",
-        example="beehive res containers synchronizes Podto1Grafana;beehive res containers synchronizes Podto2Grafana",
-        arguments=ARGS(
-            [
-                (
-                    ["id"],
-                    {
-                        "help": "entity uuid",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                )
-            ]
-        ),
+        description="synchronize all the resource types of one or more containers. Synchronize jobs of all the "
+        "containers and types are started concurrently and tracked together, the status of every type is printed as "
+        "soon as its job ends",
+        example="beehive res containers synchronizes Podto1Grafana;beehive res containers synchronizes Podto1Grafana,Podto2Grafana;beehive res containers synchronizes all -workers 10",
+        arguments=ARGS(CONTAINERS_ARGS),
     )
     def synchronizes(self):
         oid = self.app.pargs.id
+        items = list(self.__get_discover_types(self.__get_containers(oid)))
 
-        # get types
-        uri = "%s/containers/%s/discover/types" % (self.baseuri, oid)
-        types = self.cmp_get(uri, data="").get("discover_types")
-
-        for type in types:
-            self.c("synchronize %s" % type, "underline")
+        def request(item):
+            container, discover_type = item
             data = {
                 "synchronize": {
-                    "types": type,
+                    "types": discover_type,
                     "new": True,
                     "died": True,
                     "changed": True,
                 }
             }
-            uri = "%s/containers/%s/discover" % (self.baseuri, oid)
-            self.cmp_put(uri, data=data)
+            return "%s/containers/%s/discover" % (self.baseuri, container["uuid"]), data
+
+        def on_result(entry):
+            container, discover_type = entry["item"]
+            msg = "%-30s %-60s %s" % (container["name"], discover_type, entry["status"])
+            if entry["error"] is not None:
+                msg += ": %s" % entry["error"]
+            print(msg)
+
+        report = self.cmp_bulk(
+            "PUT",
+            items,
+            request,
+            workers=self.app.pargs.workers,
+            on_result=on_result if self.is_output_text() else None,
+        )
+        for entry in report:
+            entry["item"] = {"container": entry["item"][0]["name"], "type": entry["item"][1]}
+        self.render_bulk_report(report, headers=["container", "type"], fields=["container", "type"])
@@ -10,7 +10,7 @@ from cement import ex
 from ujson import loads
 from beecell.simple import set_request_params
 from beecell.types.type_string import truncate
-from beehive3_cli.core.controller import BaseController, PARGS, ARGS, StringAction
+from beehive3_cli.core.controller import BaseController, PARGS, ARGS, BULK_ARGS, StringAction
 from beehive3_cli.core.util import TreeStyle
 
 
@@ -698,24 +698,18 @@ class ResourceEntityController(BaseController):
                         "type": str,
                     },
                 ),
-            ]
+            ],
+            BULK_ARGS,
         ),
     )
     def patch(self):
         oids = self.app.pargs.ids.split(",")
         params = {}
-        for oid in oids:
-            data = {"resource": params}
-            uri = "%s/entities/%s" % (self.baseuri, oid)
-            self.cmp_patch(uri, data=data)
-            self.app.render({"msg": "patch resource entity %s" % oid})
-            #
-            # uri = '%s/entities/%s/check' % (self.baseuri, oid)
-            # res = self.cmp_get(uri).get('resource')
-            # self.app.render({'state': res['state']}, details=True)
-            # print('Messages:')
-            # self.app.render(res['check']['msg'], details=True)
-            # print('#####################################\n')
+
+        def request(oid):
+            return "%s/entities/%s" % (self.baseuri, oid), {"resource": params}
+
+        self.cmp_bulk_run("PATCH", oids, request, entity="entities")
 
     @ex(
         help="delete resource entities",
@@ -749,17 +743,19 @@ class ResourceEntityController(BaseController):
                         "default": "true",
                     },
                 ),
-            ]
+            ],
+            BULK_ARGS,
         ),
     )
     def delete(self):
         oids = self.app.pargs.ids.split(",")
         force = self.app.pargs.force
         deep = self.app.pargs.deep
-        for oid in oids:
-            uri = "%s/entities/%s?" % (self.baseuri, oid)
-            uri += "force=%s&deep=%s" % (force, deep)
-            self.cmp_delete(uri, entity="entity %s" % oid)
+
+        def request(oid):
+            return "%s/entities/%s?force=%s&deep=%s" % (self.baseuri, oid, force, deep), ""
+
+        self.cmp_bulk_run("DELETE", oids, request, entity="entities")
 
     @ex(
         help="get resource entity cache",
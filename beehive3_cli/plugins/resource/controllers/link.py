@@ -3,7 +3,7 @@
 # (C) Copyright 2018-2024 CSI-Piemonte
 
 from beecell.simple import set_request_params
-from beehive3_cli.core.controller import BaseController, PARGS, ARGS
+from beehive3_cli.core.controller import BaseController, PARGS, ARGS, BULK_ARGS
 from cement import ex
 from ujson import loads
 
@@ -295,17 +295,18 @@ class ResourceLinkController(BaseController):
                         "type": str,
                     },
                 ),
-            ]
+            ],
+            BULK_ARGS,
         ),
     )
     def patch(self):
         oids = self.app.pargs.ids.split(",")
         params = {}
-        for oid in oids:
-            data = {"resourcelink": params}
-            uri = "%s/links/%s" % (self.baseuri, oid)
-            self.cmp_patch(uri, data=data)
-            self.app.render({"msg": "patch resource link %s" % oid})
+
+        def request(oid):
+            return "%s/links/%s" % (self.baseuri, oid), {"resourcelink": params}
+
+        self.cmp_bulk_run("PATCH", oids, request, entity="links")
 
     @ex(
         help="delete resource links",
@@ -330,14 +331,18 @@ class ResourceLinkController(BaseController):
                         "default": True,
                     },
                 ),
-            ]
+            ],
+            BULK_ARGS,
         ),
     )
     def delete(self):
         oids = self.app.pargs.ids.split(",")
         force = self.app.pargs.force
-        for oid in oids:
+
+        def request(oid):
             uri = "%s/links/%s" % (self.baseuri, oid)
             if force is True:
                 uri += "?force=true"
-            self.cmp_delete(uri, entity="link %s" % oid)
+            return uri, ""
+
+        self.cmp_bulk_run("DELETE", oids, request, entity="links")
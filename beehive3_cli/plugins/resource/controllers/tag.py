@@ -2,7 +2,7 @@
 #
 # (C) Copyright 2018-2024 CSI-Piemonte
 
-from beehive3_cli.core.controller import BaseController, PARGS, ARGS
+from beehive3_cli.core.controller import BaseController, PARGS, ARGS, BULK_ARGS
 from cement import ex
 
 
@@ -246,17 +246,18 @@ class ResourceTagController(BaseController):
                         "type": str,
                     },
                 ),
-            ]
+            ],
+            BULK_ARGS,
         ),
     )
     def patch(self):
         oids = self.app.pargs.ids.split(",")
         params = {}
-        for oid in oids:
-            data = {"resourcetag": params}
-            uri = "%s/tags/%s" % (self.baseuri, oid)
-            self.cmp_patch(uri, data=data)
-            self.app.render({"msg": "patch resource tag %s" % oid})
+
+        def request(oid):
+            return "%s/tags/%s" % (self.baseuri, oid), {"resourcetag": params}
+
+        self.cmp_bulk_run("PATCH", oids, request, entity="tags")
 
     @ex(
         help="delete resource tags",
@@ -280,14 +281,18 @@ class ResourceTagController(BaseController):
                         "default": True,
                     },
                 ),
-            ]
+            ],
+            BULK_ARGS,
         ),
     )
     def delete(self):
         oids = self.app.pargs.ids.split(",")
         force = self.app.pargs.force
-        for oid in oids:
+
+        def request(oid):
             uri = "%s/tags/%s" % (self.baseuri, oid)
             if force is True:
                 uri += "?force=true"
-            self.cmp_delete(uri, entity="tag %s" % oid)
+            return uri, ""
+
+        self.cmp_bulk_run("DELETE", oids, request, entity="tags")
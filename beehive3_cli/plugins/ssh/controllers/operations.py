@@ -4,14 +4,63 @@
 
 from urllib.parse import urlencode
 from cement import ex
-from ujson import dumps
-from beecell.types.type_dict import dict_get
 from beecell.file import read_file
 from beedrones.openstack.client import OpenstackManager
 from beehive3_cli.core.connect import SshConnectionManager
 from beehive3_cli.core.controller import PARGS
-from beehive3_cli.core.util import load_environment_config, load_config
+from beehive3_cli.core.util import load_environment_config, load_config, run_concurrent
 from beehive3_cli.plugins.ssh.controllers.ssh import SshControllerChild
+from beehive3_cli.plugins.ssh.util.lookup import BulkLookup
+from beehive3_cli.plugins.ssh.util.runbook import NodeRunbook, read_results
+
+WORKERS_ARGS = [
+    (
+        ["-workers"],
+        {
+            "help": "number of concurrent requests [default=10]",
+            "action": "store",
+            "type": int,
+            "default": 10,
+        },
+    ),
+]
+
+NODE_ARGS = [
+    (
+        ["-node"],
+        {
+            "help": "node id",
+            "action": "store",
+            "type": str,
+            "default": None,
+        },
+    ),
+    (
+        ["-name"],
+        {
+            "help": "node name pattern",
+            "action": "store",
+            "type": str,
+            "default": None,
+        },
+    ),
+    (
+        ["-file"],
+        {
+            "help": "node list in a file",
+            "action": "store",
+            "type": str,
+            "default": None,
+        },
+    ),
+    (
+        ["-resume"],
+        {
+            "help": "skip the nodes already successful in the result file of a previous run",
+            "action": "store_true",
+        },
+    ),
+] + WORKERS_ARGS
 
 
 class SshOperationController(SshControllerChild):
@@ -25,6 +74,8 @@ class SshOperationController(SshControllerChild):
     def pre_command_run(self):
         super(SshOperationController, self).pre_command_run()
 
+        self.lookup = BulkLookup(self, workers=getattr(self.app.pargs, "workers", 10))
+
     def __config_openstack_client(self):
         self.config = load_environment_config(self.app)
 
@@ -62,94 +113,32 @@ class SshOperationController(SshControllerChild):
             nodes = self.cmp_get(uri, data=urlencode(data)).get("nodes", [])
         elif node_file is not None:
             data = read_file(node_file)
+            node_ids = [item.split("  ")[0] for item in data.split("\n")]
+            node_ids = [node_id for node_id in node_ids if node_id != ""]
+            res = self.lookup.get_nodes(self.baseuri, node_ids)
             nodes = []
-            for item in data.split("\n"):
-                out = item.split("  ")
-                node_id = out[0]
-                if node_id == "":
+            for node_id in node_ids:
+                if res.get(node_id) is None:
+                    self.app.error("node %s not found" % node_id)
                     continue
-                uri = "%s/nodes/%s" % (self.baseuri, node_id)
-                node = self.cmp_get(uri).get("node", {})
-                nodes.append(node)
+                nodes.append(res[node_id])
         else:
             nodes = []
 
         return nodes
 
-    def __node_run_cmd(self, scm, node, cmd, noresult=False):
-        try:
-            res = scm.sshcmd2node(node=node, user="root", cmd=cmd, timeout=30.0)
-        except Exception as ex:
-            res = {"stderr": str(ex)}
-        status = False
-        if res.get("stderr", "") != "":
-            status = False
-        elif len(res.get("stdout", [])) > 0 or noresult is True:
-            status = True
-
-        run_res = {"cmd": cmd, "res": res, "status": status}
-        return run_res
-
     def __node_run_cmds(self, scm, nodes, cmds, out_file):
-        resp = {}
-
-        f = open(out_file, "w")
-        for node in nodes:
-            node_status = True
-            node_res = []
-            node_err = None
-            for cmd in cmds:
-                node_partial_res = self.__node_run_cmd(scm, node, cmd[0], noresult=cmd[1])
-                node_res.append(node_partial_res)
-                resp[node["name"]] = node_res
-                if node_partial_res.get("status") is False:
-                    node_status = False
-                    node_err = dict_get(node_partial_res, "res.stderr")  # cmd[0]
-                    break
-
-            resp[node["name"]] = node_res
-            if node_err is not None:
-                print("%-60s %-18s %s: %s" % (node["name"], node["ip_address"], node_status, node_err))
+        runbook = NodeRunbook(scm, cmds, out_file, workers=self.app.pargs.workers)
+        for res in runbook.run(nodes, resume=self.app.pargs.resume):
+            if res["error"] is not None:
+                print("%-60s %-18s %s: %s" % (res["node"], res["ip_address"], res["status"], res["error"]))
             else:
-                print("%-60s %-18s %s" % (node["name"], node["ip_address"], node_status))
-
-        f.write(dumps(resp))
-        f.close()
+                print("%-60s %-18s %s" % (res["node"], res["ip_address"], res["status"]))
 
     @ex(
         help="check virtual machine boot disk is writable",
         description="check virtual machine boot disk is writable",
-        arguments=PARGS(
-            [
-                (
-                    ["-node"],
-                    {
-                        "help": "node id",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                ),
-                (
-                    ["-name"],
-                    {
-                        "help": "node name pattern",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                ),
-                (
-                    ["-file"],
-                    {
-                        "help": "node list in a file",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                ),
-            ]
-        ),
+        arguments=PARGS(NODE_ARGS),
     )
     def check_disk_rw(self):
         nodes = self.__get_nodes()
@@ -158,43 +147,13 @@ class SshOperationController(SshControllerChild):
             ("df -k", False),
             ("touch /tmp/xxxx && ls /tmp/xxxx && rm /tmp/xxxx", False),
         ]
-        self.__node_run_cmds(scm, nodes, cmds, "node-check.json")
+        self.__node_run_cmds(scm, nodes, cmds, "node-disk-check.jsonl")
 
     @ex(
         help="check data domain mounted in dbaas",
         description="check data domain mounted in dbaas",
         example="beehive ssh ops dbaas-check-dd;beehive ssh ops dbaas-check-dd -name dbs -size 10",
-        arguments=PARGS(
-            [
-                (
-                    ["-node"],
-                    {
-                        "help": "node id",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                ),
-                (
-                    ["-name"],
-                    {
-                        "help": "node name pattern",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                ),
-                (
-                    ["-file"],
-                    {
-                        "help": "node list in a file",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                ),
-            ]
-        ),
+        arguments=PARGS(NODE_ARGS),
     )
     def dbaas_check_dd(self):
         nodes = self.__get_nodes()
@@ -207,42 +166,12 @@ class SshOperationController(SshControllerChild):
                 False,
             ),
         ]
-        self.__node_run_cmds(scm, nodes, cmds, "node-check.json")
+        self.__node_run_cmds(scm, nodes, cmds, "node-check.jsonl")
 
     @ex(
         help="umount data domain mounted in dbaas",
         description="umount data domain mounted in dbaas",
-        arguments=PARGS(
-            [
-                (
-                    ["-node"],
-                    {
-                        "help": "node id",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                ),
-                (
-                    ["-name"],
-                    {
-                        "help": "node name pattern",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                ),
-                (
-                    ["-file"],
-                    {
-                        "help": "node list in a file",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                ),
-            ]
-        ),
+        arguments=PARGS(NODE_ARGS),
     )
     def dbaas_umount_dd(self):
         nodes = self.__get_nodes()
@@ -251,42 +180,12 @@ class SshOperationController(SshControllerChild):
             ("cat /etc/fstab | grep /bck_logici", False),
             ("umount /bck_logici", True),
         ]
-        self.__node_run_cmds(scm, nodes, cmds, "node-umount.json")
+        self.__node_run_cmds(scm, nodes, cmds, "node-umount.jsonl")
 
     @ex(
         help="mount data domain mounted in dbaas",
         description="mount data domain mounted in dbaas",
-        arguments=PARGS(
-            [
-                (
-                    ["-node"],
-                    {
-                        "help": "node id",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                ),
-                (
-                    ["-name"],
-                    {
-                        "help": "node name pattern",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                ),
-                (
-                    ["-file"],
-                    {
-                        "help": "node list in a file",
-                        "action": "store",
-                        "type": str,
-                        "default": None,
-                    },
-                ),
-            ]
-        ),
+        arguments=PARGS(NODE_ARGS),
     )
     def dbaas_mount_dd(self):
         nodes = self.__get_nodes()
@@ -300,12 +199,12 @@ class SshOperationController(SshControllerChild):
                 False,
             ),
         ]
-        self.__node_run_cmds(scm, nodes, cmds, "node-mount.json")
+        self.__node_run_cmds(scm, nodes, cmds, "node-mount.jsonl")
 
     @ex(
         help="show action on dbaas",
         description="show action on dbaas",
-        example="beehive ssh ops dbaas-show-response node-check.json;beehive ssh ops dbaas-show-response node-check.json",
+        example="beehive ssh ops dbaas-show-response node-check.jsonl;beehive ssh ops dbaas-show-response node-mount.jsonl",
         arguments=PARGS(
             [
                 (
@@ -322,7 +221,10 @@ class SshOperationController(SshControllerChild):
     )
     def dbaas_show_response(self):
         file = self.app.pargs.file
-        res = read_file(file)
+        if file.endswith(".jsonl"):
+            res = {r["node"]: r["cmds"] for r in read_results(file)}
+        else:
+            res = read_file(file)
         for node, res in res.items():
             self.c(node, "underline")
             for cmd in res:
@@ -334,31 +236,36 @@ class SshOperationController(SshControllerChild):
                     print(msg)
                 # print('cmd: %s - status: %s - res: %s' % (cmd['cmd'], cmd['status'], cmd['res']))
 
-    @ex(help="check volumes", description="check volumes", arguments=PARGS([]))
+    @ex(help="check volumes", description="check volumes", arguments=PARGS(WORKERS_ARGS))
     def check_volume(self):
         data = load_config("/home/beehive3/volumes")
         data = data.split("\n")
-
-        self.__config_openstack_client()
-
+        volumes = []
         for item in data[2:]:
             items = item.split(",")
             if items[1].find("manila") >= 0:
                 continue
             if items[1].find("temp") >= 0:
                 continue
+            volumes.append(items)
+
+        self.__config_openstack_client()
 
+        # read openstack volumes with one paged list and resource volumes with concurrent requests
+        ops_volumes = {v["id"]: v for v in self.client.volume_v3.list_all(detail=True)}
+        res_volumes = self.lookup.get_volumes("/v1.0/nrs", [items[1] for items in volumes])
+
+        for items in volumes:
             print("-----------------------")
             print("openstack --- id: %s | name: %s" % (items[0], items[1]))
-            try:
-                ops_volume = self.client.volume_v3.get(items[0])
-            except Exception as ex:
-                self.app.error(ex)
-                ops_volume = None
-            if ops_volume is not None:
+            ops_volume = ops_volumes.get(items[0])
+            if ops_volume is None:
+                self.app.error("openstack volume %s not found" % items[0])
+            else:
                 try:
-                    uri = "/v1.0/nrs/openstack/volumes/%s" % items[1]
-                    res_volume = self.cmp_get(uri).get("volume")
+                    res_volume = res_volumes.get(items[1])
+                    if res_volume is None:
+                        raise Exception("resource volume %s not found" % items[1])
                     print("resource  --- id: %s | ext_id: %s" % (res_volume["id"], res_volume["ext_id"]))
                     if res_volume["ext_id"] != items[0]:
                         self.app.error("## ext_id wrong")
@@ -454,11 +361,7 @@ class SshOperationController(SshControllerChild):
             res_server = self.cmp_get(uri).get("server")
             volumes = res_server.get("details").pop("volumes", [])
             # get volumes
-            res_volumes = {}
-            for v in volumes:
-                uri = "/v1.0/nrs/openstack/volumes/%s" % v["name"]
-                res_volume = self.cmp_get(uri).get("volume")
-                res_volumes[v["name"]] = res_volume
+            res_volumes = self.lookup.get_volumes("/v1.0/nrs", [v["name"] for v in volumes])
 
             print("------------------------------------------------")
             print("physical openstack server")
@@ -515,7 +418,8 @@ class SshOperationController(SshControllerChild):
                         "default": None,
                     },
                 ),
-            ]
+            ],
+            WORKERS_ARGS,
         ),
     )
     def assign_dbaas_node_to_dbacsi(self):
@@ -566,24 +470,31 @@ class SshOperationController(SshControllerChild):
         self._meta.cmp = {"baseuri": "/v1.0/gas", "subsystem": "ssh"}
         self.configure_cmp_api_client()
 
+        # read node groups with concurrent requests and assign the missing roles concurrently
+        node_groups = self.lookup.get_node_groups(self.baseuri, dbaas)
+
+        def assign(node):
+            data = {"group": {"group_id": "DbaCsi", "role": "connect.root"}}
+            uri = "%s/nodes/%s/groups" % (self.baseuri, node)
+            return self.cmp_post(uri, data)
+
+        to_assign = []
         for d in dbaas:
+            groups = node_groups.get(d)
             print("node: %s" % d)
-
-            # check permission
-            has_role = False
-            try:
-                uri = "%s/nodes/%s/groups" % (self.baseuri, d)
-                res = self.cmp_get(uri)
-                for g in res.get("groups", []):
-                    print("  SSH - %s, %s" % (g.get("name"), g.get("role")))
-                    if g.get("name") == "DbaCsi" and g.get("role") == "connect.root":
-                        has_role = True
-
-                if has_role is False:
-                    # assign role to group
-                    data = {"group": {"group_id": "DbaCsi", "role": "connect.root"}}
-                    uri = "%s/nodes/%s/groups" % (self.baseuri, d)
-                    res = self.cmp_post(uri, data)
-            except Exception as ex:
-                print(ex)
+            if groups is None:
                 print("  SSH - not registered")
+                continue
+            has_role = False
+            for g in groups:
+                print("  SSH - %s, %s" % (g.get("name"), g.get("role")))
+                if g.get("name") == "DbaCsi" and g.get("role") == "connect.root":
+                    has_role = True
+            if has_role is False:
+                to_assign.append(d)
+
+        for d, res, err in run_concurrent(assign, to_assign, workers=self.app.pargs.workers):
+            if err is not None:
+                print("node: %s - assign DbaCsi error: %s" % (d, err))
+            else:
+                print("node: %s - assigned DbaCsi connect.root" % d)
@@ -0,0 +1,113 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+from beecell.remote import NotFoundException
+from beehive3_cli.core.util import chunks, run_concurrent
+
+
+class BulkLookup(object):
+    """Resolve many api entities with few requests. Entities are first searched with list queries of chunk ids
+    at a time, the ones not returned are read with concurrent get requests. Results are memoized for the life of
+    the lookup, so the same id is never requested twice.
+
+    :param controller: controller used to call the api
+    :param workers: number of concurrent requests [default=10]
+    :param chunk: number of ids of every list query [default=50]
+    """
+
+    def __init__(self, controller, workers: int = 10, chunk: int = 50):
+        self.controller = controller
+        self.workers = workers
+        self.chunk = chunk
+        self.cache = {}
+
+    def __list(self, uri: str, key: str, list_filter: str, oids: List[str]) -> List[dict]:
+        data = {list_filter: ",".join(oids), "size": len(oids), "page": 0}
+        return self.controller.cmp_get(uri, data=urlencode(data)).get(key, [])
+
+    def __get(self, uri: str, key: str, oid: str) -> Optional[dict]:
+        try:
+            return self.controller.cmp_get("%s/%s" % (uri, oid)).get(key)
+        except NotFoundException:
+            return None
+
+    def get_many(
+        self, uri: str, key: str, oids: List[str], list_key: str = None, list_filter: str = None
+    ) -> Dict[str, Optional[dict]]:
+        """get entities by id, uuid or name
+
+        :param uri: list uri. Ex. /v1.0/gas/nodes
+        :param key: response key of the get request. Ex. node
+        :param oids: list of id, uuid or name
+        :param list_key: response key of the list request. Ex. nodes [optional]
+        :param list_filter: list query param that accepts a comma separated list of names. If None only get
+            requests are used [optional]
+        :return: dict {oid: entity}. entity is None when it does not exist
+        """
+        res = {}
+        missing = []
+        for oid in oids:
+            if (uri, oid) in self.cache:
+                res[oid] = self.cache[(uri, oid)]
+            elif oid not in res:
+                res[oid] = None
+                missing.append(oid)
+
+        # list queries
+        if list_filter is not None and len(missing) > 0:
+            wanted = set(missing)
+            items = run_concurrent(
+                lambda c: self.__list(uri, list_key, list_filter, c), chunks(missing, self.chunk), self.workers
+            )
+            for chunk, entities, err in items:
+                if err is not None:
+                    self.controller.app.log.warning("bulk lookup of %s failed: %s" % (uri, err))
+                    continue
+                for entity in entities:
+                    for field in ("id", "uuid", "name"):
+                        value = str(entity.get(field))
+                        if value in wanted:
+                            res[value] = self.cache[(uri, value)] = entity
+            missing = [oid for oid in missing if res[oid] is None]
+            self.controller.app.log.debug("bulk lookup of %s: %s not found by list" % (uri, len(missing)))
+
+        # get requests of the entities not found
+        for oid, entity, err in run_concurrent(lambda o: self.__get(uri, key, o), missing, self.workers):
+            if err is not None:
+                self.controller.app.log.warning("get %s/%s failed: %s" % (uri, oid, err))
+                res[oid] = None
+                continue
+            res[oid] = self.cache[(uri, oid)] = entity
+        return res
+
+    def get_nodes(self, baseuri: str, oids: List[str]) -> Dict[str, Optional[dict]]:
+        """get ssh nodes by id, uuid or name"""
+        return self.get_many("%s/nodes" % baseuri, "node", oids, list_key="nodes", list_filter="names")
+
+    def get_volumes(self, baseuri: str, oids: List[str]) -> Dict[str, Optional[dict]]:
+        """get openstack volume resources by id, uuid or name"""
+        return self.get_many("%s/openstack/volumes" % baseuri, "volume", oids)
+
+    def get_node_groups(self, baseuri: str, oids: List[str]) -> Dict[str, Optional[List[dict]]]:
+        """get the groups of many ssh nodes with concurrent requests
+
+        :return: dict {oid: groups}. groups is None when the node is not registered
+        """
+        res = {}
+        missing = []
+        for oid in oids:
+            if ("groups", oid) in self.cache:
+                res[oid] = self.cache[("groups", oid)]
+            else:
+                missing.append(oid)
+        uri = "%s/nodes/%%s/groups" % baseuri
+        groups = run_concurrent(lambda o: self.controller.cmp_get(uri % o).get("groups", []), missing, self.workers)
+        for oid, items, err in groups:
+            if err is not None:
+                self.controller.app.log.warning("get node %s groups failed: %s" % (oid, err))
+                items = None
+            res[oid] = self.cache[("groups", oid)] = items
+        return res
@@ -0,0 +1,113 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from os import path
+from time import time
+from typing import Generator, List, Set, Tuple
+from ujson import dumps, loads
+from beehive3_cli.core.util import run_concurrent
+
+
+def cmd_status(res: dict, noresult: bool = False) -> bool:
+    """get the status of a command result. A command fails when it writes on stderr or when it does not write on
+    stdout, unless noresult is True"""
+    if res.get("stderr", "") != "":
+        return False
+    return len(res.get("stdout", [])) > 0 or noresult is True
+
+
+def read_results(filename: str) -> List[dict]:
+    """read the node results of a runbook file. Every line is the json result of a node"""
+    res = []
+    with open(filename, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line != "":
+                res.append(loads(line))
+    return res
+
+
+class NodeRunbook(object):
+    """Run a list of commands on many nodes. Every node runs its commands in order with a single connection setup
+    and stops at the first command that fails, nodes run concurrently. The result of every node is appended to a
+    json lines file as soon as the node ends, so the results of the ended nodes are not lost if the run is
+    interrupted and a new run with resume skips the nodes already successful.
+
+    :param scm: SshConnectionManager instance
+    :param cmds: list of (command, noresult). With noresult True an empty stdout is not an error
+    :param out_file: json lines result file
+    :param workers: number of nodes run concurrently [default=10]
+    :param timeout: timeout of every command [default=30.0]
+    :param user: ssh user [default=root]
+    """
+
+    def __init__(self, scm, cmds: List[Tuple[str, bool]], out_file: str, workers=10, timeout=30.0, user="root"):
+        self.scm = scm
+        self.cmds = cmds
+        self.out_file = out_file
+        self.workers = workers
+        self.timeout = timeout
+        self.user = user
+
+    def get_successful(self) -> Set[str]:
+        """get the names of the nodes successful in the result file"""
+        if path.exists(self.out_file) is False:
+            return set()
+        return {r["node"] for r in read_results(self.out_file) if r.get("status") is True}
+
+    def run_node(self, node: dict) -> dict:
+        """run the commands on a node
+
+        :param node: node
+        :return: dict with node, ip_address, status, error, elapsed and cmds
+        """
+        start = time()
+
+        def check(idx, res):
+            return cmd_status(res, noresult=self.cmds[idx][1])
+
+        try:
+            items = self.scm.sshcmds2node(
+                node=node, user=self.user, cmds=[c[0] for c in self.cmds], timeout=self.timeout, check=check
+            )
+        except Exception as ex:
+            items = [{"stderr": str(ex)}]
+        cmds = []
+        for (cmd, noresult), res in zip(self.cmds, items):
+            cmds.append({"cmd": cmd, "res": res, "status": cmd_status(res, noresult=noresult)})
+        error = None
+        status = len(cmds) == len(self.cmds) and all(c["status"] for c in cmds)
+        if status is False:
+            error = cmds[-1]["res"].get("stderr") if len(cmds) > 0 else None
+        return {
+            "node": node["name"],
+            "ip_address": node.get("ip_address"),
+            "status": status,
+            "error": error,
+            "elapsed": round(time() - start, 2),
+            "cmds": cmds,
+        }
+
+    def run(self, nodes: List[dict], resume: bool = False) -> Generator[dict, None, None]:
+        """run the commands on the nodes and write the node results in the result file
+
+        :param nodes: list of nodes
+        :param resume: if True skip the nodes successful in the result file and append to it [default=False]
+        :return: generator of node results in completion order
+        """
+        if resume is True:
+            done = self.get_successful()
+            nodes = [n for n in nodes if n["name"] not in done]
+            mode = "a"
+        else:
+            mode = "w"
+
+        with open(self.out_file, mode) as f:
+            for node, res, err in run_concurrent(self.run_node, nodes, workers=self.workers):
+                if err is not None:
+                    res = {"node": node["name"], "ip_address": node.get("ip_address"), "status": False}
+                    res.update({"error": str(err), "elapsed": 0, "cmds": []})
+                f.write(dumps(res) + "\n")
+                f.flush()
+                yield res
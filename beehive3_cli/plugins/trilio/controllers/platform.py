@@ -3,7 +3,7 @@
 # (C) Copyright 2018-2024 CSI-Piemonte
 
 from sys import stdout
-from datetime import datetime
+from datetime import datetime, timedelta
 from time import sleep
 from cement import ex
 from beecell.types.type_string import str2bool
@@ -12,7 +12,7 @@ from beecell.types.type_list import merge_list
 from beedrones.openstack.client import OpenstackManager
 from beedrones.trilio.client import TrilioManager
 from beehive3_cli.core.controller import BaseController, BASE_ARGS
-from beehive3_cli.core.util import load_environment_config, load_config, rotating_bar
+from beehive3_cli.core.util import load_environment_config, load_config, rotating_bar, run_concurrent, reduce_latest
 
 
 def OPENSTACK_ARGS(*list_args):
@@ -286,33 +286,80 @@ class TrilioPlatformController(BaseController):
         fields = ["id", "name", "description", "project_id", "status", "created_at"]
         self.app.render(res, headers=headers, fields=fields)
 
+    def __latest_snapshots(self, latest, works, window, max_days=3650):
+        """find the newest snapshot of every workload reading snapshots by time window, from now backwards. The
+        walk stops when every workload has a snapshot or the window is older than the creation of the workloads
+        still without snapshots, so only one window of snapshots is in memory at a time. Workloads without creation
+        date get a snapshot only if it is in the windows read for the other workloads.
+
+        :param latest: dict {workload_id: snapshot} already found
+        :param works: workloads
+        :param window: window size in days
+        :param max_days: max days walked backwards [default=3650]
+        """
+        date_format = "%Y-%m-%dT%H:%M:%S"
+        date_to = datetime.today() + timedelta(days=1)
+        date_min = date_to - timedelta(days=max_days)
+        while date_to > date_min:
+            missing = [w.get("created_at") for w in works if w["id"] not in latest and w.get("created_at")]
+            if len(missing) == 0 or date_to.strftime(date_format) < min(missing):
+                break
+            date_from = date_to - timedelta(days=window)
+            snaps = self.client.snapshot.list(
+                all=True, date_from=date_from.strftime(date_format), date_to=date_to.strftime(date_format)
+            )
+            self.app.log.debug("read %s snapshots from %s to %s" % (len(snaps), date_from, date_to))
+            reduce_latest(snaps, "workload_id", "created_at", latest=latest)
+            date_to = date_from
+
     @ex(
         help="display workloads status with the last snapshot",
-        description="display workloads status with the last snapshot",
-        arguments=OPENSTACK_ARGS(),
+        description="display workloads status with the last snapshot. Snapshots are read by time window from now "
+        "backwards until the last snapshot of every workload is found. Use -window 0 to read all the snapshots with "
+        "a single request",
+        arguments=OPENSTACK_ARGS(
+            [
+                (
+                    ["-window"],
+                    {
+                        "help": "snapshot time window in days [default=30]",
+                        "action": "store",
+                        "type": int,
+                        "default": 30,
+                    },
+                ),
+            ]
+        ),
     )
     def workload_status(self):
-        works = self.client.workload.list(all=True)
-        snaps = self.client.snapshot.list(all=True)
-        projects = self.oclient.project.list()
+        window = self.app.pargs.window
+        listings = {
+            "works": lambda: self.client.workload.list(all=True),
+            "projects": lambda: self.oclient.project.list(),
+        }
+        if window <= 0:
+            listings["snaps"] = lambda: self.client.snapshot.list(all=True)
 
-        works_idx = {w["id"]: w for w in works}
-        projects_idx = {w["id"]: w for w in projects}
+        # fetch listings concurrently
+        res = {}
+        for key, value, err in run_concurrent(lambda k: listings[k](), list(listings.keys()), workers=3):
+            if err is not None:
+                raise err
+            res[key] = value
+        works = res["works"]
+        projects_idx = {p["id"]: p.get("name") for p in res["projects"]}
+
+        # newest snapshot of every workload
+        latest = reduce_latest(res.pop("snaps", []), "workload_id", "created_at")
+        if window > 0:
+            self.__latest_snapshots(latest, works, window)
 
-        for snap in snaps:
-            workload_id = snap["workload_id"]
-            try:
-                works_idx[workload_id]["snaps"].append(snap)
-            except:
-                works_idx[workload_id]["snaps"] = [snap]
         for work in works:
-            work["snap_status"] = dict_get(work, "snaps.-1.status")
-            work["snap_date"] = dict_get(work, "snaps.-1.created_at")
-            work["snap_type"] = dict_get(work, "snaps.-1.snapshot_type")
-            try:
-                work["project_name"] = projects_idx[work["project_id"]]["name"]
-            except:
-                work["project_name"] = None
+            snap = latest.get(work["id"], {})
+            work["snap_status"] = snap.get("status")
+            work["snap_date"] = snap.get("created_at")
+            work["snap_type"] = snap.get("snapshot_type")
+            work["project_name"] = projects_idx.get(work["project_id"])
 
         headers = [
             "id",
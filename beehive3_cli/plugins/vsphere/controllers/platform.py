@@ -11,7 +11,8 @@ from beecell.types.type_list import merge_list
 from beecell.types.type_date import format_date
 from beecell.types.type_dict import dict_get
 from beehive3_cli.core.controller import BaseController, BASE_ARGS, StringAction
-from beehive3_cli.core.util import load_environment_config, load_config, rotating_bar
+from beehive3_cli.core.util import load_environment_config, load_config, rotating_bar, run_concurrent
+from beehive3_cli.plugins.ssh.util.lookup import BulkLookup
 
 
 def VSPHERE_ARGS(*list_args):
@@ -7766,43 +7767,53 @@ class VspherePlatformController(BaseController):
                         "default": None,
                     },
                 ),
+                (
+                    ["-workers"],
+                    {
+                        "help": "number of concurrent requests [default=10]",
+                        "action": "store",
+                        "type": int,
+                        "default": 10,
+                    },
+                ),
             ]
         ),
     )
     def edge_lb_virt_server_add_account_desc(self):
-        def get_account_desc_by_params(controller, params):
-            nodes_uri = "%s/nodes" % controller.api.baseuri
-            for item in params:
-                nodes = controller.cmp_get(nodes_uri, data=item).get("nodes", [])
-                if len(nodes) < 1:
-                    continue
-                for node in nodes:
-                    node_uri = node["__meta__"]["uri"]
-                    enr_node = controller.cmp_get(node_uri)
-                    enr_nodes = enr_node.get("node", [])
-                    enr_groups = enr_nodes.get("groups", [])
-                    if len(enr_groups) < 1:
-                        continue
-                    enr_group = enr_groups[0]
-                    account = enr_group["name"]
-                    return account
-            return None
-
-        def add_edge_account(controller, edge_pool_vs, edge_id):
-            pool_vs = edge_pool_vs[edge_id]
-            pool_d = {p["poolId"]: p for p in net_nsx_lb.pool_list(edge_id)}
-            for pool_id in pool_vs.keys():
-                vs = pool_vs[pool_id]
-                pool = pool_d[pool_id]
-                params = [
-                    {"ip_address": a["ipAddress"], "names": a["name"]}
-                    for a in pool.get("member", [])
-                    if a.get("condition") == "enabled"
-                ]
-                if len(params) < 1:
-                    self.app.log.debug("Skip %s %s it has no enabled ip in pool %s" % (edge_id, vs_id, pool_id))
-                account_desc = get_account_desc_by_params(controller, params)
-                vs["account"] = account_desc
+        def get_member_nodes(lookup, baseuri, members):
+            """resolve the pool members (ip_address, name) to ssh nodes. Members are searched by name with bulk
+            list requests, the ones not found or with a different ip address are searched one by one concurrently
+            """
+            res = {}
+            by_name = lookup.get_nodes(baseuri, list({m[1] for m in members}))
+            missing = []
+            for member in members:
+                node = by_name.get(member[1])
+                if node is not None and node.get("ip_address") == member[0]:
+                    res[member] = [node]
+                else:
+                    missing.append(member)
+
+            def find(member):
+                data = {"ip_address": member[0], "names": member[1]}
+                return self.cmp_get("%s/nodes" % baseuri, data=data).get("nodes", [])
+
+            for member, nodes, err in run_concurrent(find, missing, workers=lookup.workers):
+                if err is not None:
+                    self.app.log.warning("Search node %s %s failed: %s" % (member[0], member[1], err))
+                    nodes = []
+                res[member] = nodes
+            return res
+
+        def get_node_accounts(lookup, baseuri, member_nodes):
+            """get the account of every node, that is the name of its first group"""
+            node_ids = {str(n["id"]) for nodes in member_nodes.values() for n in nodes}
+            details = lookup.get_many("%s/nodes" % baseuri, "node", list(node_ids))
+            res = {}
+            for node_id, node in details.items():
+                groups = node.get("groups", []) if node is not None else []
+                res[node_id] = groups[0]["name"] if len(groups) > 0 else None
+            return res
 
         def update_vs_descriptions(edge_pool_vs):
             for edge_id in edge_pool_vs:
@@ -7822,10 +7833,9 @@ class VspherePlatformController(BaseController):
                     self.app.log.debug("Update %s %s with account %s" % (edge_id, vs_id, account))
                     pool = net_nsx_lb.virt_server_update(edge_id, vs_id, **params)
 
-        from beehive3_cli.core.cmp_api_client import CmpApiClient
-
         edge_id = getattr(self.app.pargs, "edge", None)
         virt_srv_id = getattr(self.app.pargs, "id", None)
+        workers = getattr(self.app.pargs, "workers", 10)
         net_nsx_edge = self.client.network.nsx.edge
         net_nsx_lb = net_nsx_edge.lb
         edge_ids = []
@@ -7856,6 +7866,31 @@ class VspherePlatformController(BaseController):
                     "virtualServerId": vs_id,
                     "virtualServerDescription": vs_description,
                 }
+
+        # gather the enabled members of all the pools
+        pool_members = {}
+        for edge_id, pools, err in run_concurrent(
+            lambda e: {p["poolId"]: p for p in net_nsx_lb.pool_list(e)}, list(edge_pool_vs.keys()), workers=workers
+        ):
+            if err is not None:
+                self.app.log.warning("Get edge %s pools failed: %s" % (edge_id, err))
+                edge_pool_vs.pop(edge_id)
+                continue
+            for pool_id, vs in edge_pool_vs[edge_id].items():
+                members = [
+                    (a["ipAddress"], a["name"])
+                    for a in pools.get(pool_id, {}).get("member", [])
+                    if a.get("condition") == "enabled"
+                ]
+                if len(members) < 1:
+                    self.app.log.debug(
+                        "Skip %s %s it has no enabled ip in pool %s" % (edge_id, vs["virtualServerId"], pool_id)
+                    )
+                pool_members[(edge_id, pool_id)] = members
+
+        # resolve nodes and accounts of all the members with a single ssh api client
+        from beehive3_cli.core.cmp_api_client import CmpApiClient
+
         cmp = {"baseuri": "/v1.0/gas", "subsystem": "ssh"}
         self.api = CmpApiClient(
             self.app,
@@ -7863,8 +7898,20 @@ class VspherePlatformController(BaseController):
             cmp.get("baseuri"),
             self.key,
         )
-        for edge_id in edge_pool_vs:
-            add_edge_account(self, edge_pool_vs, edge_id)
+        lookup = BulkLookup(self, workers=workers)
+        members = list({m for items in pool_members.values() for m in items})
+        member_nodes = get_member_nodes(lookup, self.api.baseuri, members)
+        node_accounts = get_node_accounts(lookup, self.api.baseuri, member_nodes)
+
+        for (edge_id, pool_id), items in pool_members.items():
+            account = None
+            for member in items:
+                accounts = [node_accounts.get(str(n["id"])) for n in member_nodes.get(member, [])]
+                accounts = [a for a in accounts if a is not None]
+                if len(accounts) > 0:
+                    account = accounts[0]
+                    break
+            edge_pool_vs[edge_id][pool_id]["account"] = account
         update_vs_descriptions(edge_pool_vs)
 
     @ex(
@@ -0,0 +1,175 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+"""
+CMP api client end to end benchmark.
+
+Run representative command paths of CmpApiClient and BaseController against the local mock CMP api of
+benchmarks/mockcmp.py: a full list, a paged list with cmp_get_pages, create and wait task with cmp_post and a bulk
+delete with cmp_bulk. For every scenario print wall time, number of api requests by kind and peak python memory.
+
+Usage: python benchmarks/cmp.py [-entities N] [-latency MS] [-task-time MS] [-workers N] [-json]
+"""
+
+import logging
+import sys
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from os import devnull, path
+from threading import Lock, get_ident, local
+from time import perf_counter
+from urllib.parse import urlencode
+from ujson import dumps
+
+sys.path.insert(0, path.dirname(path.abspath(__file__)))
+
+from mockcmp import MockCmp, MockCmpApiManager, MockCmpServer
+from bee_client.client import CmpApiClientError
+from beehive3_cli.core import cmp_api_client
+from beehive3_cli.core.cmp_api_client import CmpApiClient
+from beehive3_cli.core.controller import BaseController
+
+URI = "/v1.0/nrs/entities"
+
+
+class BenchApp(object):
+    """Minimal cement app used by CmpApiClient and BaseController"""
+
+    def __init__(self, pargs):
+        self.pargs = pargs
+        self.log = logging.getLogger("bench")
+        self.curl = False
+        self.curl_error = False
+        self.env = "bench"
+
+    def error(self, msg):
+        self.log.error(msg)
+
+
+class BenchController(BaseController):
+    class Meta:
+        label = "bench"
+        cmp = {"baseuri": "/v1.0/nrs", "subsystem": "resource"}
+
+
+def make_controller(endpoint, pargs):
+    """make a controller with an api client connected to the mock server, without environment config and token"""
+    app = BenchApp(pargs)
+    api = CmpApiClient.__new__(CmpApiClient)
+    api.app = app
+    api.subsystem = "resource"
+    api.baseuri = "/v1.0/nrs"
+    api.prefixuri = None
+    api.key = None
+    api.config = {}
+    api._token_lock = Lock()
+    api.response_cache = None
+    api._owner = get_ident()
+    api._local = local()
+    api._new_client = lambda: MockCmpApiManager(endpoint, error_class=CmpApiClientError)
+    api.client = api._new_client()
+
+    controller = BenchController()
+    controller.app = app
+    controller.api = api
+    controller.format = "json"
+    controller.aliases = None
+    controller.key = None
+    return controller
+
+
+def scenario_list(controller, args):
+    res = controller.cmp_get(URI, data=urlencode({"size": -1}))
+    return len(res["resources"])
+
+
+def scenario_paged_list(controller, args):
+    pages = {}
+    controller.app.pargs.size = -args.pagesize
+    data = urlencode({"page": 0, "size": -args.pagesize})
+    controller.cmp_get_pages(URI, data=data, pagesize=args.pagesize, fn_render=lambda c, r, page=0: pages.update(r))
+    return len(pages.get("resources", []))
+
+
+def scenario_create_and_wait(controller, args):
+    for i in range(args.creates):
+        controller.cmp_post(URI, data={"resource": {"name": "bench-%s" % i}}, delta=args.delta)
+    return args.creates
+
+
+def scenario_bulk_delete(controller, args):
+    res = controller.cmp_get(URI, data=urlencode({"size": args.deletes}))
+    oids = [r["uuid"] for r in res["resources"]]
+    report = controller.cmp_bulk(
+        "DELETE", oids, lambda oid: ("%s/%s" % (URI, oid), ""), workers=args.workers, delta=args.delta
+    )
+    return len([r for r in report if r["status"] == "SUCCESS"])
+
+
+SCENARIOS = [
+    ("list", scenario_list),
+    ("paged list", scenario_paged_list),
+    ("create and wait", scenario_create_and_wait),
+    ("bulk delete", scenario_bulk_delete),
+]
+
+
+def run(name, fn, controller, cmp, args):
+    before = cmp.get_counters()
+    tracemalloc.start()
+    start = perf_counter()
+    items = fn(controller, args)
+    elapsed = perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    after = cmp.get_counters()
+    requests = {k: v - before.get(k, 0) for k, v in after.items() if v - before.get(k, 0) > 0}
+    return {
+        "scenario": name,
+        "items": items,
+        "wall_ms": round(elapsed * 1000, 1),
+        "requests": sum(requests.values()),
+        "peak_kb": round(peak / 1024, 1),
+        "by_kind": requests,
+    }
+
+
+def main():
+    parser = ArgumentParser(description="CMP api client benchmark against a local mock api")
+    parser.add_argument("-entities", type=int, default=2000, help="entities of the mock collection")
+    parser.add_argument("-latency", type=float, default=5, help="latency of every request in ms")
+    parser.add_argument("-task-time", type=float, default=200, dest="task_time", help="task duration in ms")
+    parser.add_argument("-pagesize", type=int, default=100, help="page size of the paged list")
+    parser.add_argument("-creates", type=int, default=5, help="resources created and waited one by one")
+    parser.add_argument("-deletes", type=int, default=100, help="resources deleted by the bulk delete")
+    parser.add_argument("-workers", type=int, default=10, help="concurrent requests of the bulk delete")
+    parser.add_argument("-delta", type=float, default=0.1, help="task poll interval in s")
+    parser.add_argument("-json", action="store_true", help="print results as json lines")
+    args = parser.parse_args()
+
+    cmp = MockCmp(entities=args.entities, latency=args.latency / 1000, task_time=args.task_time / 1000)
+    server = MockCmpServer(cmp).start()
+    controller = make_controller(server.endpoint, Namespace(size=None, assumeyes=True, format="json"))
+
+    # hide task wait progress
+    cmp_api_client.stdout = open(devnull, "w")
+    try:
+        for name, fn in SCENARIOS:
+            res = run(name, fn, controller, cmp, args)
+            if args.json is True:
+                print(dumps(res))
+            else:
+                kinds = ", ".join("%s: %s" % (k, v) for k, v in sorted(res["by_kind"].items()))
+                print(
+                    "%-16s %6s items %10.1f ms %6s requests %10.1f KiB peak   %s"
+                    % (name, res["items"], res["wall_ms"], res["requests"], res["peak_kb"], kinds)
+                )
+    finally:
+        cmp_api_client.stdout.close()
+        cmp_api_client.stdout = sys.stdout
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
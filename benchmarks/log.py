@@ -0,0 +1,77 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+"""
+Log pipeline micro-benchmark.
+
+Measure the overhead of a log call seen by the caller with a synchronous file handler and with the queue handler
+used by the async log pipeline, and the cost of an eager formatted payload compared with LazyFormat when the log
+level is disabled.
+
+Usage: python benchmarks/log.py [calls]
+"""
+
+import sys
+import logging
+import logging.handlers
+from queue import Queue
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from beecell.simple import truncate
+from beehive3_cli.core.log import CliQueueHandler, LazyFormat
+
+FORMAT = "%(asctime)s - %(levelname)s - %(name)s.%(funcName)s:%(lineno)d - %(message)s"
+PAYLOAD = {"hits": {"hits": [{"_id": i, "_source": {"message": "x" * 200, "host": "node-%s" % i}} for i in range(200)]}}
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = []
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler.setFormatter(logging.Formatter(FORMAT))
+    logger.addHandler(handler)
+    return logger
+
+
+def per_call(logger, calls, level=logging.DEBUG, lazy=False, payload=True):
+    start = perf_counter()
+    for i in range(calls):
+        if payload is False:
+            logger.log(level, "get task %s status: %s", i, "SUCCESS")
+        elif lazy is True:
+            logger.log(level, "query result %s: %s", i, LazyFormat(truncate, PAYLOAD, size=10000))
+        else:
+            logger.log(level, "query result %s: %s" % (i, truncate(PAYLOAD, size=10000)))
+    return (perf_counter() - start) / calls * 1000000
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    with TemporaryDirectory() as tmp:
+        sync_logger = make_logger("bench.sync", logging.FileHandler("%s/sync.log" % tmp))
+        print("sync file handler            %8.1f us/call" % per_call(sync_logger, calls, payload=False))
+        print("sync file handler, payload   %8.1f us/call" % per_call(sync_logger, calls, lazy=True))
+
+        queue = Queue(-1)
+        file_handler = logging.FileHandler("%s/async.log" % tmp)
+        file_handler.setFormatter(logging.Formatter(FORMAT))
+        listener = logging.handlers.QueueListener(queue, file_handler)
+        listener.start()
+        async_logger = make_logger("bench.async", CliQueueHandler(queue))
+        print("queue handler                %8.1f us/call" % per_call(async_logger, calls, payload=False))
+        print("queue handler, payload       %8.1f us/call" % per_call(async_logger, calls, lazy=True))
+        start = perf_counter()
+        listener.stop()
+        print("queue drain at close         %8.1f ms" % ((perf_counter() - start) * 1000))
+        file_handler.close()
+
+        async_logger.setLevel(logging.INFO)
+        print("disabled level, eager format %8.1f us/call" % per_call(async_logger, calls))
+        print("disabled level, LazyFormat   %8.1f us/call" % per_call(async_logger, calls, lazy=True))
+
+
+if __name__ == "__main__":
+    main()
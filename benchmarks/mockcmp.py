@@ -0,0 +1,347 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+"""
+Local mock of the CMP api.
+
+MockCmp serves entity collections built from recorded fixtures with the api pagination, create, update and delete
+requests that start async tasks and the worker task status and trace requests, with a configurable latency and
+task duration. MockCmpServer exposes it over http on localhost and MockCmpApiManager is a drop in replacement of
+the bee_client CmpApiManager used by CmpApiClient, that sends the api requests to the mock server without
+authentication.
+
+Usage: python benchmarks/mockcmp.py [port] [latency_ms] [task_ms]
+"""
+
+import sys
+from copy import deepcopy
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+from threading import Lock, Thread, local
+from time import sleep, time
+from urllib.parse import parse_qs, urlencode, urlsplit
+from uuid import uuid4
+from ujson import dumps, loads
+
+FIXTURES = path.join(path.dirname(path.abspath(__file__)), "fixtures", "cmp.json")
+
+
+class MockCmp(object):
+    """In memory CMP api.
+
+    :param fixtures: fixtures file with collections and static responses [default=benchmarks/fixtures/cmp.json]
+    :param entities: number of entities generated in every collection [default=1000]
+    :param latency: seconds added to every request [default=0]
+    :param task_time: seconds before a task ends [default=0]
+    :param task_failure: every task_failure-th task fails, 0 means no task fails [default=0]
+    """
+
+    def __init__(self, fixtures=FIXTURES, entities=1000, latency=0.0, task_time=0.0, task_failure=0):
+        with open(fixtures, "r") as f:
+            data = loads(f.read())
+        self.latency = latency
+        self.task_time = task_time
+        self.task_failure = task_failure
+        self.lock = Lock()
+        self.static = {(r["method"], r["uri"]): r["response"] for r in data.get("responses", [])}
+        self.collections = {}
+        for collection in data.get("collections", []):
+            items = {}
+            for i in range(entities):
+                item = self.__make_item(collection, i)
+                items[item["uuid"]] = item
+            self.collections[collection["uri"]] = {
+                "uri": collection["uri"],
+                "list_key": collection["list_key"],
+                "key": collection["key"],
+                "template": collection["template"],
+                "items": items,
+                "next_id": entities,
+            }
+        self.tasks = {}
+        self.counters = {}
+
+    @staticmethod
+    def __make_item(collection, idx):
+        item = deepcopy(collection["template"])
+        item["id"] = idx + 1
+        item["uuid"] = str(uuid4())
+        item["name"] = "%s-%s" % (collection["template"].get("name", "item"), idx + 1)
+        if "__meta__" in item:
+            item["__meta__"]["uri"] = "%s/%s" % (collection["uri"], item["id"])
+        return item
+
+    def count(self, method, kind):
+        with self.lock:
+            key = "%s %s" % (method, kind)
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def get_counters(self):
+        with self.lock:
+            return dict(self.counters)
+
+    def __start_task(self):
+        with self.lock:
+            taskid = str(uuid4())
+            failure = self.task_failure > 0 and (len(self.tasks) + 1) % self.task_failure == 0
+            self.tasks[taskid] = {"start": time(), "failure": failure}
+        return taskid
+
+    def __task_status(self, taskid):
+        task = self.tasks.get(taskid)
+        if task is None:
+            return None
+        if time() - task["start"] < self.task_time:
+            return "STARTED"
+        return "FAILURE" if task["failure"] is True else "SUCCESS"
+
+    def __find(self, uri):
+        """find the collection of an uri. Return collection, item id"""
+        if uri in self.collections:
+            return self.collections[uri], None
+        base, _, oid = uri.rpartition("/")
+        if base in self.collections:
+            return self.collections[base], oid
+        return None, None
+
+    def __get_item(self, collection, oid):
+        item = collection["items"].get(oid)
+        if item is None:
+            for i in collection["items"].values():
+                if oid in (str(i["id"]), i["name"]):
+                    return i
+        return item
+
+    def __list(self, collection, query):
+        items = list(collection["items"].values())
+        size = int(query.get("size", 10))
+        page = int(query.get("page", 0))
+        total = len(items)
+        if size >= 0:
+            items = items[page * size : (page + 1) * size]
+        return {
+            collection["list_key"]: items,
+            "count": len(items),
+            "page": page,
+            "total": total,
+            "sort": {"field": "id", "order": "desc"},
+        }
+
+    def request(self, method, uri, query, body):
+        """run a request
+
+        :param method: http method
+        :param uri: request path
+        :param query: dict with query params
+        :param body: request body
+        :return: (http status, response)
+        """
+        if self.latency > 0:
+            sleep(self.latency)
+
+        if (method, uri) in self.static:
+            self.count(method, "static")
+            return 200, self.static[(method, uri)]
+
+        parts = uri.split("/")
+        if len(parts) == 7 and parts[3:5] == ["worker", "tasks"]:
+            self.count(method, "task %s" % parts[6])
+            status = self.__task_status(parts[5])
+            if status is None:
+                return 404, {"code": 404, "message": "task %s not found" % parts[5]}
+            if parts[6] == "status":
+                return 200, {"task_instance": {"uuid": parts[5], "status": status}}
+            return 200, {"task_trace": [{"message": "task %s %s" % (parts[5], status)}]}
+
+        collection, oid = self.__find(uri)
+        if collection is None:
+            self.count(method, "not found")
+            return 404, {"code": 404, "message": "uri %s not found" % uri}
+
+        if oid is None and method == "GET":
+            self.count(method, "list")
+            with self.lock:
+                return 200, self.__list(collection, query)
+        if oid is None and method == "POST":
+            self.count(method, "create")
+            with self.lock:
+                item = self.__make_item(collection, collection["next_id"])
+                collection["next_id"] += 1
+                collection["items"][item["uuid"]] = item
+            return 202, {"uuid": item["uuid"], "taskid": self.__start_task()}
+
+        with self.lock:
+            item = self.__get_item(collection, oid)
+        if item is None:
+            self.count(method, "not found")
+            return 404, {"code": 404, "message": "%s %s not found" % (collection["key"], oid)}
+        if method == "GET":
+            self.count(method, "get")
+            return 200, {collection["key"]: item}
+        if method in ["PUT", "PATCH"]:
+            self.count(method, "update")
+            return 202, {"uuid": item["uuid"], "taskid": self.__start_task()}
+        if method == "DELETE":
+            self.count(method, "delete")
+            with self.lock:
+                collection["items"].pop(item["uuid"], None)
+            return 202, {"uuid": item["uuid"], "taskid": self.__start_task()}
+        self.count(method, "not allowed")
+        return 405, {"code": 405, "message": "method %s not allowed" % method}
+
+
+class MockCmpHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, without TCP_NODELAY keep alive responses wait for delayed acks
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def __handle(self, method):
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length", 0))
+        body = loads(self.rfile.read(length)) if length > 0 else None
+        status, res = self.server.cmp.request(method, url.path, query, body)
+        data = dumps(res).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.__handle("GET")
+
+    def do_POST(self):
+        self.__handle("POST")
+
+    def do_PUT(self):
+        self.__handle("PUT")
+
+    def do_PATCH(self):
+        self.__handle("PATCH")
+
+    def do_DELETE(self):
+        self.__handle("DELETE")
+
+
+class MockCmpServer(object):
+    """Http server of a MockCmp on localhost
+
+    :param cmp: MockCmp instance
+    :param port: listen port. 0 select a free port [default=0]
+    """
+
+    def __init__(self, cmp, port=0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), MockCmpHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.cmp = cmp
+        self.thread = None
+
+    @property
+    def endpoint(self):
+        return "http://%s:%s" % self.httpd.server_address[:2]
+
+    def start(self):
+        self.thread = Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class MockCmpApiError(Exception):
+    def __init__(self, value, code):
+        super().__init__(value)
+        self.value = value
+        self.code = code
+
+
+class MockCmpApiManager(object):
+    """Replacement of the bee_client CmpApiManager that sends the requests to a MockCmpServer. Every thread keeps
+    its own keep alive connection, as the http sessions of the real client.
+
+    :param endpoint: mock server endpoint. Ex. http://127.0.0.1:8080
+    :param error_class: exception class raised for http errors, with value and code attributes
+    """
+
+    def __init__(self, endpoint, error_class=MockCmpApiError):
+        url = urlsplit(endpoint)
+        self.host = url.hostname
+        self.port = url.port
+        self.error_class = error_class
+        self.timeout = 60
+        self.local = local()
+
+    def set_print_curl(self, value):
+        pass
+
+    def set_timeout(self, timeout):
+        self.timeout = timeout
+
+    def set_debug(self, value):
+        pass
+
+    def get_curl_request(self):
+        return None
+
+    def get_token(self):
+        return {"token": None, "seckey": None}
+
+    def set_token(self, token, seckey=None):
+        pass
+
+    def __connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def api_request(self, subsystem, uri, method, data="", headers=None):
+        body = None
+        if method == "GET":
+            if isinstance(data, dict):
+                data = urlencode(data)
+            if data:
+                uri = "%s?%s" % (uri, data)
+        elif data:
+            body = data if isinstance(data, str) else dumps(data)
+
+        req_headers = {"Content-Type": "application/json"}
+        req_headers.update(headers or {})
+        conn = self.__connection()
+        try:
+            conn.request(method, uri, body=body, headers=req_headers)
+            resp = conn.getresponse()
+            res = loads(resp.read() or "null")
+        except Exception:
+            conn.close()
+            self.local.conn = None
+            raise
+        if resp.status >= 400:
+            err = self.error_class(res.get("message"), resp.status)
+            err.value, err.code = res.get("message"), resp.status
+            raise err
+        return res
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0
+    task_time = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.0
+    server = MockCmpServer(MockCmp(latency=latency, task_time=task_time), port=port)
+    print("mock cmp api listening on %s" % server.endpoint)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
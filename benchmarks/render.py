@@ -0,0 +1,122 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+"""
+Tabular rendering micro-benchmark.
+
+Compare the old per row rendering of the tabular output handlers with the compiled column plan, with and without
+the streaming row writer.
+
+Usage: python benchmarks/render.py [rows] [repeat]
+"""
+
+import sys
+from os import devnull
+from time import perf_counter
+from tabulate import tabulate
+from beecell.simple import truncate
+from beehive3_cli.core.table_plan import ColumnPlan, TableStreamWriter
+
+FIELDS = ["id", "uuid", "name", "container", "parent", "active", "base_state", "date.creation", "__meta__.definition"]
+
+
+def make_rows(num):
+    return [
+        {
+            "id": i,
+            "uuid": "6f1a2b3c-0000-4000-8000-%012d" % i,
+            "name": "resource-%s-%s" % (i, "x" * (i % 60)),
+            "container": i % 10,
+            "parent": None if i % 3 == 0 else i - 1,
+            "active": True,
+            "base_state": "ACTIVE",
+            "date": {"creation": "2024-01-01T00:00:00Z", "modified": "2024-01-02T00:00:00Z"},
+            "__meta__": {"definition": "Provider.ComputeZone.ComputeInstance"},
+        }
+        for i in range(num)
+    ]
+
+
+def multi_get(data, key, separator="."):
+    keys = key.split(separator)
+    res = data
+    for k in keys:
+        if isinstance(res, list):
+            try:
+                res = res[int(k)]
+            except:
+                res = {}
+        else:
+            if res is not None:
+                res = res.get(k, {})
+    if res is None or res == {}:
+        res = "-"
+    return res
+
+
+def legacy_rows(values, fields, transform, maxsize):
+    table = []
+    for item in values:
+        raw = [multi_get(item, key) for key in fields]
+        base_transform = {"base_state": str.lower, "state": str.lower, "status": str.lower}
+        base_transform.update(transform)
+        for k, func in base_transform.items():
+            try:
+                raw_item = fields.index(k)
+                raw[raw_item] = func(raw[raw_item])
+            except ValueError:
+                pass
+        table.append(list(map(lambda x: truncate(x, maxsize, replace_new_line=False), raw)))
+    return table
+
+
+def plan_rows(values, fields, transform, maxsize):
+    base_transform = {"base_state": str.lower, "state": str.lower, "status": str.lower}
+    base_transform.update(transform)
+    plan = ColumnPlan(fields, transform=base_transform, maxsize=maxsize)
+    return [plan.row(item) for item in values]
+
+
+def measure(name, fn, repeat):
+    best = None
+    for i in range(repeat):
+        start = perf_counter()
+        fn()
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print("%-28s %8.3f s" % (name, best))
+
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    values = make_rows(num)
+    transform = {"active": str}
+    maxsize = 40
+
+    print("rows: %s - columns: %s - best of %s" % (num, len(FIELDS), repeat))
+    measure("legacy rows", lambda: legacy_rows(values, FIELDS, transform, maxsize), repeat)
+    measure("column plan rows", lambda: plan_rows(values, FIELDS, transform, maxsize), repeat)
+    measure(
+        "legacy rows + tabulate",
+        lambda: tabulate(legacy_rows(values, FIELDS, transform, maxsize), headers=FIELDS, tablefmt="plain"),
+        repeat,
+    )
+    measure(
+        "column plan + tabulate",
+        lambda: tabulate(plan_rows(values, FIELDS, transform, maxsize), headers=FIELDS, tablefmt="plain"),
+        repeat,
+    )
+
+    def stream():
+        base_transform = {"base_state": str.lower, "active": str}
+        plan = ColumnPlan(FIELDS, transform=base_transform, maxsize=maxsize)
+        with open(devnull, "w") as out:
+            TableStreamWriter(headers=FIELDS, stream=out).write(plan.rows(values))
+
+    measure("column plan + stream writer", stream, repeat)
+
+
+if __name__ == "__main__":
+    main()
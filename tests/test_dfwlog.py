@@ -0,0 +1,68 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from datetime import datetime
+from beehive3_cli.plugins.platform.util.dfwlog import DfwLogAnalyzer, DfwLogCache, parse_dfw_message
+
+TCP_REJECT = "dfwpktlogs: 2151 INET match REJECT domain-c7/1045 IN 60 TCP 10.102.185.10/51938->10.138.144.20/22 S"
+ICMP_PASS = "dfwpktlogs: 2151 INET match PASS domain-c7/1001 OUT 84 PROTO 1 10.102.185.10->10.138.144.20"
+
+
+def test_parse_dfw_message():
+    record = parse_dfw_message(TCP_REJECT, ts="2024-01-31T10:20:30.123Z")
+    assert record == {
+        "ts": "2024-01-31T10:20:30.123Z",
+        "action": "REJECT",
+        "ruleset": "domain-c7",
+        "rule": "1045",
+        "direction": "IN",
+        "length": "60",
+        "proto": "TCP",
+        "src": "10.102.185.10",
+        "sport": "51938",
+        "dst": "10.138.144.20",
+        "dport": "22",
+    }
+
+    record = parse_dfw_message(ICMP_PASS)
+    assert record["action"] == "PASS"
+    assert record["proto"] == "1"
+    assert record["sport"] is None
+    assert record["dst"] == "10.138.144.20"
+
+    assert parse_dfw_message("sshd[123]: Accepted publickey for root") is None
+    assert parse_dfw_message(None) is None
+
+
+def test_dfw_log_analyzer():
+    analyzer = DfwLogAnalyzer(bucket=300)
+    analyzer.add(parse_dfw_message(TCP_REJECT, ts="2024-01-31T10:01:00Z"))
+    analyzer.add(parse_dfw_message(TCP_REJECT, ts="2024-01-31T10:04:00Z"))
+    analyzer.add(parse_dfw_message(ICMP_PASS, ts="2024-01-31T10:06:00Z"))
+    report = analyzer.report()
+    assert report["total"] == 3
+    assert report["talkers"][0] == {
+        "src": "10.102.185.10",
+        "dst": "10.138.144.20",
+        "dport": "22",
+        "proto": "TCP",
+        "count": 2,
+    }
+    assert report["rules"] == [{"rule": "domain-c7/1045", "rejects": 2}]
+    assert report["timeline"] == [
+        {"time": "2024-01-31 10:00", "flows": 2, "rejects": 2},
+        {"time": "2024-01-31 10:05", "flows": 1, "rejects": 0},
+    ]
+
+
+def test_dfw_log_cache(tmp):
+    cache = DfwLogCache("%s/dfwlog.db" % tmp.dir)
+    key = cache.window_key("vsphere-*", {"bool": {"filter": []}}, datetime(2024, 1, 31, 10, 0))
+    assert cache.get(key) is None
+    records = [parse_dfw_message(TCP_REJECT, ts="2024-01-31T10:01:00Z")]
+    cache.set(key, records)
+    assert cache.get(key) == records
+    cache.set(key, [])
+    assert cache.get(key) == []
+    cache.close()
@@ -0,0 +1,27 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from beehive3_cli.plugins.provider.util.metrics import ZoneMetricSnapshot
+
+
+def test_zone_metric_snapshot(tmp):
+    snapshot = ZoneMetricSnapshot("%s/zonemetrics.db" % tmp.dir, max_age=3600)
+    metrics = [{"key": "vm_gbram", "value": 4}]
+    snapshot.set({"id": 12, "uuid": "uuid-12", "name": "ComputeService-test"}, metrics)
+
+    assert snapshot.get("12") == metrics
+    assert snapshot.get("uuid-12") == metrics
+    assert snapshot.get("ComputeService-test") == metrics
+    assert snapshot.get("13") is None
+    assert snapshot.get_stale(["12", "13"]) == ["13"]
+    assert [z["name"] for z in snapshot.get_all()] == ["ComputeService-test"]
+
+    snapshot.max_age = -1
+    assert snapshot.get("12") is None
+    assert snapshot.get("12", fresh=False) == metrics
+    assert snapshot.get_stale(["12"]) == ["12"]
+
+    snapshot.delete("uuid-12")
+    assert snapshot.get_all() == []
+    snapshot.close()
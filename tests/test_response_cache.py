@@ -0,0 +1,29 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from beehive3_cli.core.response_cache import ResponseCache
+
+
+def test_response_cache(tmp):
+    cache = ResponseCache("%s/responses.db" % tmp.dir, rules={"*/servicedefs*": 900, "*/flavors*": 0})
+    assert cache.get_ttl("/v1.0/nws/servicedefs?size=10") == 900
+    assert cache.get_ttl("/v1.0/nws/serviceinsts") is None
+
+    key = cache.get_key("user", "service", "/v1.0/nws/servicedefs", {"size": 10, "page": 0})
+    assert key == cache.get_key("user", "service", "/v1.0/nws/servicedefs", {"page": 0, "size": 10})
+    assert cache.get(key) is None
+    cache.set(key, "service", "/v1.0/nws/servicedefs", {"size": 10}, 900, {"servicedefs": [{"id": 1}]})
+    assert cache.get(key) == {"servicedefs": [{"id": 1}]}
+
+    expired = cache.get_key("user", "service", "/v1.0/nws/flavors", None)
+    cache.set(expired, "service", "/v1.0/nws/flavors", None, 0, {"flavors": []})
+    assert cache.get(expired) is None
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 2
+
+    assert cache.invalidate_collection("service", "/v1.0/nws/servicedefs/123") == 1
+    assert cache.get(key) is None
+    assert [r["uri"] for r in cache.get_all()] == ["/v1.0/nws/flavors"]
+    assert cache.invalidate() == 1
+    cache.close()
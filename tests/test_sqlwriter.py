@@ -0,0 +1,89 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine, text
+from beehive3_cli.plugins.metrics.util.sqlwriter import BatchedSqlWriter
+
+
+@pytest.fixture(scope="function")
+def conn():
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        with conn.begin():
+            conn.execute(
+                text(
+                    "CREATE TABLE volumes (resource_uuid TEXT PRIMARY KEY, name TEXT NOT NULL, size INTEGER, "
+                    "modification_date TEXT)"
+                )
+            )
+        yield conn
+    engine.dispose()
+
+
+def writer(conn, batch=500):
+    return BatchedSqlWriter(
+        conn,
+        "volumes",
+        "resource_uuid",
+        ["resource_uuid", "name", "size", "modification_date"],
+        update_columns=["name", "size", "modification_date"],
+        compare="modification_date",
+        batch=batch,
+    )
+
+
+def read_all(conn):
+    rows = conn.execute(text("SELECT resource_uuid, name, size, modification_date FROM volumes")).fetchall()
+    return {row[0]: tuple(row[1:]) for row in rows}
+
+
+def test_insert(conn):
+    with writer(conn, batch=2) as w:
+        for idx in range(5):
+            w.add({"resource_uuid": "uuid-%s" % idx, "name": "vol%s" % idx, "size": idx, "modification_date": None})
+    assert w.stats == {"inserted": 5, "updated": 0, "unchanged": 0, "failed": 0}
+    assert read_all(conn)["uuid-3"] == ("vol3", 3, None)
+
+
+def test_update_on_changed_date(conn):
+    with writer(conn) as w:
+        w.add({"resource_uuid": "uuid-1", "name": "vol1", "size": 10, "modification_date": "2024-01-31T10:20:30Z"})
+        w.add({"resource_uuid": "uuid-2", "name": "vol2", "size": 20, "modification_date": "2024-01-31T10:20:30Z"})
+
+    with writer(conn) as w:
+        w.add({"resource_uuid": "uuid-1", "name": "vol1", "size": 15, "modification_date": "2024-02-01T08:00:00Z"})
+        w.add(
+            {
+                "resource_uuid": "uuid-2",
+                "name": "vol2",
+                "size": 25,
+                "modification_date": datetime(2024, 1, 31, 10, 20, 30),
+            }
+        )
+    assert w.stats == {"inserted": 0, "updated": 1, "unchanged": 1, "failed": 0}
+    rows = read_all(conn)
+    assert rows["uuid-1"] == ("vol1", 15, "2024-02-01T08:00:00Z")
+    assert rows["uuid-2"] == ("vol2", 20, "2024-01-31T10:20:30Z")
+
+
+def test_unchanged_rows(conn):
+    row = {"resource_uuid": "uuid-1", "name": "vol1", "size": 10, "modification_date": "2024-01-31T10:20:30Z"}
+    with writer(conn) as w:
+        w.add(row)
+    with writer(conn) as w:
+        w.add(row)
+        w.add(row)
+    assert w.stats == {"inserted": 0, "updated": 0, "unchanged": 1, "failed": 0}
+    assert len(read_all(conn)) == 1
+
+
+def test_failed_batch(conn):
+    with writer(conn, batch=2) as w:
+        w.add({"resource_uuid": "uuid-1", "name": "vol1", "size": 1, "modification_date": None})
+        w.add({"resource_uuid": "uuid-2", "name": None, "size": 2, "modification_date": None})
+        w.add({"resource_uuid": "uuid-3", "name": "vol3", "size": 3, "modification_date": None})
+    assert w.stats == {"inserted": 2, "updated": 0, "unchanged": 0, "failed": 1}
+    assert sorted(read_all(conn).keys()) == ["uuid-1", "uuid-3"]
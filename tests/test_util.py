@@ -0,0 +1,61 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from threading import Lock
+from time import sleep
+from beehive3_cli.core.util import reduce_latest, run_concurrent
+
+
+def test_run_concurrent():
+    def fn(item):
+        if item == 3:
+            raise ValueError("bad item %s" % item)
+        return item * 2
+
+    for workers in [1, 4]:
+        res = {item: (result, ex) for item, result, ex in run_concurrent(fn, range(10), workers=workers)}
+        assert sorted(res.keys()) == list(range(10))
+        assert res[2] == (4, None)
+        assert res[3][0] is None
+        assert isinstance(res[3][1], ValueError)
+
+
+def test_run_concurrent_max_workers():
+    lock = Lock()
+    running = {"now": 0, "max": 0}
+
+    def fn(item):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        sleep(0.01)
+        with lock:
+            running["now"] -= 1
+        return item
+
+    items = (i for i in range(20))
+    res = [result for _, result, _ in run_concurrent(fn, items, workers=3)]
+    assert sorted(res) == list(range(20))
+    assert running["max"] <= 3
+
+
+def test_reduce_latest():
+    items = [
+        {"workload_id": "w1", "created_at": "2024-01-01T10:00:00Z", "status": "old"},
+        {"workload_id": "w2", "created_at": "2024-01-02T10:00:00Z", "status": "ok"},
+        {"workload_id": "w1", "created_at": "2024-01-03T10:00:00Z", "status": "new"},
+        {"workload_id": "w1", "created_at": None, "status": "dateless"},
+    ]
+    latest = reduce_latest(iter(items), "workload_id", "created_at")
+    assert latest["w1"]["status"] == "new"
+    assert latest["w2"]["status"] == "ok"
+
+    latest = reduce_latest(
+        [{"workload_id": "w2", "created_at": "2024-01-04T10:00:00Z", "status": "newer"}],
+        "workload_id",
+        "created_at",
+        latest=latest,
+    )
+    assert latest["w2"]["status"] == "newer"
+    assert len(latest) == 2